@@ -0,0 +1,369 @@
+"""Local stand-in for the Peoria PD ArcGIS FeatureServer layers.
+
+Serves ``{layer}/FeatureServer/0?f=json`` (layer metadata) and
+``{layer}/FeatureServer/0/query`` over deterministic synthetic data for every
+layer in ``ENDPOINTS``, implementing the parts of the query protocol the sync
+uses: ``where`` (``1=1``, numeric and ``TIMESTAMP`` comparisons and ``IS NULL``
+on OBJECTID and the layer's date field, joined with AND), ``outFields``, ``returnGeometry``,
+``geometryPrecision``, ``resultOffset``/``resultRecordCount`` with
+``exceededTransferLimit``, and ``returnIdsOnly``.
+
+Features are generated on demand from their index, so even the full-size
+calls layer costs only its timestamp list in memory. ``latency`` seconds are
+added to every request and ``error_rate`` of requests fail with a 503
+(``Retry-After: 0``).
+
+Usage::
+
+    with ArcGISStub(sizes={"crimes": 1000}) as stub:
+        with patch.dict(ENDPOINTS, stub.endpoints):
+            run_full_sync(db_path)
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.config import ENDPOINTS
+
+# Record counts matching the live layers (ARCHITECTURE.md Section 2.1)
+FULL_SIZES = {
+    "crimes": 68_000,
+    "calls_for_service": 295_000,
+    "shotspotter": 10_000,
+    "beats": 20,
+    "districts": 5,
+    "community_policing": 10,
+}
+
+_START_MS = int(datetime(2019, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+_END_MS = int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+_OFFENSES = [
+    ("13A", "Assault Offenses", "Aggravated Assault", "Person"),
+    ("13B", "Assault Offenses", "Simple Assault", "Person"),
+    ("220", "Burglary/Breaking & Entering", "Burglary", "Property"),
+    ("23H", "Larceny/Theft Offenses", "All Other Larceny", "Property"),
+    ("240", "Motor Vehicle Theft", "Motor Vehicle Theft", "Property"),
+    ("290", "Destruction/Damage/Vandalism", "Vandalism", "Property"),
+    ("35A", "Drug/Narcotic Offenses", "Drug/Narcotic Violations", "Society"),
+    ("520", "Weapon Law Violations", "Weapon Law Violations", "Society"),
+]
+_STREETS = ["MAIN ST", "ADAMS ST", "KNOXVILLE AVE", "WAR MEMORIAL DR", "UNIVERSITY ST",
+            "WESTERN AVE", "LINCOLN AVE", "GLEN AVE", "SHERIDAN RD", "MacARTHUR HWY"]
+_BEATS = ["1A", "1B", "2A", "2B", "3A", "3B", "4A", "4B", "5A", "5B"]
+_CALL_TYPES = ["DISTURBANCE", "TRAFFIC STOP", "ALARM", "WELFARE CHECK", "THEFT", "SHOTS FIRED"]
+_DOW = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_DATE_FIELDS = {"crimes": "reportdate", "calls_for_service": "calldate", "shotspotter": "Date"}
+
+def _unit(i: int, salt: int) -> float:
+    """Cheap deterministic pseudo-random value in [0, 1) for record ``i``."""
+    return ((i * 2654435761 + salt * 40503) % 1_000_003) / 1_000_003
+
+
+def _extra(i: int, ts: int) -> dict:
+    """Unmapped fields the real layers also carry."""
+    return {
+        "GlobalID": f"{{{i:08X}-0000-4000-8000-{i * 7919 % 16**12:012X}}}",
+        "created_user": "PPD_GIS",
+        "last_edited_date": ts,
+        "narrative": "Synthetic record generated for load testing.",
+    }
+
+
+def _crime(i: int, ts: int) -> dict:
+    code, offense, desc, against = _OFFENSES[i % len(_OFFENSES)]
+    dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
+    return {
+        "OBJECTID": i + 1,
+        "offenseid": f"OFF-{i + 1:07d}",
+        "callid": f"CALL-{i + 1:07d}",
+        "statute": "720-5/12-3.05(a)(1)",
+        "nibrscode": code,
+        "nibrsoffense": offense,
+        "nibrsdesc": desc,
+        "nibrscrimeag": against,
+        "attemptcompleted": "Completed",
+        "fulladdr": f"{(i * 37) % 4000 + 100} {_STREETS[i % len(_STREETS)]}",
+        "city": "PEORIA",
+        "state": "IL",
+        "zip5": "61602",
+        "beat": _BEATS[i % len(_BEATS)],
+        "district": str(i % 5 + 1),
+        "neighborhood": f"Neighborhood {i % 25}",
+        "weaponcat": "None",
+        "weapondesc": None,
+        "reportdate": ts,
+        "reportyear": dt.year,
+        "reportmonth": dt.month,
+        "reporthour": dt.hour,
+        "reportdow": _DOW[dt.weekday()],
+        **_extra(i, ts),
+    }
+
+
+def _call(i: int, ts: int) -> dict:
+    return {
+        "OBJECTID": i + 1,
+        "callid": f"CFS-{i + 1:08d}",
+        "calltype": _CALL_TYPES[i % len(_CALL_TYPES)],
+        "priority": f"P{i % 3 + 1}",
+        "disposition": "REPORT" if i % 4 else "NO REPORT",
+        "fulladdr": f"{(i * 53) % 4000 + 100} {_STREETS[i % len(_STREETS)]}",
+        "beat": _BEATS[i % len(_BEATS)],
+        "district": str(i % 5 + 1),
+        "calldate": ts,
+        **_extra(i, ts),
+    }
+
+
+def _shot(i: int, ts: int) -> dict:
+    return {
+        "OBJECTID": i + 1,
+        "ShotSpotter_ID": f"SS-{i + 1:07d}",
+        "Rounds": i % 12 + 1,
+        "Type": "Multiple Gunshots" if i % 3 else "Single Gunshot",
+        "Address": f"{(i * 11) % 4000 + 100} {_STREETS[i % len(_STREETS)]}",
+        "Beat": _BEATS[i % len(_BEATS)],
+        "District": str(i % 5 + 1),
+        "Date": ts,
+        **_extra(i, ts),
+    }
+
+
+_POINT_LAYERS = {"crimes": _crime, "calls_for_service": _call, "shotspotter": _shot}
+_BOUNDARY_NAMES = {
+    "beats": ("beat", "Beat"),
+    "districts": ("district", "District"),
+    "community_policing": ("name", "Area"),
+}
+
+
+class _Layer:
+    """Synthetic records of one layer plus a cache of evaluated where clauses."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self.date_field = _DATE_FIELDS.get(name)
+        span = _END_MS - _START_MS
+        # Mostly increasing report times with some back-dated records
+        self.timestamps = [
+            _START_MS + int(span * min(1.0, max(0.0, i / max(size, 1) - 0.01 * _unit(i, 1))))
+            for i in range(size)
+        ]
+        self._matches: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def attributes(self, i: int) -> dict:
+        if self.name in _POINT_LAYERS:
+            return _POINT_LAYERS[self.name](i, self.timestamps[i])
+        field, label = _BOUNDARY_NAMES[self.name]
+        return {"OBJECTID": i + 1, field: f"{label} {i + 1}"}
+
+    def geometry(self, i: int) -> dict:
+        if self.name in _POINT_LAYERS:
+            # Distinct multipliers so x and y do not fall on a single line
+            return {"x": -89.70 + 0.15 * _unit(i, 2), "y": 40.62 + 0.20 * _unit(i * 7919, 3)}
+        x, y = -89.70 + 0.02 * (i % 8), 40.62 + 0.02 * (i // 8)
+        ring = [[x + 0.0001 * k, y] for k in range(200)]  # detailed south edge
+        return {"rings": [ring + [[x + 0.02, y + 0.02], [x, y + 0.02], ring[0]]]}
+
+    def fields(self) -> list[dict]:
+        return [{"name": name, "type": "esriFieldTypeString"} for name in self.attributes(0)]
+
+    def match(self, where: str) -> list[int]:
+        """Indexes of records satisfying ``where``, in OBJECTID order."""
+        with self._lock:
+            cached = self._matches.get(where)
+        if cached is not None:
+            return cached
+        lo, hi, predicates = 0, self.size - 1, []
+        for clause in where.split(" AND "):
+            field, op, value = _parse_condition(clause.strip().strip("()"))
+            if field is None:
+                continue
+            if field == "OBJECTID":
+                if op in (">=", ">", "="):
+                    lo = max(lo, value - 1 + (op == ">"))
+                if op in ("<=", "<", "="):
+                    hi = min(hi, value - 1 - (op == "<"))
+            elif field == self.date_field:
+                predicates.append((_COMPARE[op], value))
+            else:
+                raise ValueError(f"Unsupported where field: {field}")
+        ts = self.timestamps
+        matches = [
+            i for i in range(lo, hi + 1)
+            if all(compare(ts[i], value) for compare, value in predicates)
+        ]
+        with self._lock:
+            if len(self._matches) > 512:
+                self._matches.clear()
+            self._matches[where] = matches
+        return matches
+
+
+_COMPARE = {
+    ">=": lambda a, b: a >= b, ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b, "<": lambda a, b: a < b,
+    "=": lambda a, b: a == b, "IS NULL": lambda a, b: a is None,
+}
+_CONDITION = re.compile(r"^(\w+)\s*(>=|<=|=|>|<)\s*(?:TIMESTAMP\s+'([^']+)'|(-?\d+))$")
+
+
+def _parse_condition(clause: str) -> tuple:
+    """``(field, op, value)`` for one comparison; ``(None, None, None)`` for 1=1."""
+    if clause.replace(" ", "") == "1=1":
+        return None, None, None
+    if clause.upper().endswith(" IS NULL"):
+        return clause.split()[0], "IS NULL", None
+    m = _CONDITION.match(clause)
+    if not m:
+        raise ValueError(f"Unsupported where clause: {clause}")
+    field, op, stamp, number = m.groups()
+    if stamp is not None:
+        dt = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        return field, op, int(dt.timestamp() * 1000)
+    return field, op, int(number)
+
+
+class ArcGISStub:
+    """Threaded HTTP server standing in for the ArcGIS layers in ``ENDPOINTS``.
+
+    ``sizes`` overrides per-layer record counts (default :data:`FULL_SIZES`);
+    ``stats`` counts requests served and errors injected.
+    """
+
+    def __init__(
+        self,
+        sizes: dict | None = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        max_record_count: int = 2000,
+        seed: int = 0,
+    ):
+        sizes = {**FULL_SIZES, **(sizes or {})}
+        self.layers = {name: _Layer(name, sizes[name]) for name in ENDPOINTS}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_record_count = max_record_count
+        self.stats = {"requests": 0, "errors": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def endpoints(self) -> dict[str, str]:
+        host, port = self._server.server_address[:2]
+        return {name: f"http://{host}:{port}/{name}/FeatureServer/0" for name in self.layers}
+
+    def start(self) -> "ArcGISStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body, headers = stub.handle(self.path)
+                payload = json.dumps(body, separators=(",", ":")).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ArcGISStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def handle(self, path: str) -> tuple[int, dict, dict]:
+        """Answer one GET; returns ``(status, json_body, extra_headers)``."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.stats["requests"] += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.stats["errors"] += 1
+        if fail:
+            return 503, {"error": {"code": 503, "message": "Injected failure"}}, {"Retry-After": "0"}
+        url = urlparse(path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        layer = self.layers.get(parts[0])
+        if layer is None:
+            return 404, {"error": {"code": 404, "message": "Layer not found"}}, {}
+        try:
+            if parts[-1] == "query":
+                return 200, self._query(layer, params), {}
+            return 200, self._metadata(layer), {}
+        except ValueError as exc:
+            return 400, {"error": {"code": 400, "message": str(exc)}}, {}
+
+    def _metadata(self, layer: _Layer) -> dict:
+        geometry = "esriGeometryPoint" if layer.name in _POINT_LAYERS else "esriGeometryPolygon"
+        return {
+            "name": layer.name,
+            "type": "Feature Layer",
+            "geometryType": geometry,
+            "objectIdField": "OBJECTID",
+            "maxRecordCount": self.max_record_count,
+            "fields": layer.fields(),
+        }
+
+    def _query(self, layer: _Layer, params: dict) -> dict:
+        matches = layer.match(params.get("where", "1=1"))
+        if params.get("returnIdsOnly") == "true":
+            return {"objectIdFieldName": "OBJECTID", "objectIds": [i + 1 for i in matches]}
+        offset = int(params.get("resultOffset", 0))
+        count = min(int(params.get("resultRecordCount", self.max_record_count)),
+                    self.max_record_count)
+        page = matches[offset:offset + count]
+        out_fields = params.get("outFields", "*")
+        wanted = None if out_fields == "*" else out_fields.split(",")
+        with_geometry = params.get("returnGeometry", "true") != "false"
+        precision = params.get("geometryPrecision")
+        features = []
+        for i in page:
+            attrs = layer.attributes(i)
+            if wanted is not None:
+                missing = [name for name in wanted if name not in attrs]
+                if missing:
+                    raise ValueError(f"Invalid field(s): {','.join(missing)}")
+                attrs = {name: attrs[name] for name in wanted}
+            feature = {"attributes": attrs}
+            if with_geometry:
+                geom = layer.geometry(i)
+                if precision is not None and "x" in geom:
+                    digits = int(precision)
+                    geom = {"x": round(geom["x"], digits), "y": round(geom["y"], digits)}
+                feature["geometry"] = geom
+            features.append(feature)
+        result = {"objectIdFieldName": "OBJECTID", "features": features}
+        if offset + count < len(matches):
+            result["exceededTransferLimit"] = True
+        return result
@@ -0,0 +1,118 @@
+"""Per-render SQLite connection overhead: reconnecting per query vs. reused
+per-thread connections (``database.connection()``).
+
+Builds a database of synthetic crimes (from the ArcGIS stand-in's generator)
+and replays the queries one dashboard render issues, first with every query
+opening and closing its own connection (the previous behaviour), then with
+the reused connection. Both runs are in the same process, against a warm OS
+page cache.
+
+Run with ``python -m benchmarks.bench_connections [rows] [renders]``.
+"""
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src import map_utils, queries
+from src.database import close_connections, connection, get_connection, init_db
+from src.dictionary import equals_sql
+from src.sync import FieldMapper
+
+
+def _load(db_path: Path, rows: int) -> None:
+    init_db(db_path)
+    layer = ArcGISStub({"crimes": rows}).layers["crimes"]
+    mapper = FieldMapper("crimes", layer.attributes(0))
+    features = [
+        {"attributes": layer.attributes(i), "geometry": layer.geometry(i)} for i in range(rows)
+    ]
+    conn = get_connection(db_path)
+    mapper.write(conn, mapper.rows(features))
+    conn.commit()
+    conn.close()
+
+
+def _render(db_path: Path, connect) -> None:
+    """The database work of one dashboard render (src/pages/dashboard.py)."""
+    with connect(db_path) as conn:
+        conn.execute("SELECT count(*) FROM crimes").fetchone()
+    for area in ("report_year", "district", "beat", "neighborhood"):
+        queries.get_area_options(db_path, area)
+    queries.compute_severity_score(db_path, district="1")
+    queries.compute_severity_score(db_path)
+    queries.get_yoy_change(db_path, district="1")
+    queries.get_top_crime_types(db_path, limit=5, district="1")
+    with connect(db_path) as conn:
+        conn.execute(f"SELECT count(*) FROM crimes WHERE {equals_sql('district')}", ["1"]).fetchone()
+    with connect(db_path) as conn:
+        conn.execute(
+            f"SELECT * FROM crimes_decoded WHERE {equals_sql('district')} "
+            f"ORDER BY report_date_ms DESC LIMIT 2000", ["1"],
+        ).fetchall()
+    map_utils.add_boundary_overlay(map_utils.create_base_map(), db_path, "districts")
+    queries.get_crime_trend(db_path, district="1")
+
+
+def main(rows: int = 50_000, renders: int = 50) -> None:
+    opened = 0
+
+    @contextmanager
+    def reconnect(db_path):
+        nonlocal opened
+        opened += 1
+        conn = get_connection(db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        _load(db_path, rows)
+        print(f"{rows:,} crimes, {renders} renders")
+
+        with patch.object(queries, "connection", reconnect), \
+                patch.object(map_utils, "connection", reconnect):
+            _render(db_path, reconnect)  # warm-up
+            opened = 0
+            started = time.perf_counter()
+            for _ in range(renders):
+                _render(db_path, reconnect)
+            before = (time.perf_counter() - started) / renders
+        per_render = opened / renders
+
+        _render(db_path, connection)
+        started = time.perf_counter()
+        for _ in range(renders):
+            _render(db_path, connection)
+        after = (time.perf_counter() - started) / renders
+        close_connections()
+
+        # Connection setup alone: open + pragmas + close vs. borrowing
+        n = 2000
+        started = time.perf_counter()
+        for _ in range(n):
+            get_connection(db_path).close()
+        open_cost = (time.perf_counter() - started) / n
+        started = time.perf_counter()
+        for _ in range(n):
+            with connection(db_path):
+                pass
+        borrow_cost = (time.perf_counter() - started) / n
+        close_connections()
+
+    print(f"  reconnect per query : {before * 1000:>8.2f} ms/render "
+          f"({per_render:.0f} connections, {open_cost * 1e6:.0f} us each)")
+    print(f"  reused connection   : {after * 1000:>8.2f} ms/render "
+          f"(borrow {borrow_cost * 1e6:.1f} us)")
+    print(f"  saved               : {(before - after) * 1000:>8.2f} ms/render "
+          f"({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
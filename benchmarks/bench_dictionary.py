@@ -0,0 +1,143 @@
+"""Storage and query latency of dictionary-encoded text columns
+(src/dictionary.py) against the previous plain-text layout.
+
+Loads synthetic crimes and calls for service (from the ArcGIS stand-in's
+generator) through sync's encoding writer, then copies them into a second
+database in the old layout: the text columns stored inline and the same
+indexes on them. Reports the on-disk bytes of each table plus its indexes
+(``dbstat``, after VACUUM; the encoded side includes ``text_codes``) and the
+mean latency of the dashboard's grouped and filtered queries in each layout.
+
+Run with ``python -m benchmarks.bench_dictionary [crimes] [calls]``.
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src.database import INDEXES, get_connection, init_db
+from src.dictionary import DICTIONARY_COLUMNS, decoded, equals_sql, value_sql
+from src.sync import FieldMapper
+
+# (label, plain-text SQL, encoded SQL, params)
+_QUERIES = [
+    ("counts by district",
+     "SELECT district, COUNT(*) FROM crimes GROUP BY district",
+     f"SELECT {value_sql('district')}, COUNT(*) FROM crimes GROUP BY district_code", ()),
+    ("top types in district",
+     "SELECT nibrs_offense, COUNT(*) AS c FROM crimes WHERE district = ? "
+     "GROUP BY nibrs_offense ORDER BY c DESC LIMIT 5",
+     f"SELECT {value_sql('nibrs_offense')}, COUNT(*) AS c FROM crimes "
+     f"WHERE {equals_sql('district')} GROUP BY nibrs_offense_code ORDER BY c DESC LIMIT 5",
+     ("1",)),
+    ("trend in beat",
+     "SELECT report_year, report_month, COUNT(*) FROM crimes WHERE beat = ? "
+     "GROUP BY report_year, report_month",
+     f"SELECT report_year, report_month, COUNT(*) FROM crimes WHERE {equals_sql('beat')} "
+     f"GROUP BY report_year, report_month",
+     ("1A",)),
+    ("time patterns",
+     "SELECT report_dow, report_hour, COUNT(*) FROM crimes "
+     "WHERE report_dow IS NOT NULL GROUP BY report_dow, report_hour",
+     f"SELECT {value_sql('report_dow')}, report_hour, COUNT(*) FROM crimes "
+     f"WHERE report_dow_code IS NOT NULL GROUP BY report_dow_code, report_hour", ()),
+    ("map crimes in district",
+     "SELECT * FROM crimes WHERE district = ? ORDER BY report_date_ms DESC LIMIT 2000",
+     f"SELECT * FROM crimes_decoded WHERE {equals_sql('district')} "
+     f"ORDER BY report_date_ms DESC LIMIT 2000",
+     ("1",)),
+]
+
+
+def _load(db_path: Path, sizes: dict[str, int]) -> None:
+    init_db(db_path)
+    stub = ArcGISStub(sizes)
+    conn = get_connection(db_path)
+    for table, rows in sizes.items():
+        layer = stub.layers[table]
+        mapper = FieldMapper(table, layer.attributes(0))
+        for first in range(0, rows, 100_000):
+            features = [
+                {"attributes": layer.attributes(i), "geometry": layer.geometry(i)}
+                for i in range(first, min(first + 100_000, rows))
+            ]
+            mapper.write(conn, mapper.rows(features))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def _copy_as_text(db_path: Path, text_path: Path) -> None:
+    """The encoded tables, decoded, in ``text_path`` with their indexes on
+    the text columns."""
+    conn = sqlite3.connect(text_path)
+    conn.execute("ATTACH DATABASE ? AS encoded", (str(db_path),))
+    for table, fields in DICTIONARY_COLUMNS.items():
+        codes = {f"{field}_code" for field in fields}
+        columns = [
+            row[1] for row in conn.execute(f"PRAGMA encoded.table_info({decoded(table)})")
+            if row[1] not in codes
+        ]
+        conn.execute(
+            f"CREATE TABLE {table} AS SELECT {', '.join(columns)} FROM encoded.{decoded(table)}"
+        )
+        for name, indexed in INDEXES[table].items():
+            plain = ", ".join(column.strip().removesuffix("_code") for column in indexed.split(","))
+            conn.execute(f"CREATE INDEX {name} ON {table}({plain})")
+    conn.commit()
+    conn.execute("DETACH DATABASE encoded")
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def _bytes(conn: sqlite3.Connection, table: str) -> int:
+    """Bytes of ``table`` and its indexes."""
+    return conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name = ?1 "
+        "OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?1)",
+        (table,),
+    ).fetchone()[0] or 0
+
+
+def _time(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int = 10) -> float:
+    """Mean milliseconds per execution."""
+    conn.execute(sql, params).fetchall()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(crimes: int = 300_000, calls: int = 300_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, text_path = Path(tmp) / "encoded.db", Path(tmp) / "text.db"
+        _load(db_path, {"crimes": crimes, "calls_for_service": calls})
+        _copy_as_text(db_path, text_path)
+        encoded, text = sqlite3.connect(db_path), sqlite3.connect(text_path)
+
+        print(f"{crimes:,} crimes, {calls:,} calls for service")
+        print(f"{'table + indexes':<24}{'text':>12}{'encoded':>12}{'saved':>8}")
+        totals = [0, _bytes(encoded, "text_codes")]
+        for table in DICTIONARY_COLUMNS:
+            before, after = _bytes(text, table), _bytes(encoded, table)
+            totals[0] += before
+            totals[1] += after
+            print(f"{table:<24}{before / 2**20:>9.1f} MB{after / 2**20:>9.1f} MB"
+                  f"{1 - after / before:>8.0%}")
+        print(f"{'total (+ text_codes)':<24}{totals[0] / 2**20:>9.1f} MB"
+              f"{totals[1] / 2**20:>9.1f} MB{1 - totals[1] / totals[0]:>8.0%}")
+
+        print(f"\n{'query':<26}{'text':>12}{'encoded':>12}")
+        for label, text_sql, encoded_sql, params in _QUERIES:
+            before, after = _time(text, text_sql, params), _time(encoded, encoded_sql, params)
+            print(f"{label:<26}{before:>9.2f} ms{after:>9.2f} ms")
+        encoded.close()
+        text.close()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
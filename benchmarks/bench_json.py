@@ -0,0 +1,84 @@
+"""JSON decode cost of realistic 2000-feature ArcGIS query pages.
+
+Pages are rendered by :class:`benchmarks.arcgis_stub.ArcGISStub` (no server
+is started) exactly as a sync requests them: mapped fields only, rounded
+geometry. Each page body is decoded with ``requests``' ``Response.json()``
+(the previous path), stdlib ``json.loads`` and orjson (if installed),
+reporting decode time and the tracemalloc peak per page.
+
+Run with ``python -m benchmarks.bench_json [pages]``.
+"""
+import json
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+import requests
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src.http_client import orjson
+from src.sync import FieldMapper, _layer_query
+
+_PAGE = 2000
+
+
+def _bodies(layer: str, pages: int) -> list[bytes]:
+    stub = ArcGISStub({layer: _PAGE * pages}, max_record_count=_PAGE)
+    _, info, _ = stub.handle(f"/{layer}")
+    query = _layer_query(layer, info, FieldMapper(layer, [f["name"] for f in info["fields"]]))
+    params = {"where": "1=1", "outFields": query["out_fields"], "geometryPrecision": 6}
+    bodies = []
+    for page in range(pages):
+        params["resultOffset"] = page * _PAGE
+        _, data, _ = stub.handle(f"/{layer}/query?{urlencode(params)}")
+        bodies.append(json.dumps(data).encode())
+    return bodies
+
+
+def _response_json(body: bytes) -> list:
+    resp = requests.Response()
+    resp._content = body
+    resp.encoding = "utf-8"
+    return resp.json()["features"]
+
+
+def _measure(decode, bodies: list[bytes]) -> tuple[float, float]:
+    """Mean seconds and mean tracemalloc peak (MB) per page."""
+    seconds = []
+    for body in bodies:
+        started = time.perf_counter()
+        decode(body)
+        seconds.append(time.perf_counter() - started)
+    peaks = []
+    for body in bodies[:3]:
+        tracemalloc.start()
+        decode(body)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return sum(seconds) / len(seconds), sum(peaks) / len(peaks) / 1e6
+
+
+def main(pages: int = 10) -> None:
+    decoders = {
+        "Response.json()": _response_json,
+        "json.loads": lambda body: json.loads(body)["features"],
+    }
+    if orjson is not None:
+        decoders["orjson.loads"] = lambda body: orjson.loads(body)["features"]
+    for layer in ("crimes", "calls_for_service"):
+        bodies = _bodies(layer, pages)
+        expected = json.loads(bodies[0])["features"]
+        print(f"{layer}: {pages} pages x {_PAGE} features, "
+              f"{sum(map(len, bodies)) / len(bodies) / 1e6:.2f} MB/page")
+        baseline = None
+        for label, decode in decoders.items():
+            assert decode(bodies[0]) == expected, label
+            seconds, peak = _measure(decode, bodies)
+            baseline = baseline or seconds
+            print(f"  {label:<17}{seconds * 1000:>8.1f} ms/page{baseline / seconds:>7.2f}x"
+                  f"{peak:>9.1f} MB peak")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
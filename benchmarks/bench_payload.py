@@ -0,0 +1,42 @@
+"""Bandwidth per record: ``outFields=*`` at full precision vs. the trimmed query.
+
+Downloads the same page of each point layer both ways and prints response
+bytes per record. Needs network access to the ArcGIS endpoints.
+
+Run with ``python -m benchmarks.bench_payload [records]``.
+"""
+import sys
+
+from src.config import ENDPOINTS, FIELD_MAPPINGS
+from src.http_client import get_response
+from src.sync import FieldMapper, _layer_query, fetch_layer_info
+
+
+def _bytes_per_record(url: str, params: dict) -> float:
+    resp = get_response(f"{url}/query", params)
+    features = resp.json().get("features", [])
+    return len(resp.content) / max(len(features), 1)
+
+
+def main(n: int = 1000) -> None:
+    for table in FIELD_MAPPINGS:
+        url = ENDPOINTS[table]
+        info = fetch_layer_info(url)
+        mapper = FieldMapper(table, [f["name"] for f in info.get("fields") or []])
+        query = _layer_query(table, info, mapper)
+        base = {"where": "1=1", "outSR": 4326, "f": "json", "resultRecordCount": n}
+        before = _bytes_per_record(url, {**base, "outFields": "*"})
+        trimmed = {**base, "outFields": query["out_fields"]}
+        if query["return_geometry"]:
+            trimmed["geometryPrecision"] = 6
+        else:
+            trimmed["returnGeometry"] = "false"
+        after = _bytes_per_record(url, trimmed)
+        print(
+            f"{table:<18} before {before:>7,.0f} B/record   after {after:>7,.0f} "
+            f"B/record   ({1 - after / before:.0%} smaller)"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
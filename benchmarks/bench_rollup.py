@@ -0,0 +1,148 @@
+"""Dashboard/trends aggregate latency: GROUP BYs over crimes vs. the crime
+rollups (src/rollup.py), and what maintaining the rollups costs.
+
+Loads synthetic crimes (from the ArcGIS stand-in's generator) and times the
+aggregate queries one dashboard plus trends render issues, first written
+over crimes (the previous queries, on its covering indexes) and then
+through the query layer, which reads the rollups. Also reports the rollup
+sizes, a full rebuild, and sync's write time for a batch of new crimes with
+and without the rollup triggers.
+
+Run with ``python -m benchmarks.bench_rollup [rows]``.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src import queries
+from src.database import (
+    _rollup_triggers,
+    close_connections,
+    connection,
+    get_connection,
+    init_db,
+)
+from src.dictionary import equals_sql, value_sql
+from src.rollup import ROLLUPS, rebuild_rollup
+from src.sync import FieldMapper
+
+_BATCH = 10_000
+
+
+def _mapped(rows: int) -> tuple[FieldMapper, list[tuple]]:
+    layer = ArcGISStub({"crimes": rows}).layers["crimes"]
+    mapper = FieldMapper("crimes", layer.attributes(0))
+    features = [
+        {"attributes": layer.attributes(i), "geometry": layer.geometry(i)} for i in range(rows)
+    ]
+    return mapper, mapper.rows(features)
+
+
+def _raw_render(db_path: Path) -> None:
+    """The previous COUNT/GROUP BY queries over crimes."""
+    district = equals_sql("district")
+    with connection(db_path) as conn:
+        for sql, params in (
+            (f"SELECT {value_sql('district')}, COUNT(*) FROM crimes GROUP BY district_code", ()),
+            (f"SELECT {value_sql('beat')}, COUNT(*) FROM crimes WHERE report_year = ? "
+             f"GROUP BY beat_code", (2024,)),
+            (f"SELECT report_year, report_month, COUNT(*) FROM crimes WHERE {district} "
+             f"GROUP BY report_year, report_month ORDER BY report_year, report_month", ("1",)),
+            (f"SELECT {value_sql('nibrs_offense')}, COUNT(*) FROM crimes WHERE {district} "
+             f"GROUP BY nibrs_offense_code", ("1",)),
+            (f"SELECT {value_sql('nibrs_offense')}, COUNT(*) FROM crimes "
+             f"GROUP BY nibrs_offense_code", ()),
+            (f"SELECT {value_sql('nibrs_offense')} AS type, COUNT(*) AS cnt FROM crimes "
+             f"WHERE {district} AND nibrs_offense_code IS NOT NULL GROUP BY nibrs_offense_code "
+             f"ORDER BY cnt DESC, type LIMIT 5", ("1",)),
+            (f"SELECT report_year, COUNT(*), COUNT(DISTINCT report_month) FROM crimes "
+             f"WHERE {district} GROUP BY report_year ORDER BY report_year DESC", ("1",)),
+            (f"SELECT report_year, report_month, {value_sql('nibrs_offense')}, COUNT(*) "
+             f"FROM crimes WHERE report_year IN (?, ?) "
+             f"GROUP BY report_year, report_month, nibrs_offense_code", (2023, 2024)),
+            (f"SELECT {value_sql('report_dow')}, report_hour, COUNT(*) FROM crimes "
+             f"WHERE report_dow_code IS NOT NULL AND report_hour IS NOT NULL "
+             f"GROUP BY report_dow_code, report_hour", ()),
+        ):
+            conn.execute(sql, params).fetchall()
+
+
+def _rollup_render(db_path: Path) -> None:
+    """The same numbers from the query layer and pages (rollups)."""
+    queries.get_crime_counts_by_area(db_path, "district")
+    queries.get_crime_counts_by_area(db_path, "beat", 2024)
+    queries.get_crime_trend(db_path, district="1")
+    queries.compute_severity_score(db_path, district="1")
+    queries.compute_severity_score(db_path)
+    queries.get_top_crime_types(db_path, limit=5, district="1")
+    queries.get_yoy_change(db_path, district="1")
+    with connection(db_path) as conn:
+        conn.execute(
+            f"SELECT report_year, report_month, {value_sql('nibrs_offense')}, SUM(crimes) "
+            f"FROM crime_rollup WHERE report_year IN (?, ?) "
+            f"GROUP BY report_year, report_month, nibrs_offense_code", (2023, 2024),
+        ).fetchall()
+    queries.get_time_patterns(db_path)
+
+
+def _time(render, db_path: Path, repeat: int = 10) -> float:
+    """Mean milliseconds per render."""
+    render(db_path)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render(db_path)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def _write_seconds(db_path: Path, mapper: FieldMapper, rows: list[tuple]) -> float:
+    conn = get_connection(db_path)
+    started = time.perf_counter()
+    mapper.write(conn, rows)
+    conn.commit()
+    seconds = time.perf_counter() - started
+    conn.close()
+    return seconds
+
+
+def main(rows: int = 300_000) -> None:
+    mapper, mapped = _mapped(rows + 2 * _BATCH)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        init_db(db_path)
+        conn = get_connection(db_path)
+        mapper.write(conn, mapped[:rows])
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.commit()
+        cells = {r: conn.execute(f"SELECT COUNT(*) FROM {r}").fetchone()[0] for r in ROLLUPS}
+        started = time.perf_counter()
+        for rollup in ROLLUPS:
+            rebuild_rollup(conn, rollup)
+        conn.commit()
+        rebuild = time.perf_counter() - started
+        conn.close()
+
+        raw, rolled = _time(_raw_render, db_path), _time(_rollup_render, db_path)
+        close_connections()
+
+        with_triggers = _write_seconds(db_path, mapper, mapped[rows:rows + _BATCH])
+        conn = get_connection(db_path)
+        for rollup in ROLLUPS:
+            for name in _rollup_triggers(rollup):
+                conn.execute(f"DROP TRIGGER {name}")
+        conn.commit()
+        conn.close()
+        without = _write_seconds(db_path, mapper, mapped[rows + _BATCH:])
+
+    print(f"{rows:,} crimes; " + ", ".join(f"{r}: {n:,} cells" for r, n in cells.items()))
+    print(f"  full rebuild            : {rebuild:>9.2f} s")
+    print(f"  render, crimes GROUP BY : {raw:>9.1f} ms")
+    print(f"  render, rollups         : {rolled:>9.1f} ms ({raw / rolled:.0f}x)")
+    print(f"  write {_BATCH:,} new crimes : {with_triggers:>9.2f} s with rollup triggers, "
+          f"{without:.2f} s without")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,90 @@
+"""Radius and nearest-neighbour search latency at full-dataset size.
+
+Loads synthetic crimes and calls for service (from the ArcGIS stand-in's
+generator, spread over the Peoria area) and times, for random centres:
+the previous square lat/lon box over the ``(latitude, longitude)`` B-tree,
+:func:`src.queries.get_points_near` (R*Tree candidates + exact haversine)
+and :func:`src.queries.get_points_near`'s k-nearest counterpart. Reports
+the median and p95 per search and the mean result size.
+
+Run with ``python -m benchmarks.bench_spatial [crimes] [calls] [searches]``.
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src import queries
+from src.database import close_connections, connection, get_connection, init_db
+from src.sync import FieldMapper
+
+
+def _load(db_path: Path, sizes: dict[str, int]) -> None:
+    init_db(db_path)
+    stub = ArcGISStub(sizes)
+    conn = get_connection(db_path)
+    for table, rows in sizes.items():
+        layer = stub.layers[table]
+        mapper = FieldMapper(table, layer.attributes(0))
+        features = [
+            {"attributes": layer.attributes(i), "geometry": layer.geometry(i)} for i in range(rows)
+        ]
+        mapper.write(conn, mapper.rows(features))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def _box(db_path: Path, table: str, lat: float, lon: float, radius_miles: float) -> list:
+    """The previous search: a square box, 69 miles per degree both ways."""
+    offset = radius_miles / 69.0
+    with connection(db_path) as conn:
+        return conn.execute(
+            f"SELECT * FROM {table} WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+            (lat - offset, lat + offset, lon - offset, lon + offset),
+        ).fetchall()
+
+
+def _time(search, centres) -> tuple[float, float, float]:
+    """Median and p95 milliseconds per search, and mean rows returned."""
+    seconds, sizes = [], []
+    for lat, lon in centres:
+        started = time.perf_counter()
+        sizes.append(len(search(lat, lon)))
+        seconds.append(time.perf_counter() - started)
+    seconds.sort()
+    p95 = seconds[int(0.95 * (len(seconds) - 1))]
+    return statistics.median(seconds) * 1000, p95 * 1000, statistics.mean(sizes)
+
+
+def main(crimes: int = 70_000, calls: int = 300_000, searches: int = 200) -> None:
+    rng = random.Random(0)
+    centres = [(40.62 + 0.20 * rng.random(), -89.70 + 0.15 * rng.random()) for _ in range(searches)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        _load(db_path, {"crimes": crimes, "calls_for_service": calls})
+        print(f"{crimes:,} crimes, {calls:,} calls for service, {searches} searches")
+        for table in ("crimes", "calls_for_service"):
+            runs = {
+                "box, 0.5 mi (before)": lambda lat, lon: _box(db_path, table, lat, lon, 0.5),
+                "R*Tree radius 0.5 mi": lambda lat, lon: queries.get_points_near(
+                    db_path, table, lat, lon, 0.5),
+                "R*Tree radius 1 mi": lambda lat, lon: queries.get_points_near(
+                    db_path, table, lat, lon, 1.0),
+                "R*Tree 10 nearest": lambda lat, lon: queries.get_nearest_points(
+                    db_path, table, lat, lon, 10),
+            }
+            print(f"  {table}")
+            for label, search in runs.items():
+                search(*centres[0])  # warm-up
+                median, p95, rows = _time(search, centres)
+                print(f"    {label:<22}{median:>7.2f} ms median{p95:>7.2f} ms p95{rows:>9.0f} rows")
+        close_connections()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:4]])
@@ -0,0 +1,104 @@
+"""Street-search latency as the crimes table grows: ``address LIKE '%q%'``
+scans vs. the street dimension's precomputed aggregates (src/streets.py).
+
+For each size, loads synthetic crimes (from the ArcGIS stand-in's generator),
+builds the aggregates (timed: a full :func:`src.streets.refresh_streets`)
+and times one street-search interaction: :func:`src.queries.search_streets`
+plus :func:`src.queries.get_street_crime_summary` for the top hit, against
+the same two calls written with the original ``LIKE`` queries.
+
+Run with ``python -m benchmarks.bench_street_search [rows ...]``.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src import queries
+from src.database import close_connections, connection, get_connection, init_db
+from src.streets import refresh_streets
+from src.sync import FieldMapper
+
+_QUERIES = ("MAIN", "knoxville ave", "1234 WAR", "99")
+
+
+def _load(db_path: Path, rows: int) -> float:
+    """Load ``rows`` crimes; returns the seconds spent building the aggregates."""
+    init_db(db_path)
+    layer = ArcGISStub({"crimes": rows}).layers["crimes"]
+    mapper = FieldMapper("crimes", layer.attributes(0))
+    conn = get_connection(db_path)
+    for first in range(0, rows, 100_000):
+        features = [
+            {"attributes": layer.attributes(i), "geometry": layer.geometry(i)}
+            for i in range(first, min(first + 100_000, rows))
+        ]
+        mapper.write(conn, mapper.rows(features))
+    started = time.perf_counter()
+    refresh_streets(conn)
+    refresh_seconds = time.perf_counter() - started
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return refresh_seconds
+
+
+def _like_interaction(db_path: Path, text: str) -> None:
+    """The original search_streets + get_street_crime_summary queries."""
+    pattern = f"%{text.upper()}%"
+    with connection(db_path) as conn:
+        conn.execute("""
+            SELECT address, COUNT(*) as crime_count,
+                   AVG(latitude) as avg_lat, AVG(longitude) as avg_lon,
+                   GROUP_CONCAT(DISTINCT nibrs_offense) as crime_types,
+                   MIN(report_date) as earliest, MAX(report_date) as latest
+            FROM crimes_decoded WHERE address LIKE ? GROUP BY address
+            ORDER BY crime_count DESC LIMIT 20
+        """, (pattern,)).fetchall()
+        for sql in (
+            "SELECT COUNT(*) FROM crimes WHERE address LIKE ?",
+            "SELECT nibrs_offense, COUNT(*) as cnt FROM crimes_decoded WHERE address LIKE ? "
+            "GROUP BY nibrs_offense ORDER BY cnt DESC",
+            "SELECT report_year, COUNT(*) as cnt FROM crimes WHERE address LIKE ? "
+            "GROUP BY report_year ORDER BY report_year",
+            "SELECT * FROM crimes_decoded WHERE address LIKE ? ORDER BY report_date_ms DESC LIMIT 20",
+        ):
+            conn.execute(sql, (pattern,)).fetchall()
+
+
+def _street_interaction(db_path: Path, text: str) -> None:
+    results = queries.search_streets(db_path, text)
+    if results:
+        queries.get_street_crime_summary(db_path, results[0]["address"], exact=True)
+    queries.get_street_crime_summary(db_path, text)
+
+
+def _time(interaction, db_path: Path, repeat: int = 5) -> float:
+    """Mean milliseconds per interaction over all queries."""
+    for text in _QUERIES:
+        interaction(db_path, text)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in _QUERIES:
+            interaction(db_path, text)
+    return (time.perf_counter() - started) / (repeat * len(_QUERIES)) * 1000
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'rows':>10}{'blocks':>9}{'build':>10}{'LIKE scan':>13}{'aggregates':>14}")
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            build = _load(db_path, rows)
+            with connection(db_path) as conn:
+                blocks = conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+            like = _time(_like_interaction, db_path)
+            aggregates = _time(_street_interaction, db_path)
+            close_connections()
+        print(f"{rows:>10,}{blocks:>9,}{build:>8.1f} s{like:>10.1f} ms{aggregates:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [70_000, 300_000, 1_000_000])
@@ -0,0 +1,79 @@
+"""End-to-end sync throughput against the local ArcGIS stand-in.
+
+Starts :class:`benchmarks.arcgis_stub.ArcGISStub` at full layer sizes (or
+``--scale`` of them), then runs each source's sync, and finally
+``run_full_sync``, in a fresh process against an empty database. Reports rows,
+seconds, rows/sec, HTTP requests, response bytes and peak RSS per run.
+
+Run with ``python -m benchmarks.bench_sync [--scale 0.1] [--latency 0.05]
+[--error-rate 0.01] [--workers 4] [--archive]``.
+"""
+import argparse
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from benchmarks.arcgis_stub import FULL_SIZES, ArcGISStub
+
+_SOURCES = ("crimes", "calls_for_service", "shotspotter", "boundaries", "all")
+
+
+def _run(source: str, endpoints: dict, db_path: Path, archive_dir: Path | None, workers: int) -> dict:
+    """Child-process body: sync ``source`` against the stub and measure it."""
+    from src import sync
+    from src.config import ENDPOINTS
+    from src.http_client import get_stats
+
+    ENDPOINTS.update(endpoints)
+    sync.ARCHIVE_DIR = archive_dir
+    sync.init_db(db_path)
+    started = time.perf_counter()
+    if source == "all":
+        rows = sum(sync.run_full_sync(db_path, workers=workers).values())
+    elif source == "boundaries":
+        rows = sync.sync_boundaries(db_path)
+    else:
+        rows = getattr(sync, f"sync_{source}")(db_path, workers=workers)
+    seconds = time.perf_counter() - started
+    stats = get_stats().values()
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "requests": sum(s["requests"] for s in stats),
+        "retries": sum(s["retries"] for s in stats),
+        "bytes": sum(s["bytes"] for s in stats),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="fraction of live layer sizes")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    parser.add_argument("--workers", type=int, default=1, help="parallel page fetchers per layer")
+    parser.add_argument("--archive", action="store_true", help="also write the page archive")
+    args = parser.parse_args()
+
+    sizes = {name: max(1, int(n * args.scale)) for name, n in FULL_SIZES.items()}
+    print(f"layers: {sizes}; latency {args.latency}s, error rate {args.error_rate:.1%}, "
+          f"workers {args.workers}")
+    print(f"{'source':<18}{'rows':>9}{'seconds':>9}{'rows/sec':>11}{'requests':>10}"
+          f"{'retries':>9}{'MB':>8}{'peak RSS MB':>13}")
+    with ArcGISStub(sizes, args.latency, args.error_rate) as stub, \
+            tempfile.TemporaryDirectory() as tmp:
+        for source in _SOURCES:
+            db_path = Path(tmp) / f"{source}.db"
+            archive_dir = Path(tmp) / f"archive-{source}" if args.archive else None
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                r = pool.submit(_run, source, stub.endpoints, db_path, archive_dir, args.workers).result()
+            print(f"{source:<18}{r['rows']:>9,}{r['seconds']:>9.2f}"
+                  f"{r['rows'] / r['seconds']:>11,.0f}{r['requests']:>10,}{r['retries']:>9,}"
+                  f"{r['bytes'] / 1e6:>8.1f}{r['peak_rss_kb'] / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Transform throughput: per-row ``_get_attr`` probing vs. a compiled FieldMapper,
+and per-row vs. per-page timestamp conversion.
+
+Run with ``python -m benchmarks.bench_transform [rows]``.
+"""
+import sys
+import time
+
+from src.sync import FieldMapper, _get_attr, _ts_to_iso, _ts_to_iso_many
+
+
+def _synthetic_calls(n: int, upper: bool = False) -> list[dict]:
+    features = [
+        {
+            "attributes": {
+                "OBJECTID": i,
+                "callid": f"CFS-{i}",
+                "calltype": "DISTURBANCE",
+                "priority": "P1",
+                "disposition": "REPORT",
+                "fulladdr": f"{i % 900} MAIN ST",
+                "beat": "2B",
+                "district": "2",
+                "calldate": 1700000000000 + i * 60000,
+            },
+            "geometry": {"x": -89.5, "y": 40.6},
+        }
+        for i in range(n)
+    ]
+    if upper:
+        for feat in features:
+            feat["attributes"] = {k.upper(): v for k, v in feat["attributes"].items()}
+    return features
+
+
+def _legacy_rows(features: list[dict]) -> list[tuple]:
+    """The pre-FieldMapper mapping: probe each column's key spellings per row."""
+    rows = []
+    for feat in features:
+        attrs = feat.get("attributes", {})
+        geom = feat.get("geometry", {})
+        rows.append((
+            _get_attr(attrs, "callid", "CallID", "CALLID", "call_id"),
+            _get_attr(attrs, "calltype", "CallType", "CALLTYPE", "call_type"),
+            _get_attr(attrs, "priority", "Priority", "PRIORITY"),
+            _get_attr(attrs, "disposition", "Disposition", "DISPOSITION"),
+            _get_attr(attrs, "fulladdr", "FullAddr", "FULLADDR", "address"),
+            _get_attr(attrs, "beat", "Beat", "BEAT"),
+            _get_attr(attrs, "district", "District", "DISTRICT"),
+            _ts_to_iso(_get_attr(attrs, "calldate", "CallDate", "CALLDATE", "call_date")),
+            geom.get("y") if geom else None,
+            geom.get("x") if geom else None,
+        ))
+    return rows
+
+
+def _rate(fn, features: list[dict], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(features)
+        best = min(best, time.perf_counter() - started)
+    return len(features) / best
+
+
+def main(n: int = 200_000) -> None:
+    for label, upper in (("lowercase fields", False), ("UPPERCASE fields", True)):
+        features = _synthetic_calls(n, upper)
+        mapper = FieldMapper("calls_for_service", features[0]["attributes"])
+        order = [mapper.columns.index(c) for c in (
+            "call_id", "call_type", "priority", "disposition", "address",
+            "beat", "district", "call_date", "latitude", "longitude",
+        )]
+        assert [tuple(r[i] for i in order) for r in mapper.rows(features[:100])] == \
+            _legacy_rows(features[:100])
+
+        legacy = _rate(_legacy_rows, features)
+        compiled = _rate(mapper.rows, features)
+        print(f"calls_for_service, {n:,} rows, {label}")
+        print(f"  _get_attr probing : {legacy:>12,.0f} rows/sec")
+        print(f"  FieldMapper       : {compiled:>12,.0f} rows/sec ({compiled / legacy:.2f}x)")
+
+    stamps = [f["attributes"]["calldate"] for f in _synthetic_calls(n)]
+    per_row = _rate(lambda values: [_ts_to_iso(v) for v in values], stamps)
+    per_page = _rate(
+        lambda values: [_ts_to_iso_many(values[i:i + 2000]) for i in range(0, len(values), 2000)],
+        stamps,
+    )
+    print(f"timestamps, {n:,} values, 2,000 per page")
+    print(f"  _ts_to_iso per row : {per_row:>12,.0f} values/sec")
+    print(f"  _ts_to_iso_many    : {per_page:>12,.0f} values/sec ({per_page / per_row:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def query_key(where: str, query: dict) -> str:
+    """Short stable hash identifying a layer query (offsets excluded)."""
+    canonical = json.dumps({"where": where, **query}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class PageArchive:
+    """Compressed, content-addressed store of fetched ArcGIS pages.
+
+    Layout under ``root``::
+
+        objects/ab/<sha256>.json.gz      one page of features, gzipped JSON
+        runs/<layer>/<ns>-<query>.json   manifest of one completed fetch
+
+    A page blob is named by the SHA-256 of its uncompressed JSON, so identical
+    pages fetched by different runs are stored once. A run manifest lists the
+    page digests of one layer query in page order, and is only written once the
+    fetch has finished, so interrupted runs are never replayed. Replay needs
+    only each layer's latest full run and the runs after it; :meth:`compact`
+    folds a long tail of incremental runs into a new full run and
+    :meth:`prune` deletes the rest.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.json.gz"
+
+    def put_page(self, features: list) -> str:
+        """Store one page and return its digest."""
+        data = json.dumps(features, separators=(",", ":")).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{time.time_ns()}.tmp")
+            tmp.write_bytes(gzip.compress(data, compresslevel=6))
+            os.replace(tmp, path)
+        return digest
+
+    def get_page(self, digest: str) -> list:
+        return json.loads(gzip.decompress(self._object_path(digest).read_bytes()))
+
+    def record(
+        self, layer: str, pages: Iterable[list], where: str = "1=1", query: dict | None = None,
+    ) -> Iterator[list]:
+        """Pass ``pages`` through unchanged, archiving each one as it goes by.
+
+        The run manifest is written when ``pages`` is exhausted.
+        """
+        query = query or {}
+        digests = []
+        records = 0
+        for page in pages:
+            digests.append(self.put_page(page))
+            records += len(page)
+            yield page
+        run_dir = self.root / "runs" / layer
+        run_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "layer": layer,
+            "where": where,
+            "query": query,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "records": records,
+            "pages": digests,
+        }
+        name = f"{time.time_ns()}-{query_key(where, query)}.json"
+        tmp = run_dir / f"{name}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp, run_dir / name)
+
+    def runs(self, layer: str) -> list[dict]:
+        """Completed run manifests for ``layer``, oldest first."""
+        run_dir = self.root / "runs" / layer
+        if not run_dir.is_dir():
+            return []
+        return [json.loads(path.read_text()) for path in sorted(run_dir.glob("*.json"))]
+
+    def prune(self) -> int:
+        """Delete what replay no longer needs and return the pages removed.
+
+        Run manifests older than their layer's latest full run are deleted,
+        then every page no remaining manifest lists. Pages of a fetch still
+        being recorded are in no manifest yet, so this must not run alongside
+        one; sync calls it under the sync lock once a run has finished.
+        """
+        runs_dir = self.root / "runs"
+        keep: set[str] = set()
+        for run_dir in runs_dir.iterdir() if runs_dir.is_dir() else ():
+            paths = sorted(run_dir.glob("*.json"))
+            runs = [json.loads(path.read_text()) for path in paths]
+            full = [i for i, run in enumerate(runs) if run["where"] == "1=1"]
+            first = full[-1] if full else 0
+            for path in paths[:first]:
+                path.unlink()
+            for run in runs[first:]:
+                keep.update(run["pages"])
+        removed = 0
+        for path in (self.root / "objects").glob("*/*.json.gz"):
+            if path.name.removesuffix(".json.gz") not in keep:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def compact(
+        self, layer: str, key: Callable[[dict], Hashable | None], max_runs: int,
+        page_size: int = 2000,
+    ) -> bool:
+        """Fold ``layer``'s latest full run and the incremental runs after it
+        into one new full run, once there are more than ``max_runs`` of them.
+
+        Only the last fetched version of each feature (by ``key``; features
+        without one are all kept) is written, in pages of ``page_size``, so
+        replaying the new run upserts the same rows as replaying the old
+        ones, which :meth:`prune` then deletes. The layer is held in memory
+        while it is rewritten. Returns whether the layer was compacted.
+        """
+        runs = self.runs(layer)
+        full = [i for i, run in enumerate(runs) if run["where"] == "1=1"]
+        if not full or len(runs) - full[-1] - 1 <= max_runs:
+            return False
+        latest: dict = {}
+        for page in self.replay(layer):
+            for feature in page:
+                k = key(feature)
+                if k is None:
+                    k = object()
+                latest.pop(k, None)  # a re-fetched feature moves to the end
+                latest[k] = feature
+        features = list(latest.values())
+        pages = (features[i:i + page_size] for i in range(0, len(features), page_size))
+        for _ in self.record(layer, pages, "1=1", {"compacted_runs": len(runs) - full[-1]}):
+            pass
+        logger.info("Compacted %d archived runs of %s into %d features",
+                    len(runs) - full[-1], layer, len(features))
+        return True
+
+    def has_full_run(self, layer: str) -> bool:
+        return any(run["where"] == "1=1" for run in self.runs(layer))
+
+    def replay(self, layer: str) -> Iterator[list]:
+        """Yield the pages needed to rebuild ``layer``, in fetch order.
+
+        Starts at the most recent full (``where=1=1``) run and continues
+        through every later incremental run; replaying them in order through
+        the upsert reproduces the table as of the last sync.
+        """
+        runs = self.runs(layer)
+        full = [i for i, run in enumerate(runs) if run["where"] == "1=1"]
+        if not full:
+            logger.warning("No full run of %s in archive %s", layer, self.root)
+            return
+        for run in runs[full[-1]:]:
+            for digest in run["pages"]:
+                yield self.get_page(digest)
@@ -3,6 +3,19 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 DB_PATH = PROJECT_ROOT / "peoria_crime.db"
 
+# Prepared statements kept per reused read connection (database.connection());
+# the query layer and pages issue ~100 distinct SQL strings (sqlite3 default 128).
+SQLITE_CACHED_STATEMENTS = 256
+
+# Compressed archive of every fetched ArcGIS page, replayable offline and
+# pruned to what replay needs after each sync (None disables archiving)
+ARCHIVE_DIR = PROJECT_ROOT / "archive"
+
+# Incremental runs kept after a layer's latest full run before the archive
+# folds them into a new full run (the scheduler only runs incremental syncs:
+# 96 is a day of calls/ShotSpotter runs, four days of crimes)
+ARCHIVE_MAX_INCREMENTAL_RUNS = 96
+
 ARCGIS_BASE = "https://services1.arcgis.com/Vm4J3EDyqMzmDYgP/arcgis/rest/services"
 
 ENDPOINTS = {
@@ -16,6 +29,150 @@ ENDPOINTS = {
 
 PAGE_SIZE = 2000
 
+# Per-layer page size overrides (ENDPOINTS key -> records per request); the
+# layer's advertised maxRecordCount still caps it. Boundary polygons are large,
+# so those layers use smaller pages.
+LAYER_PAGE_SIZES = {
+    "beats": 500,
+    "districts": 500,
+    "community_policing": 500,
+}
+
+# Decimal places requested for returned coordinates (6 ~ 0.1 m)
+GEOMETRY_PRECISION = 6
+
+# Douglas-Peucker tolerances (degrees) of the simplified boundary geometries
+# stored per boundary in boundaries.geojson_<level>: roughly 5 m, 20 m and
+# 100 m, for map zooms of about 14+, 12-13 and 11 or less.
+BOUNDARY_SIMPLIFY_TOLERANCES = {"fine": 0.00005, "medium": 0.0002, "coarse": 0.001}
+
+# Shared HTTP session: sockets kept per host, per-request timeout (seconds) and
+# retry policy for 429/5xx/timeouts (exponential backoff with full jitter)
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = 60
+HTTP_MAX_RETRIES = 5
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 30.0
+
+# Concurrent page downloads when a sync is run with parallel fetching
+FETCH_WORKERS = 4
+
+# Rows per executemany() flush when streaming pages into SQLite
+INSERT_BATCH_SIZE = 1000
+
+# Scheduler daemon (python -m src.sync daemon): seconds between runs of each
+# job; "reconcile" is the deletion pass. Jobs skipped because another sync
+# holds the lock are retried after LOCK_RETRY_SECONDS.
+SYNC_INTERVALS = {
+    "crimes": 3600,
+    "calls_for_service": 900,
+    "shotspotter": 900,
+    "boundaries": 7 * 86400,
+    "reconcile": 86400,
+}
+LOCK_RETRY_SECONDS = 60
+
+# Seconds between progress commits (sync_progress) during a sync
+PROGRESS_INTERVAL = 2.0
+
+# Record each run's exact Python heap peak in sync_log via tracemalloc
+# (started and stopped around the run) instead of its peak RSS growth;
+# tracing slows syncs several-fold, so leave off outside profiling
+TRACE_MEMORY = False
+
+# Batches buffered between fetch threads and the single database writer
+WRITE_QUEUE_SIZE = 16
+
+# Field mappings for point layers: table -> [(column, candidate ArcGIS fields,
+# converter)]. Candidates are matched (exactly, then case-insensitively)
+# against the layer's actual fields once per sync; the first hit wins and
+# columns with no match are left NULL. "geometry.x"/"geometry.y" read the
+# point geometry. Converter names are resolved in src.sync (None = as-is).
+# To add a source or city, add its endpoint above and a mapping here.
+FIELD_MAPPINGS = {
+    "crimes": [
+        ("offense_id", ("offenseid",), None),
+        ("call_id", ("callid",), None),
+        ("statute", ("statute",), None),
+        ("nibrs_code", ("nibrscode",), None),
+        ("nibrs_offense", ("nibrsoffense",), None),
+        ("nibrs_description", ("nibrsdesc",), None),
+        ("crime_against", ("nibrscrimeag",), None),
+        ("attempt_completed", ("attemptcompleted",), None),
+        ("address", ("fulladdr",), None),
+        ("city", ("city",), None),
+        ("state", ("state",), None),
+        ("zip", ("zip5",), None),
+        ("beat", ("beat",), None),
+        ("district", ("district",), None),
+        ("neighborhood", ("neighborhood",), None),
+        ("weapon_category", ("weaponcat",), None),
+        ("weapon_description", ("weapondesc",), None),
+        ("report_date", ("reportdate",), "timestamp"),
+        ("report_date_ms", ("reportdate",), None),
+        ("report_year", ("reportyear",), None),
+        ("report_month", ("reportmonth",), None),
+        ("report_hour", ("reporthour",), None),
+        ("report_dow", ("reportdow",), None),
+        ("object_id", ("OBJECTID", "FID"), None),
+        ("latitude", ("geometry.y",), None),
+        ("longitude", ("geometry.x",), None),
+    ],
+    "calls_for_service": [
+        ("call_id", ("callid", "call_id"), None),
+        ("call_type", ("calltype", "call_type"), None),
+        ("priority", ("priority",), None),
+        ("disposition", ("disposition",), None),
+        ("address", ("fulladdr", "address"), None),
+        ("beat", ("beat",), None),
+        ("district", ("district",), None),
+        ("call_date", ("calldate", "call_date"), "timestamp"),
+        ("call_date_ms", ("calldate", "call_date"), None),
+        ("object_id", ("OBJECTID", "FID"), None),
+        ("latitude", ("geometry.y",), None),
+        ("longitude", ("geometry.x",), None),
+    ],
+    "shotspotter": [
+        ("incident_id", ("ShotSpotter_ID", "incidentid", "incident_id"), None),
+        ("rounds_fired", ("Rounds", "roundsfired", "rounds_fired"), None),
+        ("event_type", ("Type", "eventtype", "event_type"), None),
+        ("address", ("Address", "fulladdr", "address"), None),
+        ("beat", ("Beat",), None),
+        ("district", ("District",), None),
+        ("event_date", ("Date", "eventdate", "event_date"), "timestamp"),
+        ("event_date_ms", ("Date", "eventdate", "event_date"), None),
+        ("object_id", ("OBJECTID", "FID"), None),
+        ("latitude", ("geometry.y",), None),
+        ("longitude", ("geometry.x",), None),
+    ],
+}
+
+# Upstream natural key per point layer; re-synced rows are matched on it and
+# rewritten only when their content hash changes.
+NATURAL_KEYS = {
+    "crimes": "offense_id",
+    "calls_for_service": "call_id",
+    "shotspotter": "incident_id",
+}
+
+# Deletion reconciliation refuses to delete more than this fraction of a
+# table's rows in one pass (guards against upstream outages or a layer
+# being reloaded with new OBJECTIDs).
+RECONCILE_MAX_DELETE_FRACTION = 0.05
+
+# Incremental sync: the ArcGIS date field each layer is watermarked on, and how
+# far behind the stored watermark to re-query so late upstream edits are seen.
+WATERMARK_FIELDS = {
+    "crimes": "reportdate",
+    "calls_for_service": "calldate",
+    "shotspotter": "Date",
+}
+SYNC_OVERLAP_HOURS = 48
+
+# First month of the date-windowed historical backfill; anything older is
+# fetched as one extra window
+BACKFILL_START = "2015-01-01"
+
 CRIME_WEIGHTS = {
     "Homicide Offenses": 10,
     "Robbery": 7,
@@ -1,15 +1,494 @@
+import json
+import os
+import socket
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+from src.config import SQLITE_CACHED_STATEMENTS
+from src.dictionary import (
+    DICTIONARY_COLUMNS,
+    SEEDED_CODES,
+    create_decoded_view,
+    decoded,
+    encode_table,
+)
+from src.geometry import boundary_columns
+from src.rollup import ROLLUPS, rebuild_rollup, weight_sql
+from src.streets import address_keys, key_rows
 
-def get_connection(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(db_path))
+
+def get_connection(db_path: Path, cached_statements: int = 128) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path), cached_statements=cached_statements)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    # Street keys of an address, for the decoded views' insert triggers
+    conn.create_function(
+        "address_street_id", 1, lambda text: address_keys(text)[0], deterministic=True,
+    )
+    conn.create_function(
+        "address_block_id", 1, lambda text: address_keys(text)[1], deterministic=True,
+    )
     return conn
 
 
+# This thread's long-lived connections, by database path (see connection())
+_thread_connections = threading.local()
+
+
+@contextmanager
+def connection(db_path: Path):
+    """Borrow this thread's long-lived connection to ``db_path``.
+
+    The connection is opened (and its pragmas applied) on first use in each
+    thread and then reused, with a ``SQLITE_CACHED_STATEMENTS`` statement
+    cache, so repeated queries skip reconnecting and re-preparing. Like
+    ``with conn:``, any open transaction is committed on exit, or rolled back
+    if the block raised. Don't close the connection; see
+    :func:`close_connections`.
+    """
+    conns = _thread_connections.__dict__.setdefault("conns", {})
+    key = str(db_path)
+    conn = conns.get(key)
+    if conn is None:
+        conn = conns[key] = get_connection(db_path, SQLITE_CACHED_STATEMENTS)
+    try:
+        yield conn
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    if conn.in_transaction:
+        conn.commit()
+
+
+def close_connections() -> None:
+    """Close the calling thread's :func:`connection` connections."""
+    for conn in _thread_connections.__dict__.pop("conns", {}).values():
+        conn.close()
+
+
+# Secondary indexes per table, kept out of the schema script so bulk loads can
+# drop them and build them once after the data is in.
+INDEXES = {
+    # Composite/covering indexes derived from the read workload registered in
+    # src/plan_audit.py; python -m src.plan_audit checks none of it scans.
+    # Dictionary-encoded columns are indexed by their codes.
+    "crimes": {
+        "idx_crimes_report_date_ms": "report_date_ms",
+        "idx_crimes_year_month_offense": "report_year, report_month, nibrs_offense_code",
+        "idx_crimes_district_year": "district_code, report_year, report_month, nibrs_offense_code",
+        "idx_crimes_district_date_ms": "district_code, report_date_ms",
+        "idx_crimes_beat_offense": "beat_code, nibrs_offense_code, report_year, report_month",
+        "idx_crimes_neighborhood_year": (
+            "neighborhood_code, report_year, report_month, nibrs_offense_code"
+        ),
+        "idx_crimes_offense_date_ms": "nibrs_offense_code, report_date_ms",
+        "idx_crimes_block": (
+            "block_id, report_year, nibrs_offense_code, report_date_ms, latitude, longitude"
+        ),
+        "idx_crimes_street_date_ms": "street_id, report_date_ms",
+        "idx_crimes_dow_hour": "report_dow_code, report_hour",
+        "idx_crimes_coords": "latitude, longitude",
+        "idx_crimes_object_id": "object_id",
+    },
+    "calls_for_service": {
+        "idx_calls_call_date_ms": "call_date_ms",
+        "idx_calls_district": "district",
+        "idx_calls_object_id": "object_id",
+        "idx_calls_block": "block_id",
+    },
+    "shotspotter": {
+        "idx_shotspotter_event_date_ms": "event_date_ms",
+        "idx_shotspotter_object_id": "object_id",
+        "idx_shotspotter_block": "block_id",
+    },
+    "boundaries": {
+        "idx_boundaries_type": "boundary_type",
+    },
+}
+
+
+# Point tables mirrored into an R*Tree (``{table}_rtree``: id, min/max lat,
+# min/max lon) for radius and nearest-neighbour searches. Triggers keep it in
+# step with every write path (upserts, reconcile deletes, rebuilds).
+SPATIAL_TABLES = ("crimes", "calls_for_service", "shotspotter")
+
+# Point tables keyed to the street dimension (``street_id``/``block_id``, see
+# src/streets.py); triggers queue their changed blocks for re-aggregation.
+STREET_TABLES = ("crimes", "calls_for_service", "shotspotter")
+
+
+def _create_spatial_index(conn: sqlite3.Connection, table: str) -> None:
+    """Create ``{table}_rtree`` and its triggers; a new tree is filled from the table."""
+    rtree = f"{table}_rtree"
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (rtree,)).fetchone()
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {rtree} "
+        f"USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+    )
+    point = "new.id, new.latitude, new.latitude, new.longitude, new.longitude"
+    has_point = "new.latitude IS NOT NULL AND new.longitude IS NOT NULL"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {rtree}_insert AFTER INSERT ON {table}
+        WHEN {has_point}
+        BEGIN
+            INSERT OR REPLACE INTO {rtree} VALUES ({point});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {rtree}_update AFTER UPDATE OF latitude, longitude ON {table}
+        BEGIN
+            DELETE FROM {rtree} WHERE id = old.id;
+            INSERT INTO {rtree} SELECT {point} WHERE {has_point};
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {rtree}_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {rtree} WHERE id = old.id;
+        END
+    """)
+    if not exists:
+        conn.execute(
+            f"INSERT INTO {rtree} SELECT id, latitude, latitude, longitude, longitude "
+            f"FROM {table} WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
+
+
+def _create_street_triggers(conn: sqlite3.Connection, table: str) -> None:
+    """Create the triggers queueing ``table``'s changed blocks in
+    ``street_changes`` for :func:`src.streets.refresh_streets`. When they are
+    new (first run, or after a bulk load dropped them) every block of the
+    table, and every block with aggregates, is queued for a full recompute."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (f"{table}_streets_insert",)
+    ).fetchone()
+    # An upsert's conflict handling overrides INSERT OR IGNORE inside its
+    # triggers, so duplicates are skipped with an explicit ON CONFLICT.
+    def queue(block_id: str) -> str:
+        return (f"INSERT INTO street_changes (block_id) SELECT {block_id} "
+                f"WHERE {block_id} IS NOT NULL ON CONFLICT DO NOTHING")
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_streets_insert AFTER INSERT ON {table}
+        WHEN new.block_id IS NOT NULL
+        BEGIN
+            {queue("new.block_id")};
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_streets_update
+        AFTER UPDATE OF row_hash, block_id ON {table}
+        WHEN old.row_hash IS NOT new.row_hash OR old.block_id IS NOT new.block_id
+        BEGIN
+            {queue("old.block_id")};
+            {queue("new.block_id")};
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_streets_delete AFTER DELETE ON {table}
+        WHEN old.block_id IS NOT NULL
+        BEGIN
+            {queue("old.block_id")};
+        END
+    """)
+    if not exists:
+        for source in (table, "block_crime_stats"):
+            conn.execute(
+                f"INSERT OR IGNORE INTO street_changes (block_id) "
+                f"SELECT DISTINCT block_id FROM {source} WHERE block_id IS NOT NULL"
+            )
+
+
+def _rollup_triggers(rollup: str) -> dict[str, str]:
+    """The triggers keeping ``rollup`` (src/rollup.py) in step with crimes,
+    by name: each row adds one crime and its weight to its cell, and a
+    change moves it from the old cell to the new one."""
+    dimensions = ROLLUPS[rollup]
+    columns = ", ".join(dimensions)
+
+    def cell(row: str) -> str:
+        return " AND ".join(f"{d} IS {row}.{d}" for d in dimensions)
+
+    def add(row: str) -> str:
+        return (
+            f"INSERT INTO {rollup} ({columns}, crimes, severity) "
+            f"SELECT {', '.join(f'{row}.{d}' for d in dimensions)}, 0, 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {rollup} WHERE {cell(row)});\n"
+            f"UPDATE {rollup} SET crimes = crimes + 1, "
+            f"severity = severity + {weight_sql(f'{row}.nibrs_offense_code')} "
+            f"WHERE {cell(row)};"
+        )
+
+    def subtract(row: str) -> str:
+        return (
+            f"UPDATE {rollup} SET crimes = crimes - 1, "
+            f"severity = severity - {weight_sql(f'{row}.nibrs_offense_code')} "
+            f"WHERE {cell(row)};\n"
+            f"DELETE FROM {rollup} WHERE {cell(row)} AND crimes = 0;"
+        )
+
+    watched = list(dict.fromkeys((*dimensions, "nibrs_offense_code")))  # keys and weight
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in watched)
+    return {
+        f"{rollup}_insert":
+            f"CREATE TRIGGER {rollup}_insert AFTER INSERT ON crimes\n"
+            f"BEGIN\n{add('new')}\nEND",
+        f"{rollup}_update":
+            f"CREATE TRIGGER {rollup}_update AFTER UPDATE OF {', '.join(watched)} ON crimes\n"
+            f"WHEN {changed}\nBEGIN\n{subtract('old')}\n{add('new')}\nEND",
+        f"{rollup}_delete":
+            f"CREATE TRIGGER {rollup}_delete AFTER DELETE ON crimes\n"
+            f"BEGIN\n{subtract('old')}\nEND",
+    }
+
+
+def _create_rollup_triggers(conn: sqlite3.Connection, rollup: str) -> None:
+    """Create ``rollup``'s triggers. When they are new (first run, after a
+    bulk load dropped them) or their text changed (``CRIME_WEIGHTS`` was
+    edited), the rollup is rebuilt from crimes."""
+    triggers = _rollup_triggers(rollup)
+    marks = ",".join("?" * len(triggers))
+    current = dict(conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({marks})",
+        list(triggers),
+    ).fetchall())
+    if current == triggers:
+        return
+    for name, sql in triggers.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(sql)
+    rebuild_rollup(conn, rollup)
+
+
+def create_indexes(conn: sqlite3.Connection, table: str) -> None:
+    for name, columns in INDEXES.get(table, {}).items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+    if table in SPATIAL_TABLES:
+        _create_spatial_index(conn, table)
+    if table in STREET_TABLES:
+        _create_street_triggers(conn, table)
+    if table == "crimes":
+        for rollup in ROLLUPS:
+            _create_rollup_triggers(conn, rollup)
+
+
+def drop_indexes(conn: sqlite3.Connection, table: str) -> None:
+    for name in INDEXES.get(table, {}):
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    if table in SPATIAL_TABLES:
+        for event in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_rtree_{event}")
+        conn.execute(f"DROP TABLE IF EXISTS {table}_rtree")
+    if table in STREET_TABLES:
+        for event in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_streets_{event}")
+    if table == "crimes":
+        for rollup in ROLLUPS:
+            for name in _rollup_triggers(rollup):
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+@contextmanager
+def bulk_load_settings(conn: sqlite3.Connection):
+    """Relax durability on ``conn`` for a large load, restoring it afterwards.
+
+    Turns off fsync (``synchronous=OFF``), suspends WAL auto-checkpoints and
+    enlarges the page cache for the duration, then checkpoints the WAL once.
+    The journal stays in WAL mode so readers are never blocked. If the load
+    raises, its uncommitted writes are rolled back rather than committed.
+    """
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("PRAGMA cache_size=-262144")  # 256 MB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute(f"PRAGMA cache_size={cache_size}")
+        conn.execute("PRAGMA temp_store=DEFAULT")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+class LockHeld(RuntimeError):
+    """Another process (or thread) holds the advisory lock."""
+
+
+def _owner_alive(owner: str) -> bool:
+    """False only if ``owner`` is a process on this host that no longer exists."""
+    host, _, rest = owner.partition(":")
+    pid = rest.split(":", 1)[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def lock_holder(
+    conn: sqlite3.Connection, name: str, stale_after: float = 1800,
+) -> dict | None:
+    """The ``locks`` row of the live holder of lock ``name``, or None.
+
+    A lock whose heartbeat is older than ``stale_after`` seconds, or whose
+    owner process on this host has died, is not held by anyone.
+    """
+    cursor = conn.execute(
+        "SELECT * FROM locks WHERE name = ? AND heartbeat_at > datetime('now', ?)",
+        (name, f"-{stale_after} seconds"),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    holder = dict(zip([column[0] for column in cursor.description], row))
+    return holder if _owner_alive(holder["owner"]) else None
+
+
+@contextmanager
+def advisory_lock(
+    db_path: Path, name: str, stale_after: float = 1800, heartbeat: float = 30,
+):
+    """Hold the named cross-process lock stored in the ``locks`` table.
+
+    Raises :class:`LockHeld` if another owner holds it. A holder refreshes
+    ``heartbeat_at`` every ``heartbeat`` seconds from a background thread; a
+    lock whose heartbeat is older than ``stale_after`` seconds, or whose owner
+    process on this host has died, is taken over.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        holder = lock_holder(conn, name, stale_after)
+        if holder:
+            conn.execute("ROLLBACK")
+            raise LockHeld(f"{name} is held by {holder['owner']}")
+        conn.execute(
+            "INSERT OR REPLACE INTO locks (name, owner, acquired_at, heartbeat_at) "
+            "VALUES (?, ?, datetime('now'), datetime('now'))",
+            (name, owner),
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(heartbeat):
+            try:
+                hb = sqlite3.connect(str(db_path), timeout=1)
+                with hb:
+                    hb.execute(
+                        "UPDATE locks SET heartbeat_at = datetime('now') "
+                        "WHERE name = ? AND owner = ?",
+                        (name, owner),
+                    )
+                hb.close()
+            except sqlite3.OperationalError:
+                pass  # writer busy; try again next beat
+
+    thread = threading.Thread(target=beat, name=f"lock-{name}", daemon=True)
+    thread.start()
+    try:
+        yield owner
+    finally:
+        stop.set()
+        thread.join()
+        conn = sqlite3.connect(str(db_path), timeout=30)
+        with conn:
+            conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+        conn.close()
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(
+    conn: sqlite3.Connection, table: str, columns: dict[str, str],
+) -> list[str]:
+    """ALTER TABLE ADD COLUMN for any column missing from an existing table.
+
+    Returns the names of the columns added.
+    """
+    existing = _columns(conn, table)
+    added = []
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+            added.append(name)
+    return added
+
+
+# Integer epoch-millisecond twin of each table's ISO date column. Filters and
+# recency sorts use these; the ISO text stays for display.
+DATE_COLUMNS = {
+    "crimes": "report_date",
+    "calls_for_service": "call_date",
+    "shotspotter": "event_date",
+}
+
+
+
+def _iso_to_ms_sql(column: str) -> str:
+    """SQL for the epoch milliseconds of the ISO-8601 text ``column``."""
+    return f"CAST(round((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _derived_columns(table: str) -> dict[str, str]:
+    """Columns sync derives that an insert through ``{table}_decoded`` may
+    leave out, with the SQL computing each from the inserted row."""
+    date_column = DATE_COLUMNS[table]
+    return {
+        f"{date_column}_ms": _iso_to_ms_sql(f"new.{date_column}"),
+        "street_id": "address_street_id(new.address)",
+        "block_id": "address_block_id(new.address)",
+    }
+
+
+# Indexes replaced by the *_ms and composite ones above
+_RETIRED_INDEXES = (
+    "idx_crimes_report_date", "idx_calls_call_date", "idx_shotspotter_event_date",
+    "idx_crimes_report_year", "idx_crimes_district", "idx_crimes_beat",
+    "idx_crimes_neighborhood", "idx_crimes_nibrs_offense", "idx_crimes_address",
+)
+
+# The crime address index that the street dimension replaced; its triggers
+# live on crimes, so dropping the tables alone would leave them behind.
+_RETIRED_TRIGGERS = ("crime_addresses_insert", "crime_addresses_update", "crime_addresses_delete")
+_RETIRED_TABLES = ("crime_addresses_fts", "crime_addresses")
+
+
+def _derive_boundary_columns(conn: sqlite3.Connection) -> None:
+    """Fill the derived boundary columns of rows stored before they existed
+    (whose ``geometry_geojson`` still holds raw ArcGIS rings)."""
+    rows = conn.execute("SELECT id, geometry_geojson FROM boundaries").fetchall()
+    for row in rows:
+        geom = json.loads(row["geometry_geojson"]) if row["geometry_geojson"] else None
+        columns = boundary_columns(geom)
+        conn.execute(
+            f"UPDATE boundaries SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+            (*columns.values(), row["id"]),
+        )
+
+
 def init_db(db_path: Path) -> None:
     conn = get_connection(db_path)
     conn.executescript("""
@@ -19,44 +498,54 @@ def init_db(db_path: Path) -> None:
             call_id TEXT,
             statute TEXT,
             nibrs_code TEXT,
-            nibrs_offense TEXT,
-            nibrs_description TEXT,
-            crime_against TEXT,
+            nibrs_offense_code INTEGER,
+            nibrs_description_code INTEGER,
+            crime_against_code INTEGER,
             attempt_completed TEXT,
             address TEXT,
-            city TEXT,
-            state TEXT,
+            city_code INTEGER,
+            state_code INTEGER,
             zip TEXT,
-            beat TEXT,
-            district TEXT,
-            neighborhood TEXT,
-            weapon_category TEXT,
+            beat_code INTEGER,
+            district_code INTEGER,
+            neighborhood_code INTEGER,
+            weapon_category_code INTEGER,
             weapon_description TEXT,
             report_date TEXT,
+            report_date_ms INTEGER,
             report_year INTEGER,
             report_month INTEGER,
             report_hour INTEGER,
-            report_dow TEXT,
+            report_dow_code INTEGER,
             latitude REAL,
             longitude REAL,
-            source TEXT DEFAULT 'peoria_pd_arcgis',
-            synced_at TEXT DEFAULT (datetime('now'))
+            source_code INTEGER DEFAULT 1,
+            synced_at TEXT DEFAULT (datetime('now')),
+            row_hash INTEGER,
+            object_id INTEGER,
+            street_id INTEGER,
+            block_id INTEGER
         );
 
         CREATE TABLE IF NOT EXISTS calls_for_service (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             call_id TEXT UNIQUE,
-            call_type TEXT,
-            priority TEXT,
-            disposition TEXT,
+            call_type_code INTEGER,
+            priority_code INTEGER,
+            disposition_code INTEGER,
             address TEXT,
             beat TEXT,
             district TEXT,
             call_date TEXT,
+            call_date_ms INTEGER,
             latitude REAL,
             longitude REAL,
             source TEXT DEFAULT 'peoria_pd_arcgis',
-            synced_at TEXT DEFAULT (datetime('now'))
+            synced_at TEXT DEFAULT (datetime('now')),
+            row_hash INTEGER,
+            object_id INTEGER,
+            street_id INTEGER,
+            block_id INTEGER
         );
 
         CREATE TABLE IF NOT EXISTS shotspotter (
@@ -68,10 +557,15 @@ def init_db(db_path: Path) -> None:
             beat TEXT,
             district TEXT,
             event_date TEXT,
+            event_date_ms INTEGER,
             latitude REAL,
             longitude REAL,
             source TEXT DEFAULT 'peoria_pd_arcgis',
-            synced_at TEXT DEFAULT (datetime('now'))
+            synced_at TEXT DEFAULT (datetime('now')),
+            row_hash INTEGER,
+            object_id INTEGER,
+            street_id INTEGER,
+            block_id INTEGER
         );
 
         CREATE TABLE IF NOT EXISTS boundaries (
@@ -79,6 +573,17 @@ def init_db(db_path: Path) -> None:
             boundary_type TEXT,
             name TEXT,
             geometry_geojson TEXT,
+            geojson_fine TEXT,
+            geojson_medium TEXT,
+            geojson_coarse TEXT,
+            min_lat REAL,
+            min_lon REAL,
+            max_lat REAL,
+            max_lon REAL,
+            area_sq_km REAL,
+            centroid_lat REAL,
+            centroid_lon REAL,
+            vertices INTEGER,
             UNIQUE(boundary_type, name)
         );
 
@@ -89,20 +594,282 @@ def init_db(db_path: Path) -> None:
             records_fetched INTEGER,
             started_at TEXT DEFAULT (datetime('now')),
             completed_at TEXT,
-            status TEXT DEFAULT 'running'
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_crimes_report_date ON crimes(report_date);
-        CREATE INDEX IF NOT EXISTS idx_crimes_report_year ON crimes(report_year);
-        CREATE INDEX IF NOT EXISTS idx_crimes_district ON crimes(district);
-        CREATE INDEX IF NOT EXISTS idx_crimes_beat ON crimes(beat);
-        CREATE INDEX IF NOT EXISTS idx_crimes_neighborhood ON crimes(neighborhood);
-        CREATE INDEX IF NOT EXISTS idx_crimes_nibrs_offense ON crimes(nibrs_offense);
-        CREATE INDEX IF NOT EXISTS idx_crimes_coords ON crimes(latitude, longitude);
-        CREATE INDEX IF NOT EXISTS idx_calls_call_date ON calls_for_service(call_date);
-        CREATE INDEX IF NOT EXISTS idx_calls_district ON calls_for_service(district);
-        CREATE INDEX IF NOT EXISTS idx_shotspotter_event_date ON shotspotter(event_date);
-        CREATE INDEX IF NOT EXISTS idx_boundaries_type ON boundaries(boundary_type);
+            status TEXT DEFAULT 'running',
+            peak_memory_kb INTEGER,
+            duration_seconds REAL,
+            records_inserted INTEGER,
+            records_updated INTEGER,
+            records_unchanged INTEGER,
+            records_deleted INTEGER,
+            run_id TEXT,
+            table_rows INTEGER,
+            pages INTEGER,
+            response_bytes INTEGER,
+            rows_per_second REAL,
+            p50_page_seconds REAL,
+            p95_page_seconds REAL,
+            decode_seconds REAL,
+            insert_seconds REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS sync_page_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT,
+            table_name TEXT,
+            page_no INTEGER,
+            latency_seconds REAL,
+            response_bytes INTEGER,
+            decode_seconds REAL,
+            transform_seconds REAL,
+            rows INTEGER,
+            rows_written INTEGER,
+            rows_ignored INTEGER,
+            insert_seconds REAL,
+            recorded_at TEXT DEFAULT (datetime('now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_page_stats_run ON sync_page_stats(run_id, table_name);
+
+        CREATE TABLE IF NOT EXISTS deleted_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT,
+            natural_key TEXT,
+            object_id INTEGER,
+            deleted_at TEXT DEFAULT (datetime('now'))
+        );
+
+        CREATE TABLE IF NOT EXISTS backfill_windows (
+            table_name TEXT,
+            window_key TEXT,
+            where_clause TEXT,
+            status TEXT,
+            records INTEGER,
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            completed_at TEXT,
+            PRIMARY KEY (table_name, window_key)
+        );
+
+        CREATE TABLE IF NOT EXISTS sync_progress (
+            table_name TEXT PRIMARY KEY,
+            status TEXT,
+            records_fetched INTEGER,
+            started_at TEXT,
+            updated_at TEXT,
+            finished_at TEXT,
+            error TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS locks (
+            name TEXT PRIMARY KEY,
+            owner TEXT,
+            acquired_at TEXT,
+            heartbeat_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS sync_state (
+            table_name TEXT PRIMARY KEY,
+            watermark INTEGER,
+            updated_at TEXT DEFAULT (datetime('now'))
+        );
+
+        -- Dictionary of the encoded text columns (src/dictionary.py)
+        CREATE TABLE IF NOT EXISTS text_codes (
+            field TEXT NOT NULL,
+            code INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (field, code)
+        ) WITHOUT ROWID;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_text_codes_value ON text_codes(field, value);
+
+        -- Street dimension (src/streets.py); ids are hashes of the labels
+        CREATE TABLE IF NOT EXISTS streets (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            suffix TEXT,
+            label TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS blocks (
+            id INTEGER PRIMARY KEY,
+            street_id INTEGER,
+            block INTEGER,
+            label TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_blocks_street ON blocks(street_id);
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS block_fts USING fts5(
+            label, content='blocks', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS block_fts_insert AFTER INSERT ON blocks
+        BEGIN
+            INSERT INTO block_fts (rowid, label) VALUES (new.id, new.label);
+        END;
+        CREATE TRIGGER IF NOT EXISTS block_fts_delete AFTER DELETE ON blocks
+        BEGIN
+            INSERT INTO block_fts (block_fts, rowid, label) VALUES ('delete', old.id, old.label);
+        END;
+
+        -- Blocks whose crime aggregates are stale, queued by triggers
+        CREATE TABLE IF NOT EXISTS street_changes (
+            block_id INTEGER PRIMARY KEY
+        );
+
+        -- Crimes per block/street, year and offense; the *_totals tables
+        -- roll them up per block/street with a CRIME_WEIGHTS severity.
+        CREATE TABLE IF NOT EXISTS block_crime_stats (
+            block_id INTEGER,
+            report_year INTEGER,
+            nibrs_offense TEXT,
+            crimes INTEGER,
+            first_date_ms INTEGER,
+            last_date_ms INTEGER,
+            lat_sum REAL,
+            lon_sum REAL,
+            located INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_block_crime_stats ON block_crime_stats(block_id);
+
+        CREATE TABLE IF NOT EXISTS street_crime_stats (
+            street_id INTEGER,
+            report_year INTEGER,
+            nibrs_offense TEXT,
+            crimes INTEGER,
+            first_date_ms INTEGER,
+            last_date_ms INTEGER,
+            lat_sum REAL,
+            lon_sum REAL,
+            located INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_street_crime_stats ON street_crime_stats(street_id);
+
+        CREATE TABLE IF NOT EXISTS block_crime_totals (
+            block_id INTEGER PRIMARY KEY,
+            crimes INTEGER,
+            severity REAL,
+            first_date_ms INTEGER,
+            last_date_ms INTEGER,
+            centroid_lat REAL,
+            centroid_lon REAL,
+            crime_types TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_block_crime_totals_crimes ON block_crime_totals(crimes);
+
+        -- Crimes and severity per cell of each rollup (src/rollup.py),
+        -- kept in step with crimes by triggers
+        CREATE TABLE IF NOT EXISTS crime_rollup (
+            report_year INTEGER,
+            report_month INTEGER,
+            district_code INTEGER,
+            beat_code INTEGER,
+            neighborhood_code INTEGER,
+            nibrs_offense_code INTEGER,
+            crimes INTEGER,
+            severity REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_crime_rollup_cell ON crime_rollup(
+            report_year, report_month, district_code, beat_code, neighborhood_code,
+            nibrs_offense_code
+        );
+
+        CREATE TABLE IF NOT EXISTS crime_hour_rollup (
+            report_dow_code INTEGER,
+            report_hour INTEGER,
+            crimes INTEGER,
+            severity REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_crime_hour_rollup_cell
+            ON crime_hour_rollup(report_dow_code, report_hour);
+
+        CREATE TABLE IF NOT EXISTS street_crime_totals (
+            street_id INTEGER PRIMARY KEY,
+            crimes INTEGER,
+            severity REAL,
+            first_date_ms INTEGER,
+            last_date_ms INTEGER,
+            centroid_lat REAL,
+            centroid_lon REAL,
+            crime_types TEXT
+        );
     """)
+    # Columns added after the first release; CREATE TABLE IF NOT EXISTS
+    # leaves older databases without them.
+    _add_missing_columns(conn, "sync_log", {
+        "peak_memory_kb": "INTEGER",
+        "duration_seconds": "REAL",
+        "records_inserted": "INTEGER",
+        "records_updated": "INTEGER",
+        "records_unchanged": "INTEGER",
+        "records_deleted": "INTEGER",
+        "run_id": "TEXT",
+        "table_rows": "INTEGER",
+        "pages": "INTEGER",
+        "response_bytes": "INTEGER",
+        "rows_per_second": "REAL",
+        "p50_page_seconds": "REAL",
+        "p95_page_seconds": "REAL",
+        "decode_seconds": "REAL",
+        "insert_seconds": "REAL",
+    })
+    for table, date_column in DATE_COLUMNS.items():
+        _add_missing_columns(conn, table, {"row_hash": "INTEGER", "object_id": "INTEGER"})
+        if _add_missing_columns(conn, table, {"street_id": "INTEGER", "block_id": "INTEGER"}):
+            # Rows stored before the street dimension; the street triggers
+            # created below queue their blocks for the next sync to aggregate.
+            key_rows(conn, table)
+        if _add_missing_columns(conn, table, {f"{date_column}_ms": "INTEGER"}):
+            # Derive from the stored ISO text; the next sync rewrites these
+            # rows with the exact upstream value anyway (their hash changes).
+            conn.execute(
+                f"UPDATE {table} SET {date_column}_ms = {_iso_to_ms_sql(date_column)} "
+                f"WHERE {date_column} IS NOT NULL"
+            )
+    if _add_missing_columns(conn, "boundaries", {
+        "geojson_fine": "TEXT",
+        "geojson_medium": "TEXT",
+        "geojson_coarse": "TEXT",
+        "min_lat": "REAL",
+        "min_lon": "REAL",
+        "max_lat": "REAL",
+        "max_lon": "REAL",
+        "area_sq_km": "REAL",
+        "centroid_lat": "REAL",
+        "centroid_lon": "REAL",
+        "vertices": "INTEGER",
+    }):
+        _derive_boundary_columns(conn)
+    for name in _RETIRED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    for name in _RETIRED_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for name in _RETIRED_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+    missing = [
+        seed for seed in SEEDED_CODES
+        if not conn.execute(
+            "SELECT 1 FROM text_codes WHERE field = ? AND code = ?", seed[:2],
+        ).fetchone()
+    ]
+    if missing:
+        conn.executemany(
+            "INSERT OR IGNORE INTO text_codes (field, code, value) VALUES (?, ?, ?)", missing,
+        )
+    encoded = False
+    for table, fields in DICTIONARY_COLUMNS.items():
+        _add_missing_columns(conn, table, {
+            f"{field}_code": "INTEGER DEFAULT 1" if field == "source" else "INTEGER"
+            for field in fields
+        })
+        if any(field in _columns(conn, table) for field in fields):
+            # Text columns from before dictionary encoding: nothing may
+            # reference them while they are dropped.
+            conn.execute(f"DROP VIEW IF EXISTS {decoded(table)}")
+            drop_indexes(conn, table)
+            encoded |= encode_table(conn, table)
+    for table in INDEXES:
+        create_indexes(conn, table)
+    for table in DICTIONARY_COLUMNS:
+        create_decoded_view(conn, table, _derived_columns(table))
     conn.commit()
+    if encoded:
+        conn.execute("VACUUM")  # give back the space the text took
     conn.close()
@@ -0,0 +1,175 @@
+"""Dictionary encoding of low-cardinality text columns.
+
+The columns in :data:`DICTIONARY_COLUMNS` are stored as small integer codes
+(``district`` -> ``district_code``), with their text in ``text_codes``
+(field, code, value). Codes are numbered from 1 per field, so nearly all of
+them take one byte in a row. ``{table}_decoded`` views put the text back
+under the original column names (keeping the code columns too); an INSTEAD
+OF INSERT trigger on each view encodes ad-hoc inserts (and fills the derived
+columns the caller passes in), while sync encodes its batches with
+:func:`encode_rows`. Filters compare codes
+(:func:`equals_sql`) so they can use the code indexes.
+"""
+import sqlite3
+from typing import Iterable
+
+DICTIONARY_COLUMNS = {
+    "crimes": (
+        "nibrs_offense", "nibrs_description", "crime_against", "district", "beat",
+        "neighborhood", "report_dow", "weapon_category", "city", "state", "source",
+    ),
+    "calls_for_service": ("call_type", "priority", "disposition"),
+}
+
+# Codes fixed up front: the default of crimes.source_code
+SEEDED_CODES = (("source", 1, "peoria_pd_arcgis"),)
+
+_NEW_CODE = (
+    "INSERT INTO text_codes (field, code, value) "
+    "SELECT ?1, (SELECT COALESCE(MAX(code), 0) + 1 FROM text_codes WHERE field = ?1), ?2 "
+    "WHERE NOT EXISTS (SELECT 1 FROM text_codes WHERE field = ?1 AND value = ?2)"
+)
+
+
+def code_sql(field: str) -> str:
+    """SQL for the code of the value bound to the next ``?`` (NULL if it has none)."""
+    return f"(SELECT code FROM text_codes WHERE field = '{field}' AND value = ?)"
+
+
+def equals_sql(field: str, alias: str = "") -> str:
+    """Condition: ``field`` equals the value bound to the next ``?``."""
+    prefix = f"{alias}." if alias else ""
+    return f"{prefix}{field}_code = {code_sql(field)}"
+
+
+def value_sql(field: str, code: str | None = None) -> str:
+    """SQL decoding the code expression ``code`` (default ``{field}_code``)."""
+    return (
+        f"(SELECT value FROM text_codes WHERE field = '{field}' "
+        f"AND code = {code or f'{field}_code'})"
+    )
+
+
+def decoded(table: str) -> str:
+    """The name to read ``table``'s rows from with their text columns."""
+    return f"{table}_decoded" if table in DICTIONARY_COLUMNS else table
+
+
+def codes(conn: sqlite3.Connection, pairs: Iterable[tuple[str, object]]) -> dict[tuple, int]:
+    """``{(field, value): code}`` for ``pairs``, numbering values not seen before."""
+    found = {}
+    for field, value in set(pairs):
+        conn.execute(_NEW_CODE, (field, value))
+        found[field, value] = conn.execute(
+            "SELECT code FROM text_codes WHERE field = ? AND value = ?", (field, value),
+        ).fetchone()[0]
+    return found
+
+
+def encode_rows(conn: sqlite3.Connection, fields: dict[int, str], rows: list[tuple]) -> list[tuple]:
+    """``rows`` with the text at each position in ``fields`` (position ->
+    field) replaced by its code; None stays None."""
+    if not fields or not rows:
+        return rows
+    found = codes(conn, (
+        (field, row[i]) for row in rows for i, field in fields.items() if row[i] is not None
+    ))
+    encoded = []
+    for row in rows:
+        row = list(row)
+        for i, field in fields.items():
+            if row[i] is not None:
+                row[i] = found[field, row[i]]
+        encoded.append(tuple(row))
+    return encoded
+
+
+def encode_table(conn: sqlite3.Connection, table: str) -> bool:
+    """Move an older ``table``'s text columns into code columns (which must
+    exist) and drop them; nothing may index or reference them. Returns
+    whether anything was moved."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    fields = [field for field in DICTIONARY_COLUMNS[table] if field in existing]
+    if not fields:
+        return False
+    for field in fields:
+        codes(conn, (
+            (field, value) for (value,) in
+            conn.execute(f"SELECT DISTINCT {field} FROM {table} WHERE {field} IS NOT NULL")
+        ))
+    conn.execute(
+        f"UPDATE {table} SET " + ", ".join(
+            f"{field}_code = (SELECT code FROM text_codes "
+            f"WHERE field = '{field}' AND value = {table}.{field})"
+            for field in fields
+        )
+    )
+    for field in fields:
+        conn.execute(f"ALTER TABLE {table} DROP COLUMN {field}")
+    return True
+
+
+def create_decoded_view(
+    conn: sqlite3.Connection, table: str, derived: dict[str, str] | None = None,
+) -> bool:
+    """(Re)create ``{table}_decoded`` and its INSTEAD OF INSERT trigger from
+    ``table``'s current columns. Inserting through the view fills omitted
+    columns with ``derived`` (column -> SQL over the inserted ``new`` row),
+    else with the table's defaults.
+
+    Nothing is written when both already exist with the same SQL, so an
+    up-to-date database is left alone (no schema change, no write lock).
+    Returns whether they were recreated.
+    """
+    view, fields = decoded(table), DICTIONARY_COLUMNS[table]
+    info = [(row[1], row[4]) for row in conn.execute(f"PRAGMA table_info({table})")]
+    selected, joins = [], []
+    for column, _ in info:
+        field = column.removesuffix("_code")
+        if column.endswith("_code") and field in fields:
+            selected.append(f"{field}.value AS {field}")
+            joins.append(
+                f"LEFT JOIN text_codes {field} "
+                f"ON {field}.field = '{field}' AND {field}.code = {table}.{column}"
+            )
+        else:
+            selected.append(f"{table}.{column}")
+    selected += [f"{table}.{field}_code" for field in fields]
+
+    inserted, values = [], []
+    for column, default in info:
+        field = column.removesuffix("_code")
+        if column.endswith("_code") and field in fields:
+            value = f"(SELECT code FROM text_codes WHERE field = '{field}' AND value = new.{field})"
+        else:
+            value = f"new.{column}"
+        fallback = (derived or {}).get(column, default)
+        inserted.append(column)
+        values.append(f"COALESCE({value}, {fallback})" if fallback is not None else value)
+    new_codes = "".join(
+        f"INSERT INTO text_codes (field, code, value) SELECT '{field}', "
+        f"(SELECT COALESCE(MAX(code), 0) + 1 FROM text_codes WHERE field = '{field}'), "
+        f"new.{field} WHERE new.{field} IS NOT NULL AND NOT EXISTS "
+        f"(SELECT 1 FROM text_codes WHERE field = '{field}' AND value = new.{field});\n"
+        for field in fields
+    )
+
+    # Stored in sqlite_master as written, so they can be compared there
+    schema = {
+        view: f"CREATE VIEW {view} AS SELECT {', '.join(selected)} FROM {table} {' '.join(joins)}",
+        f"{view}_insert": (
+            f"CREATE TRIGGER {view}_insert INSTEAD OF INSERT ON {view}\n"
+            f"BEGIN\n{new_codes}"
+            f"INSERT INTO {table} ({', '.join(inserted)}) VALUES ({', '.join(values)});\nEND"
+        ),
+    }
+    marks = ",".join("?" * len(schema))
+    current = dict(conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE name IN ({marks})", list(schema),
+    ).fetchall())
+    if current == schema:
+        return False
+    conn.execute(f"DROP VIEW IF EXISTS {view}")  # drops its trigger too
+    for sql in schema.values():
+        conn.execute(sql)
+    return True
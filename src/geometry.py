@@ -0,0 +1,203 @@
+import json
+import math
+
+from src.config import BOUNDARY_SIMPLIFY_TOLERANCES
+
+# Kilometres per degree of latitude; a degree of longitude is this times
+# cos(latitude). Accurate to well under 1% at city scale.
+_KM_PER_DEGREE = 111.32
+
+
+def _signed_area(ring: list) -> float:
+    """Shoelace area of ``ring`` in square degrees; positive when counter-clockwise."""
+    total = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        total += x1 * y2 - x2 * y1
+    return total / 2
+
+
+def _contains(ring: list, x: float, y: float) -> bool:
+    """Even-odd point-in-ring test."""
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def rings_to_geojson(geom: dict | None) -> dict | None:
+    """Convert an ArcGIS polygon (``{"rings": [...]}``) to a GeoJSON geometry.
+
+    ArcGIS lists outer rings clockwise and holes counter-clockwise, in any
+    order; each hole is attached to the outer ring containing it. Rings are
+    rewound to GeoJSON's convention (outer counter-clockwise). Returns a
+    ``Polygon`` or ``MultiPolygon``; a geometry that is already GeoJSON is
+    returned unchanged.
+    """
+    if not geom:
+        return None
+    if "type" in geom:
+        return geom
+    rings = [ring for ring in geom.get("rings") or [] if len(ring) >= 4]
+    outers, holes = [], []
+    for ring in rings:
+        (outers if _signed_area(ring) <= 0 else holes).append(ring)
+    if not outers:  # wound the other way round; treat every ring as a part
+        outers, holes = holes, []
+    polygons = [[ring[::-1] if _signed_area(ring) < 0 else ring] for ring in outers]
+    for hole in holes:
+        x, y = hole[0]
+        owner = next(
+            (polygon for polygon in polygons if _contains(polygon[0], x, y)), polygons[0],
+        )
+        owner.append(hole[::-1] if _signed_area(hole) > 0 else hole)
+    if not polygons:
+        return None
+    if len(polygons) == 1:
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def _polygons(geojson: dict) -> list:
+    if geojson["type"] == "Polygon":
+        return [geojson["coordinates"]]
+    return geojson["coordinates"]
+
+
+def _simplify_line(points: list, tolerance: float) -> list:
+    """Douglas-Peucker: drop points closer than ``tolerance`` to the kept chord."""
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        norm = math.hypot(dx, dy)
+        worst, index = 0.0, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if norm:
+                dist = abs(dy * (px - x1) - dx * (py - y1)) / norm
+            else:
+                dist = math.hypot(px - x1, py - y1)
+            if dist > worst:
+                worst, index = dist, i
+        if index is not None and worst > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, kept in zip(points, keep) if kept]
+
+
+def _simplify_ring(ring: list, tolerance: float) -> list | None:
+    """Simplify a closed ring, or None if it collapses below a triangle."""
+    # Split at the point farthest from the start so a closed ring (whose
+    # endpoints coincide) has a proper chord to simplify against.
+    x0, y0 = ring[0]
+    far = max(range(len(ring)), key=lambda i: (ring[i][0] - x0) ** 2 + (ring[i][1] - y0) ** 2)
+    simplified = _simplify_line(ring[:far + 1], tolerance)[:-1] + _simplify_line(ring[far:], tolerance)
+    return simplified if len(simplified) >= 4 else None
+
+
+def simplify(geojson: dict, tolerance: float, digits: int = 5) -> dict:
+    """A simplified copy of a (Multi)Polygon, coordinates rounded to ``digits``.
+
+    Holes and parts that shrink below a triangle are dropped; a polygon whose
+    outer ring would collapse keeps its outer ring unsimplified.
+    """
+    polygons = []
+    for polygon in _polygons(geojson):
+        outer = _simplify_ring(polygon[0], tolerance) or polygon[0]
+        rings = [outer] + [
+            ring for ring in (_simplify_ring(hole, tolerance) for hole in polygon[1:]) if ring
+        ]
+        polygons.append([[[round(x, digits), round(y, digits)] for x, y in ring] for ring in rings])
+    if geojson["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def vertex_count(geojson: dict) -> int:
+    return sum(len(ring) for polygon in _polygons(geojson) for ring in polygon)
+
+
+def bbox(geojson: dict) -> tuple[float, float, float, float]:
+    """``(min_lon, min_lat, max_lon, max_lat)`` of the outer rings."""
+    xs = [x for polygon in _polygons(geojson) for x, _ in polygon[0]]
+    ys = [y for polygon in _polygons(geojson) for _, y in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def area_and_centroid(geojson: dict) -> tuple[float, float, float]:
+    """``(area_sq_km, centroid_lat, centroid_lon)``, holes subtracted.
+
+    Area is scaled from square degrees at the centroid's latitude; the
+    centroid is the area-weighted centroid of the rings.
+    """
+    total = cx = cy = 0.0
+    for polygon in _polygons(geojson):
+        for i, ring in enumerate(polygon):
+            sign = 1 if i == 0 else -1
+            a = abs(_signed_area(ring))
+            if not a:
+                continue
+            rx = ry = 0.0
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                cross = x1 * y2 - x2 * y1
+                rx += (x1 + x2) * cross
+                ry += (y1 + y2) * cross
+            signed = _signed_area(ring)
+            rx, ry = rx / (6 * signed), ry / (6 * signed)
+            total += sign * a
+            cx += sign * a * rx
+            cy += sign * a * ry
+    if not total:
+        min_lon, min_lat, max_lon, max_lat = bbox(geojson)
+        return 0.0, (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    lat, lon = cy / total, cx / total
+    km2_per_degree2 = _KM_PER_DEGREE ** 2 * math.cos(math.radians(lat))
+    return total * km2_per_degree2, lat, lon
+
+
+def contains(geojson: dict, lat: float, lon: float) -> bool:
+    """Whether the point lies inside the (Multi)Polygon (even-odd, holes excluded)."""
+    return any(
+        _contains(polygon[0], lon, lat)
+        and not any(_contains(hole, lon, lat) for hole in polygon[1:])
+        for polygon in _polygons(geojson)
+    )
+
+
+def boundary_columns(geom: dict | None) -> dict:
+    """The derived ``boundaries`` columns for one ArcGIS (or GeoJSON) polygon:
+    GeoJSON at full detail and at each ``BOUNDARY_SIMPLIFY_TOLERANCES`` level,
+    bounding box, area, centroid and vertex count. All None without geometry."""
+    geojson = rings_to_geojson(geom)
+    columns = dict.fromkeys(BOUNDARY_COLUMNS)
+    if geojson is None:
+        return columns
+    min_lon, min_lat, max_lon, max_lat = bbox(geojson)
+    area, centroid_lat, centroid_lon = area_and_centroid(geojson)
+    columns.update(
+        geometry_geojson=json.dumps(geojson, separators=(",", ":")),
+        min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon,
+        area_sq_km=area, centroid_lat=centroid_lat, centroid_lon=centroid_lon,
+        vertices=vertex_count(geojson),
+    )
+    for level, tolerance in BOUNDARY_SIMPLIFY_TOLERANCES.items():
+        columns[f"geojson_{level}"] = json.dumps(
+            simplify(geojson, tolerance), separators=(",", ":"),
+        )
+    return columns
+
+
+# Column order of boundary_columns()
+BOUNDARY_COLUMNS = (
+    "geometry_geojson",
+    *(f"geojson_{level}" for level in BOUNDARY_SIMPLIFY_TOLERANCES),
+    "min_lat", "min_lon", "max_lat", "max_lon",
+    "area_sq_km", "centroid_lat", "centroid_lon", "vertices",
+)
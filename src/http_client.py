@@ -0,0 +1,184 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib decoder is used instead
+    orjson = None
+
+from src.config import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ArcGISError(requests.HTTPError):
+    """An ArcGIS error body (``{"error": {"code": ..., "message": ...}}``),
+    which the server sends with HTTP 200."""
+
+    def __init__(self, url: str, error: dict):
+        self.code = error.get("code")
+        details = "; ".join(str(d) for d in error.get("details") or ())
+        super().__init__(
+            f"ArcGIS error {self.code} from {url}: {error.get('message')}"
+            + (f" ({details})" if details else "")
+        )
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+_stats: dict[str, dict] = defaultdict(
+    lambda: {"requests": 0, "retries": 0, "bytes": 0, "seconds": 0.0, "max_seconds": 0.0}
+)
+_stats_lock = threading.Lock()
+
+# Per-thread timings of the most recent get_json() call (see last_request())
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use.
+
+    Connections are kept alive and reused across pages and fetch threads;
+    ``HTTP_POOL_SIZE`` bounds the sockets held per host.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            })
+            _session = session
+        return _session
+
+
+def _backoff(attempt: int, retry_after: str | None = None) -> float:
+    """Seconds to wait before retry ``attempt`` (exponential, full jitter)."""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def _record(url: str, seconds: float, nbytes: int, retried: bool) -> None:
+    with _stats_lock:
+        entry = _stats[url]
+        entry["requests"] += 1
+        entry["retries"] += int(retried)
+        entry["bytes"] += nbytes
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+
+def get_response(
+    url: str, params: dict, timeout: float = HTTP_TIMEOUT,
+    max_retries: int = HTTP_MAX_RETRIES,
+) -> requests.Response:
+    """GET ``url`` on the shared session, retrying transient failures.
+
+    429/5xx responses, timeouts and connection errors are retried up to
+    ``max_retries`` times with jittered exponential backoff (honouring
+    ``Retry-After``). Other HTTP errors raise immediately. Every attempt is
+    counted in :func:`get_stats` under ``url``.
+    """
+    session = get_session()
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            resp = session.get(url, params=params, timeout=timeout)
+        except (requests.Timeout, requests.ConnectionError) as exc:
+            _record(url, time.perf_counter() - started, 0, attempt > 0)
+            if attempt >= max_retries:
+                raise
+            delay = _backoff(attempt)
+            logger.warning("%s on %s, retrying in %.1fs", type(exc).__name__, url, delay)
+        else:
+            _record(url, time.perf_counter() - started, len(resp.content), attempt > 0)
+            if resp.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                resp.raise_for_status()
+                return resp
+            delay = _backoff(attempt, resp.headers.get("Retry-After"))
+            logger.warning("HTTP %d from %s, retrying in %.1fs", resp.status_code, url, delay)
+        attempt += 1
+        time.sleep(delay)
+
+
+def loads(body: bytes | str):
+    """Decode JSON with orjson when it is installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def get_json(
+    url: str, params: dict, timeout: float = HTTP_TIMEOUT,
+    max_retries: int = HTTP_MAX_RETRIES,
+) -> dict:
+    """GET ``url`` with retries (see :func:`get_response`) and decode the JSON body.
+
+    The body is decoded with :func:`loads`. An ArcGIS error body raises
+    :class:`ArcGISError`, after being retried like the HTTP status when its
+    code is one of ``RETRY_STATUSES``. The request's latency (including
+    retries), response size and decode time are available to the calling
+    thread afterwards from :func:`last_request`.
+    """
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        resp = get_response(url, params, timeout, max_retries)
+        received = time.perf_counter()
+        data = loads(resp.content)
+        error = data.get("error") if isinstance(data, dict) else None
+        if error is None:
+            break
+        if error.get("code") not in RETRY_STATUSES or attempt >= max_retries:
+            raise ArcGISError(url, error)
+        with _stats_lock:
+            _stats[url]["retries"] += 1
+        delay = _backoff(attempt)
+        logger.warning("ArcGIS error %s from %s, retrying in %.1fs", error.get("code"), url, delay)
+        attempt += 1
+        time.sleep(delay)
+    _local.last = {
+        "latency": received - started,
+        "nbytes": len(resp.content),
+        "decode_seconds": time.perf_counter() - received,
+    }
+    return data
+
+
+def last_request() -> dict:
+    """``latency``, ``nbytes`` and ``decode_seconds`` of this thread's last
+    :func:`get_json` call (empty if it hasn't made one)."""
+    return dict(getattr(_local, "last", {}))
+
+
+def get_stats() -> dict[str, dict]:
+    """Per-URL request, retry, byte and latency counters since the last reset."""
+    with _stats_lock:
+        return {url: dict(entry) for url, entry in _stats.items()}
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
@@ -2,7 +2,8 @@ import folium
 from folium.plugins import HeatMap
 import json
 from pathlib import Path
-from src.database import get_connection
+from src.config import BOUNDARY_SIMPLIFY_TOLERANCES
+from src.database import connection
 
 
 def create_base_map(center=(40.6936, -89.5890), zoom=12):
@@ -42,25 +43,38 @@ def add_crime_markers(m: folium.Map, crimes: list[dict], max_markers: int = 500)
     return m
 
 
-def add_boundary_overlay(m: folium.Map, db_path: Path, boundary_type: str) -> folium.Map:
-    conn = get_connection(db_path)
-    rows = conn.execute(
-        "SELECT name, geometry_geojson FROM boundaries WHERE boundary_type = ?",
-        (boundary_type,)
-    ).fetchall()
-    conn.close()
+def add_boundary_overlay(
+    m: folium.Map, db_path: Path, boundary_type: str, level: str = "medium",
+) -> folium.Map:
+    """Outline every boundary of ``boundary_type`` as one GeoJSON layer.
 
+    ``level`` picks the precomputed simplification (a key of
+    ``BOUNDARY_SIMPLIFY_TOLERANCES``: "fine" for zoom 14+, "medium" for the
+    default zoom 12, "coarse" for city-wide views) or "full" for every vertex.
+    """
+    if level != "full" and level not in BOUNDARY_SIMPLIFY_TOLERANCES:
+        raise ValueError(f"Unknown boundary level: {level}")
+    column = "geometry_geojson" if level == "full" else f"COALESCE(geojson_{level}, geometry_geojson)"
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT name, {column} AS geojson FROM boundaries "
+            f"WHERE boundary_type = ? AND geometry_geojson IS NOT NULL",
+            (boundary_type,)
+        ).fetchall()
+
+    features = []
     for row in rows:
         try:
-            geom = json.loads(row["geometry_geojson"])
-            geojson = {"type": "Feature", "geometry": geom, "properties": {"name": row["name"]}}
-            folium.GeoJson(
-                geojson,
-                style_function=lambda x: {"fillColor": "transparent", "color": "#3388ff", "weight": 2},
-                tooltip=row["name"],
-            ).add_to(m)
+            geom = json.loads(row["geojson"])
         except (json.JSONDecodeError, TypeError):
             continue
+        features.append({"type": "Feature", "geometry": geom, "properties": {"name": row["name"]}})
+    if features:
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            style_function=lambda x: {"fillColor": "transparent", "color": "#3388ff", "weight": 2},
+            tooltip=folium.GeoJsonTooltip(fields=["name"], labels=False),
+        ).add_to(m)
     return m
 
 
@@ -5,13 +5,16 @@ from pathlib import Path
 from streamlit_folium import st_folium
 
 from src.config import DB_PATH, DISTRICT_NAMES
-from src.database import init_db, get_connection
+from src.database import init_db
 from src.queries import (
     get_crime_counts_by_area,
+    get_crime_total,
     get_crime_trend,
     compute_severity_score,
     get_top_crime_types,
     get_area_options,
+    get_recent_crimes,
+    get_row_count,
     get_yoy_change,
 )
 from src.map_utils import create_base_map, add_crime_heatmap, add_crime_markers, add_boundary_overlay
@@ -35,9 +38,7 @@ def render(db_path: Path = DB_PATH):
     st.header("Crime Dashboard")
 
     init_db(db_path)
-    conn = get_connection(db_path)
-    total = conn.execute("SELECT count(*) FROM crimes").fetchone()[0]
-    conn.close()
+    total = get_row_count(db_path, "crimes")
 
     if total == 0:
         st.warning("No crime data loaded yet. Go to **Data Sources & Sync** to pull data.")
@@ -121,26 +122,7 @@ def render(db_path: Path = DB_PATH):
     })
 
     with metric_col2:
-        conn = get_connection(db_path)
-        conditions = []
-        params = []
-        if "year" in filters:
-            conditions.append("report_year = ?")
-            params.append(filters["year"])
-        if "district" in filters:
-            conditions.append("district = ?")
-            params.append(filters["district"])
-        if "beat" in filters:
-            conditions.append("beat = ?")
-            params.append(filters["beat"])
-        if "neighborhood" in filters:
-            conditions.append("neighborhood = ?")
-            params.append(filters["neighborhood"])
-        where = " WHERE " + " AND ".join(conditions) if conditions else ""
-        filtered_total = conn.execute(
-            f"SELECT count(*) FROM crimes{where}", params
-        ).fetchone()[0]
-        conn.close()
+        filtered_total = get_crime_total(db_path, **filters)
         st.metric("Total Crimes", f"{filtered_total:,}")
 
     with metric_col3:
@@ -163,32 +145,12 @@ def render(db_path: Path = DB_PATH):
 
     # Map
     st.subheader("Crime Map")
-    conn = get_connection(db_path)
-    conditions = []
-    params = []
-    if "year" in filters:
-        conditions.append("report_year = ?")
-        params.append(filters["year"])
-    if "district" in filters:
-        conditions.append("district = ?")
-        params.append(filters["district"])
-    if "beat" in filters:
-        conditions.append("beat = ?")
-        params.append(filters["beat"])
-    if "neighborhood" in filters:
-        conditions.append("neighborhood = ?")
-        params.append(filters["neighborhood"])
-    where = " WHERE " + " AND ".join(conditions) if conditions else ""
-    rows = conn.execute(
-        f"SELECT * FROM crimes{where} ORDER BY report_date DESC LIMIT 2000", params
-    ).fetchall()
-    conn.close()
-    crimes = [dict(r) for r in rows]
+    crimes = get_recent_crimes(db_path, limit=2000, **filters)
 
     m = create_base_map()
     m = add_crime_heatmap(m, crimes)
     m = add_crime_markers(m, crimes, max_markers=300)
-    m = add_boundary_overlay(m, db_path, "district")
+    m = add_boundary_overlay(m, db_path, "districts")
     st_folium(m, width=None, height=500, use_container_width=True)
 
     # Trend chart
@@ -4,9 +4,8 @@ from pathlib import Path
 from streamlit_folium import st_folium
 
 from src.config import DB_PATH, DISTRICT_NAMES
-from src.database import get_connection
 from src.map_utils import create_base_map, add_crime_markers
-from src.queries import get_area_options
+from src.queries import get_area_options, get_records, get_row_count
 
 
 def render(db_path: Path = DB_PATH):
@@ -16,9 +15,7 @@ def render(db_path: Path = DB_PATH):
     source = st.radio("Data Source", ["Crimes", "Calls for Service", "ShotSpotter"], horizontal=True)
     table = {"Crimes": "crimes", "Calls for Service": "calls_for_service", "ShotSpotter": "shotspotter"}[source]
 
-    conn = get_connection(db_path)
-    total = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
-    conn.close()
+    total = get_row_count(db_path, table)
 
     if total == 0:
         st.warning(f"No {source} data loaded. Go to **Data Sources & Sync** to pull data.")
@@ -44,42 +41,14 @@ def render(db_path: Path = DB_PATH):
             label_to_district = {v: k for k, v in district_display.items()}
             selected_district = label_to_district.get(selected_district_label, selected_district_label)
 
-        conditions = []
-        params = []
-        if selected_type != "All":
-            conditions.append("nibrs_offense = ?")
-            params.append(selected_type)
-        if selected_district != "All":
-            conditions.append("district = ?")
-            params.append(selected_district)
+        df = pd.DataFrame(get_records(
+            db_path, table,
+            offense=selected_type if selected_type != "All" else None,
+            district=selected_district if selected_district != "All" else None,
+        ))
 
-        where = " WHERE " + " AND ".join(conditions) if conditions else ""
-        conn = get_connection(db_path)
-        df = pd.read_sql_query(
-            f"SELECT offense_id, nibrs_offense, nibrs_description, address, district, beat, "
-            f"neighborhood, report_date, latitude, longitude FROM {table}{where} "
-            f"ORDER BY report_date DESC LIMIT 5000",
-            conn, params=params,
-        )
-        conn.close()
-
-    elif table == "calls_for_service":
-        conn = get_connection(db_path)
-        df = pd.read_sql_query(
-            f"SELECT call_id, call_type, priority, disposition, address, district, beat, "
-            f"call_date, latitude, longitude FROM {table} ORDER BY call_date DESC LIMIT 5000",
-            conn,
-        )
-        conn.close()
-
-    else:  # shotspotter
-        conn = get_connection(db_path)
-        df = pd.read_sql_query(
-            f"SELECT incident_id, rounds_fired, event_type, address, district, beat, "
-            f"event_date, latitude, longitude FROM {table} ORDER BY event_date DESC LIMIT 5000",
-            conn,
-        )
-        conn.close()
+    else:  # calls for service, shotspotter
+        df = pd.DataFrame(get_records(db_path, table))
 
     st.subheader(f"{len(df):,} records shown")
 
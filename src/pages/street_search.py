@@ -5,8 +5,7 @@ from pathlib import Path
 from streamlit_folium import st_folium
 
 from src.config import DB_PATH
-from src.database import get_connection
-from src.queries import search_streets, get_street_crime_summary
+from src.queries import get_row_count, search_streets, get_street_crime_summary
 from src.map_utils import create_base_map, add_crime_markers
 
 
@@ -14,9 +13,7 @@ def render(db_path: Path = DB_PATH):
     st.header("Street Search")
     st.caption("Search by street name to see crime activity in your area")
 
-    conn = get_connection(db_path)
-    total = conn.execute("SELECT count(*) FROM crimes").fetchone()[0]
-    conn.close()
+    total = get_row_count(db_path, "crimes")
 
     if total == 0:
         st.warning("No crime data loaded yet. Go to **Data Sources & Sync** to pull data.")
@@ -61,7 +58,7 @@ def _render_street_detail(db_path: Path, address: str):
     st.divider()
     st.subheader(f"Crime Detail: {address}")
 
-    summary = get_street_crime_summary(db_path, address)
+    summary = get_street_crime_summary(db_path, address, exact=True)
 
     # Metrics row
     col1, col2, col3 = st.columns(3)
@@ -1,10 +1,25 @@
+import subprocess
+import sys
+
 import streamlit as st
 import pandas as pd
 from pathlib import Path
 
-from src.config import DB_PATH, ENDPOINTS
-from src.database import get_connection, init_db
-from src.sync import run_full_sync, sync_crimes, sync_calls_for_service, sync_shotspotter, sync_boundaries
+from src.config import DB_PATH, ENDPOINTS, PROJECT_ROOT
+from src.database import connection, init_db
+from src.queries import get_row_count
+from src.sync import sync_status
+
+
+def _launch(db_path: Path, args: list[str]) -> None:
+    """Start ``python -m src.sync <args>`` detached, logging next to the database."""
+    log = open(Path(db_path).with_suffix(".sync.log"), "a")
+    subprocess.Popen(
+        [sys.executable, "-m", "src.sync", "--db", str(db_path), *args],
+        cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+    )
+    log.close()
+    st.success(f"Started `{' '.join(args)}` in the background.")
 
 
 def render(db_path: Path = DB_PATH):
@@ -14,7 +29,6 @@ def render(db_path: Path = DB_PATH):
 
     # Current status
     st.subheader("Data Status")
-    conn = get_connection(db_path)
 
     tables = {
         "Crimes": "crimes",
@@ -24,56 +38,110 @@ def render(db_path: Path = DB_PATH):
     }
 
     cols = st.columns(len(tables))
+    counts = {table: get_row_count(db_path, table) for table in tables.values()}
+    with connection(db_path) as conn:
+        sync_df = pd.read_sql_query(
+            "SELECT source, table_name, records_fetched, records_inserted, records_updated, "
+            "records_unchanged, table_rows, started_at, completed_at, status, duration_seconds, "
+            "pages, rows_per_second, p50_page_seconds, p95_page_seconds, peak_memory_kb "
+            "FROM sync_log ORDER BY id DESC LIMIT 20",
+            conn,
+        )
+        # Per-run and per-page telemetry
+        runs_df = pd.read_sql_query(
+            "SELECT completed_at, table_name, rows_per_second, p95_page_seconds "
+            "FROM sync_log WHERE pages IS NOT NULL ORDER BY id DESC LIMIT 200",
+            conn,
+        )
+        pages_df = pd.read_sql_query(
+            "SELECT table_name, page_no, latency_seconds, decode_seconds, "
+            "transform_seconds, insert_seconds "
+            "FROM sync_page_stats WHERE run_id = "
+            "(SELECT run_id FROM sync_page_stats ORDER BY id DESC LIMIT 1) "
+            "ORDER BY id",
+            conn,
+        )
+
     for i, (label, table) in enumerate(tables.items()):
-        count = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
         with cols[i]:
-            st.metric(label, f"{count:,}")
+            st.metric(label, f"{counts[table]:,}")
 
     # Last sync info
     st.subheader("Sync History")
-    sync_df = pd.read_sql_query(
-        "SELECT source, table_name, records_fetched, started_at, completed_at, status "
-        "FROM sync_log ORDER BY id DESC LIMIT 20",
-        conn,
-    )
-    conn.close()
-
     if not sync_df.empty:
         st.dataframe(sync_df, use_container_width=True)
     else:
         st.info("No sync history yet.")
 
+    if not runs_df.empty:
+        st.subheader("Sync Telemetry")
+        runs_df["completed_at"] = pd.to_datetime(runs_df["completed_at"])
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption("Rows/sec per run")
+            st.line_chart(runs_df.pivot_table(
+                index="completed_at", columns="table_name", values="rows_per_second",
+            ))
+        with col2:
+            st.caption("p95 page latency (s) per run")
+            st.line_chart(runs_df.pivot_table(
+                index="completed_at", columns="table_name", values="p95_page_seconds",
+            ))
+
+    if not pages_df.empty:
+        st.caption("Latest run: request latency per page (s)")
+        st.line_chart(pages_df.pivot_table(
+            index="page_no", columns="table_name", values="latency_seconds",
+        ))
+        st.caption("Latest run: where the time went (s)")
+        breakdown = pages_df.groupby("table_name")[
+            ["latency_seconds", "decode_seconds", "transform_seconds", "insert_seconds"]
+        ].sum()
+        st.bar_chart(breakdown)
+
     # Sync controls
     st.subheader("Sync Controls")
-    st.caption("Pull latest data from Peoria PD ArcGIS services.")
+    st.caption(
+        "Pull latest data from Peoria PD ArcGIS services. Syncs run in a "
+        "background process (the same as `python -m src.sync`), so this page "
+        "stays responsive; progress appears below."
+    )
+
+    status = sync_status(db_path)
+    running = status["lock"] is not None
+    if running:
+        st.info(f"A sync is running (since {status['lock']['acquired_at']} UTC).")
+    if status["progress"]:
+        st.dataframe(pd.DataFrame(status["progress"]), use_container_width=True)
+    st.button("Refresh status")
+
+    incremental = st.checkbox(
+        "Incremental (only fetch records newer than the last sync)", value=True,
+    )
+    rebuild = st.checkbox(
+        "Full rebuild (clear tables and bulk reload everything)", value=False,
+    )
+    flags = (["--incremental"] if incremental else []) + (["--rebuild"] if rebuild else [])
 
     col1, col2 = st.columns(2)
 
     with col1:
-        if st.button("Full Sync (All Sources)", type="primary"):
-            with st.spinner("Syncing all data sources... This may take several minutes."):
-                result = run_full_sync(db_path)
-            st.success(
-                f"Sync complete! Crimes: {result['crimes']:,}, "
-                f"Calls: {result['calls_for_service']:,}, "
-                f"ShotSpotter: {result['shotspotter']:,}, "
-                f"Boundaries: {result['boundaries']:,}"
-            )
-            st.rerun()
+        if st.button("Full Sync (All Sources)", type="primary", disabled=running):
+            _launch(db_path, ["full", *flags])
 
     with col2:
         source_choice = st.selectbox("Or sync a single source:", list(tables.keys()))
-        if st.button("Sync Selected"):
-            sync_fn = {
-                "Crimes": sync_crimes,
-                "Calls for Service": sync_calls_for_service,
-                "ShotSpotter": sync_shotspotter,
-                "Boundaries": sync_boundaries,
-            }[source_choice]
-            with st.spinner(f"Syncing {source_choice}..."):
-                count = sync_fn(db_path)
-            st.success(f"Synced {count:,} {source_choice} records.")
-            st.rerun()
+        if st.button("Sync Selected", disabled=running):
+            _launch(db_path, ["source", tables[source_choice], *flags])
+
+    if st.button("Reconcile Deletions", disabled=running):
+        _launch(db_path, ["reconcile"])
+
+    if st.button("Backfill History", disabled=running):
+        _launch(db_path, ["backfill"])
+
+    if st.button("Rebuild from Archive", disabled=running):
+        _launch(db_path, ["replay"])
 
     # Data sources transparency
     st.subheader("Data Sources")
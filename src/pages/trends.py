@@ -4,16 +4,20 @@ import pandas as pd
 from pathlib import Path
 
 from src.config import DB_PATH, DISTRICT_NAMES
-from src.database import get_connection
-from src.queries import get_crime_trend, get_area_options, compute_severity_score
+from src.queries import (
+    compute_severity_score,
+    get_area_options,
+    get_crime_trend,
+    get_monthly_offense_counts,
+    get_row_count,
+    get_time_patterns,
+)
 
 
 def render(db_path: Path = DB_PATH):
     st.header("Trends & Comparison")
 
-    conn = get_connection(db_path)
-    total = conn.execute("SELECT count(*) FROM crimes").fetchone()[0]
-    conn.close()
+    total = get_row_count(db_path, "crimes")
 
     if total == 0:
         st.warning("No crime data loaded yet.")
@@ -40,19 +44,7 @@ def _render_monthly_trends(db_path: Path):
         default=years[-2:] if len(years) >= 2 else years
     )
 
-    conn = get_connection(db_path)
-    if selected_years:
-        placeholders = ",".join("?" * len(selected_years))
-        df = pd.read_sql_query(
-            f"SELECT report_year, report_month, nibrs_offense, COUNT(*) as count "
-            f"FROM crimes WHERE report_year IN ({placeholders}) "
-            f"GROUP BY report_year, report_month, nibrs_offense "
-            f"ORDER BY report_year, report_month",
-            conn, params=selected_years,
-        )
-    else:
-        df = pd.DataFrame()
-    conn.close()
+    df = pd.DataFrame(get_monthly_offense_counts(db_path, selected_years))
 
     if df.empty:
         st.info("No data for selected years.")
@@ -144,14 +136,7 @@ def _render_area_comparison(db_path: Path):
 def _render_time_patterns(db_path: Path):
     st.subheader("When Do Crimes Happen?")
 
-    conn = get_connection(db_path)
-    df = pd.read_sql_query("""
-        SELECT report_dow, report_hour, COUNT(*) as count
-        FROM crimes
-        WHERE report_dow IS NOT NULL AND report_hour IS NOT NULL
-        GROUP BY report_dow, report_hour
-    """, conn)
-    conn.close()
+    df = pd.DataFrame(get_time_patterns(db_path))
 
     if df.empty:
         st.info("No time pattern data available.")
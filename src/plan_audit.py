@@ -0,0 +1,176 @@
+"""EXPLAIN QUERY PLAN audit of the application's read workload.
+
+Every query the app issues against the large tables is registered here:
+query-layer functions (which the pages call for all their reads) are called
+with representative arguments and the SQL they run is captured from the
+connection's trace callback, and sync's own SQL is imported from
+:mod:`src.sync`, so the audit checks the statements that actually run. The audit
+fails on any plan step that scans one of :data:`LARGE_TABLES` without an
+index (``SCAN crimes``, or ``SCAN t`` under an alias); walking an index
+(``SCAN crimes USING [COVERING] INDEX ...``) is allowed.
+
+Run with ``python -m src.plan_audit [--db PATH]``; exits 1 on full scans.
+"""
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import Callable
+
+from src import map_utils, queries
+from src.config import DB_PATH
+from src.database import connection
+from src.sync import OBJECT_IDS_SQL
+
+LARGE_TABLES = ("crimes", "calls_for_service", "shotspotter")
+
+_AREA = {"district": "1"}
+_STREET = "MAIN"
+
+# (label, query-layer call) pairs; each call gets the database path
+_CALLS: list[tuple[str, Callable[[Path], object]]] = [
+    *(
+        (f"get_crime_counts_by_area({area}{', year' if year else ''})",
+         lambda db, area=area, year=year: queries.get_crime_counts_by_area(db, area, year))
+        for area in ("district", "beat", "neighborhood") for year in (None, 2024)
+    ),
+    ("get_crime_trend()", lambda db: queries.get_crime_trend(db)),
+    ("get_crime_trend(year, district)", lambda db: queries.get_crime_trend(db, 2024, **_AREA)),
+    ("get_crime_trend(beat)", lambda db: queries.get_crime_trend(db, beat="1A")),
+    ("get_crime_trend(neighborhood)", lambda db: queries.get_crime_trend(db, neighborhood="Downtown")),
+    ("get_crime_trend(start, end)",
+     lambda db: queries.get_crime_trend(db, start="2024-01-01", end="2024-07-01")),
+    ("get_crimes_near_address", lambda db: queries.get_crimes_near_address(db, 40.69, -89.59)),
+    ("get_crimes_near_address(start, offense)",
+     lambda db: queries.get_crimes_near_address(
+         db, 40.69, -89.59, start="2024-01-01", offense="Assault Offenses")),
+    ("get_nearest_crimes", lambda db: queries.get_nearest_crimes(db, 40.69, -89.59)),
+    *(
+        (f"get_points_near({table})",
+         lambda db, table=table: queries.get_points_near(db, table, 40.69, -89.59))
+        for table in ("calls_for_service", "shotspotter")
+    ),
+    ("compute_severity_score()", lambda db: queries.compute_severity_score(db)),
+    ("compute_severity_score(district, year)",
+     lambda db: queries.compute_severity_score(db, year=2024, **_AREA)),
+    ("compute_severity_score(beat)", lambda db: queries.compute_severity_score(db, beat="1A")),
+    ("compute_severity_score(neighborhood)",
+     lambda db: queries.compute_severity_score(db, neighborhood="Downtown")),
+    ("get_top_crime_types()", lambda db: queries.get_top_crime_types(db)),
+    ("get_top_crime_types(district)", lambda db: queries.get_top_crime_types(db, **_AREA)),
+    ("get_top_crime_types(beat)", lambda db: queries.get_top_crime_types(db, beat="1A")),
+    *(
+        (f"get_area_options({area})", lambda db, area=area: queries.get_area_options(db, area))
+        for area in ("district", "beat", "neighborhood", "report_year", "nibrs_offense")
+    ),
+    ("get_yoy_change()", lambda db: queries.get_yoy_change(db)),
+    ("get_yoy_change(district)", lambda db: queries.get_yoy_change(db, **_AREA)),
+    ("get_yoy_change(beat)", lambda db: queries.get_yoy_change(db, beat="1A")),
+    ("get_time_patterns", lambda db: queries.get_time_patterns(db)),
+    ("search_streets", lambda db: queries.search_streets(db, _STREET)),
+    ("get_street_crime_summary", lambda db: queries.get_street_crime_summary(db, _STREET)),
+    ("get_recent_crimes()", lambda db: queries.get_recent_crimes(db)),
+    ("get_recent_crimes(district, start)",
+     lambda db: queries.get_recent_crimes(db, start="2024-01-01", **_AREA)),
+    ("get_recent_crimes(year, district)",
+     lambda db: queries.get_recent_crimes(db, 2000, year=2024, **_AREA)),
+    ("get_recent_crimes(beat)", lambda db: queries.get_recent_crimes(db, 2000, beat="1A")),
+    *(
+        (f"get_row_count({table})", lambda db, table=table: queries.get_row_count(db, table))
+        for table in LARGE_TABLES
+    ),
+    ("get_crime_total()", lambda db: queries.get_crime_total(db)),
+    ("get_crime_total(year, district)",
+     lambda db: queries.get_crime_total(db, year=2024, **_AREA)),
+    ("get_crime_total(beat)", lambda db: queries.get_crime_total(db, beat="1A")),
+    *(
+        (f"get_records({table})", lambda db, table=table: queries.get_records(db, table))
+        for table in LARGE_TABLES
+    ),
+    ("get_records(crimes, offense)",
+     lambda db: queries.get_records(db, "crimes", offense="Assault Offenses")),
+    ("get_records(crimes, offense, district)",
+     lambda db: queries.get_records(db, "crimes", offense="Assault Offenses", **_AREA)),
+    ("get_monthly_offense_counts",
+     lambda db: queries.get_monthly_offense_counts(db, [2023, 2024])),
+    ("add_boundary_overlay",
+     lambda db: map_utils.add_boundary_overlay(map_utils.create_base_map(), db, "districts")),
+]
+
+# SQL run outside the query layer, with representative parameters
+_STATEMENTS: list[tuple[str, str, tuple]] = [
+    (f"reconcile: {table} object ids", OBJECT_IDS_SQL.format(table=table), ())
+    for table in LARGE_TABLES
+]
+
+
+def workload(db_path: Path) -> list[tuple[str, str, tuple]]:
+    """Every registered query as ``(label, sql, params)``, running the
+    query-layer calls against ``db_path`` to capture the SQL they issue."""
+    statements = []
+    with connection(db_path) as conn:
+        for label, call in _CALLS:
+            captured = []
+            conn.set_trace_callback(captured.append)
+            try:
+                call(db_path)
+            finally:
+                conn.set_trace_callback(None)
+            # SQLite's own nested statements (R*Tree lookups) name the
+            # schema explicitly, as 'main'.
+            statements.extend(
+                (label, sql, ()) for sql in captured
+                if sql.lstrip().upper().startswith("SELECT") and "'main'." not in sql
+            )
+    return statements + _STATEMENTS
+
+
+_KEYWORDS = {"WHERE", "JOIN", "LEFT", "INNER", "CROSS", "ON", "GROUP", "ORDER", "LIMIT", "USING"}
+
+
+def _scan_names(sql: str) -> set[str]:
+    """Names a large table goes by in ``sql``: the table itself and any alias."""
+    names = set(LARGE_TABLES)
+    pattern = rf"\b(?:FROM|JOIN)\s+({'|'.join(LARGE_TABLES)})(?:\s+(?:AS\s+)?(\w+))?"
+    for _, alias in re.findall(pattern, sql, flags=re.IGNORECASE):
+        if alias and alias.upper() not in _KEYWORDS:
+            names.add(alias)
+    return names
+
+
+def plan(conn, sql: str, params: tuple = ()) -> list[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def full_scans(db_path: Path) -> list[tuple[str, str, str]]:
+    """``(label, sql, plan step)`` for every full scan of a large table."""
+    found = []
+    with connection(db_path) as conn:
+        for label, sql, params in workload(db_path):
+            names = _scan_names(sql)
+            for step in plan(conn, sql, params):
+                if step.startswith("SCAN ") and step[5:] in names:
+                    found.append((label, " ".join(sql.split()), step))
+    return found
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.plan_audit", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args(argv)
+    if args.verbose:
+        with connection(args.db) as conn:
+            for label, sql, params in workload(args.db):
+                print(f"{label}: {' '.join(sql.split())}")
+                for step in plan(conn, sql, params):
+                    print(f"    {step}")
+    scans = full_scans(args.db)
+    for label, sql, step in scans:
+        print(f"FULL SCAN ({step}) in {label}: {sql}")
+    print(f"{len(scans)} full table scan(s)")
+    return 1 if scans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,147 +1,342 @@
+import json
+import math
+from datetime import date, datetime, timezone
 from pathlib import Path
 
-from src.database import get_connection
-from src.config import CRIME_WEIGHTS, DEFAULT_WEIGHT
+from src.database import connection
+from src.dictionary import DICTIONARY_COLUMNS, decoded, equals_sql, value_sql
+from src.geometry import contains
+from src.rollup import ROLLUPS
+from src.streets import address_keys, normalize_query
+
+
+def _epoch_ms(value: date | datetime | str) -> int:
+    """Epoch milliseconds for a date, datetime or ISO string (naive = UTC)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def _add_date_range(conditions: list[str], params: list, start=None, end=None) -> None:
+    """Filter on report_date_ms: ``start`` inclusive, ``end`` exclusive."""
+    if start is not None:
+        conditions.append("report_date_ms >= ?")
+        params.append(_epoch_ms(start))
+    if end is not None:
+        conditions.append("report_date_ms < ?")
+        params.append(_epoch_ms(end))
+
+
+def _count_source(*columns: str) -> tuple[str, str]:
+    """Table and count expression for counting crimes grouped or filtered by
+    the crimes ``columns``: the smallest rollup (src/rollup.py) keyed by all
+    of them, else crimes itself."""
+    for rollup, dimensions in sorted(ROLLUPS.items(), key=lambda item: len(item[1])):
+        if set(columns) <= set(dimensions):
+            return rollup, "SUM(crimes)"
+    return "crimes", "COUNT(*)"
+
+
+def get_row_count(db_path: Path, table: str = "crimes") -> int:
+    """Returns the number of rows in ``table``."""
+    with connection(db_path) as conn:
+        return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
 
 
 def get_crime_counts_by_area(db_path: Path, area_type: str, year: int | None = None) -> dict[str, int]:
     """Returns {area_name: crime_count} for the given area_type column (district, beat, neighborhood)."""
-    conn = get_connection(db_path)
-    query = f"SELECT {area_type}, COUNT(*) as cnt FROM crimes"
+    group = f"{area_type}_code" if area_type in DICTIONARY_COLUMNS["crimes"] else area_type
+    value = value_sql(area_type) if group != area_type else area_type
+    source, count = _count_source(group, *(("report_year",) if year else ()))
+    query = f"SELECT {value}, {count} as cnt FROM {source}"
     params: list = []
     if year:
         query += " WHERE report_year = ?"
         params.append(year)
-    query += f" GROUP BY {area_type}"
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
+    query += f" GROUP BY {group}"
+    with connection(db_path) as conn:
+        rows = conn.execute(query, params).fetchall()
     return {row[0]: row[1] for row in rows if row[0]}
 
 
 def get_crime_trend(db_path: Path, year: int | None = None, district: str | None = None,
-                    beat: str | None = None, neighborhood: str | None = None) -> list[dict]:
-    """Returns list of {year, month, count} for crime trend over time."""
-    conn = get_connection(db_path)
+                    beat: str | None = None, neighborhood: str | None = None,
+                    start: date | datetime | str | None = None,
+                    end: date | datetime | str | None = None) -> list[dict]:
+    """Returns list of {year, month, count} for crime trend over time.
+
+    ``start``/``end`` restrict it to a report-date window (end exclusive);
+    that is counted from crimes, everything else from the rollup.
+    """
     conditions: list[str] = []
     params: list = []
+    columns = ["report_year", "report_month"]
 
     if year is not None:
         conditions.append("report_year = ?")
         params.append(year)
     if district is not None:
-        conditions.append("district = ?")
+        conditions.append(equals_sql("district"))
         params.append(district)
     if beat is not None:
-        conditions.append("beat = ?")
+        conditions.append(equals_sql("beat"))
         params.append(beat)
     if neighborhood is not None:
-        conditions.append("neighborhood = ?")
+        conditions.append(equals_sql("neighborhood"))
         params.append(neighborhood)
+    if start is not None or end is not None:
+        columns.append("report_date_ms")
+    _add_date_range(conditions, params, start, end)
 
-    query = "SELECT report_year, report_month, COUNT(*) as cnt FROM crimes"
+    source, count = _count_source(*columns)
+    query = f"SELECT report_year, report_month, {count} as cnt FROM {source}"
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
     query += " GROUP BY report_year, report_month ORDER BY report_year, report_month"
 
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
+    with connection(db_path) as conn:
+        rows = conn.execute(query, params).fetchall()
     return [{"year": row[0], "month": row[1], "count": row[2]} for row in rows]
 
 
-def get_crimes_near_address(db_path: Path, lat: float, lon: float, radius_miles: float = 0.5) -> list[dict]:
-    """Returns crimes within approximate radius of lat/lon using bounding box (1 degree ~ 69 miles)."""
-    conn = get_connection(db_path)
-    degree_offset = radius_miles / 69.0
-    min_lat = lat - degree_offset
-    max_lat = lat + degree_offset
-    min_lon = lon - degree_offset
-    max_lon = lon + degree_offset
-
-    query = """
-        SELECT id, offense_id, nibrs_offense, nibrs_description, address,
-               district, beat, neighborhood, report_date, report_year,
-               report_month, latitude, longitude
-        FROM crimes
-        WHERE latitude BETWEEN ? AND ?
-          AND longitude BETWEEN ? AND ?
+_EARTH_RADIUS_MILES = 3958.8
+_MILES_PER_DEGREE_LAT = _EARTH_RADIUS_MILES * math.pi / 180
+
+# Per point table: (epoch-ms date column, column the ``category`` filter
+# matches, columns returned by radius / nearest-neighbour searches)
+_POINT_SEARCH = {
+    "crimes": (
+        "report_date_ms", "nibrs_offense",
+        ("id", "offense_id", "nibrs_offense", "nibrs_description", "address", "district", "beat",
+         "neighborhood", "report_date", "report_year", "report_month", "latitude", "longitude"),
+    ),
+    "calls_for_service": (
+        "call_date_ms", "call_type",
+        ("id", "call_id", "call_type", "priority", "disposition", "address", "district", "beat",
+         "call_date", "latitude", "longitude"),
+    ),
+    "shotspotter": (
+        "event_date_ms", "event_type",
+        ("id", "incident_id", "rounds_fired", "event_type", "address", "district", "beat",
+         "event_date", "latitude", "longitude"),
+    ),
+}
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * _EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def _points_within(conn, table: str, lat: float, lon: float, radius_miles: float,
+                   start=None, end=None, category: str | None = None) -> list[dict]:
+    """Rows of ``table`` within ``radius_miles``, each with ``distance_miles``.
+
+    The R*Tree (``{table}_rtree``) supplies the candidates in the bounding
+    box of the circle; the exact haversine distance then filters them.
     """
-    params = [min_lat, max_lat, min_lon, max_lon]
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    date_column, category_column, columns = _POINT_SEARCH[table]
+    dlat = radius_miles / _MILES_PER_DEGREE_LAT
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    conditions = ["r.max_lat >= ?", "r.min_lat <= ?", "r.max_lon >= ?", "r.min_lon <= ?"]
+    params: list = [lat - dlat, lat + dlat, lon - dlon, lon + dlon]
+    if start is not None:
+        conditions.append(f"t.{date_column} >= ?")
+        params.append(_epoch_ms(start))
+    if end is not None:
+        conditions.append(f"t.{date_column} < ?")
+        params.append(_epoch_ms(end))
+    if category is not None:
+        if category_column in DICTIONARY_COLUMNS.get(table, ()):
+            conditions.append(equals_sql(category_column, "t"))
+        else:
+            conditions.append(f"t.{category_column} = ?")
+        params.append(category)
+    query = (
+        f"SELECT {', '.join(f't.{column}' for column in columns)} "
+        f"FROM {table}_rtree r JOIN {decoded(table)} t ON t.id = r.id "
+        f"WHERE " + " AND ".join(conditions)
+    )
+    found = []
+    for row in conn.execute(query, params):
+        distance = haversine_miles(lat, lon, row["latitude"], row["longitude"])
+        if distance <= radius_miles:
+            found.append({**row, "distance_miles": distance})
+    return found
+
+
+def _sort_points(rows: list[dict], table: str, sort: str) -> list[dict]:
+    if sort == "distance":
+        rows.sort(key=lambda row: row["distance_miles"])
+    elif sort == "date":
+        date_column = _POINT_SEARCH[table][0].removesuffix("_ms")
+        rows.sort(key=lambda row: row[date_column] or "", reverse=True)
+    else:
+        raise ValueError(f"Unknown sort {sort!r}; expected 'distance' or 'date'")
+    return rows
+
+
+def get_points_near(db_path: Path, table: str, lat: float, lon: float, radius_miles: float = 0.5,
+                    start: date | datetime | str | None = None,
+                    end: date | datetime | str | None = None,
+                    category: str | None = None, sort: str = "distance") -> list[dict]:
+    """Rows of a point table (crimes, calls_for_service, shotspotter) within
+    ``radius_miles`` of lat/lon, each with ``distance_miles``.
+
+    ``start``/``end`` restrict the date (end exclusive); ``category`` matches
+    nibrs_offense, call_type or event_type. Sorted nearest first, or newest
+    first with ``sort="date"``.
+    """
+    with connection(db_path) as conn:
+        rows = _points_within(conn, table, lat, lon, radius_miles, start, end, category)
+    return _sort_points(rows, table, sort)
+
+
+def get_nearest_points(db_path: Path, table: str, lat: float, lon: float, k: int = 10,
+                       start: date | datetime | str | None = None,
+                       end: date | datetime | str | None = None,
+                       category: str | None = None,
+                       max_radius_miles: float = 25.0) -> list[dict]:
+    """The ``k`` rows of a point table nearest to lat/lon, nearest first.
+
+    Searches a growing radius (doubling from a quarter mile) until it holds
+    ``k`` matches, so the result is exact; gives up with fewer rows beyond
+    ``max_radius_miles``.
+    """
+    radius = 0.25
+    with connection(db_path) as conn:
+        while True:
+            rows = _points_within(conn, table, lat, lon, radius, start, end, category)
+            if len(rows) >= k or radius >= max_radius_miles:
+                break
+            radius = min(radius * 2, max_radius_miles)
+    return _sort_points(rows, table, "distance")[:k]
+
+
+def get_crimes_near_address(db_path: Path, lat: float, lon: float, radius_miles: float = 0.5,
+                            start: date | datetime | str | None = None,
+                            end: date | datetime | str | None = None,
+                            offense: str | None = None, sort: str = "distance") -> list[dict]:
+    """Returns crimes within ``radius_miles`` (great-circle) of lat/lon, with
+    ``distance_miles``; see :func:`get_points_near`."""
+    return get_points_near(db_path, "crimes", lat, lon, radius_miles, start, end, offense, sort)
+
+
+def get_nearest_crimes(db_path: Path, lat: float, lon: float, k: int = 10,
+                       start: date | datetime | str | None = None,
+                       end: date | datetime | str | None = None,
+                       offense: str | None = None) -> list[dict]:
+    """The ``k`` crimes nearest to lat/lon; see :func:`get_nearest_points`."""
+    return get_nearest_points(db_path, "crimes", lat, lon, k, start, end, offense)
 
 
 def compute_severity_score(db_path: Path, district: str | None = None, beat: str | None = None,
                            neighborhood: str | None = None, year: int | None = None) -> float:
-    """Computes weighted severity score: sum of (CRIME_WEIGHTS[offense] * count) for each offense type."""
-    conn = get_connection(db_path)
+    """Computes weighted severity score: sum of (CRIME_WEIGHTS[offense] * count) for each offense type.
+
+    Read from the rollup's ``severity`` (src/rollup.py), which weighs offenses
+    the same way; offenses without a weight count ``DEFAULT_WEIGHT``.
+    """
     conditions: list[str] = []
     params: list = []
 
     if district is not None:
-        conditions.append("district = ?")
+        conditions.append(equals_sql("district"))
         params.append(district)
     if beat is not None:
-        conditions.append("beat = ?")
+        conditions.append(equals_sql("beat"))
         params.append(beat)
     if neighborhood is not None:
-        conditions.append("neighborhood = ?")
+        conditions.append(equals_sql("neighborhood"))
         params.append(neighborhood)
     if year is not None:
         conditions.append("report_year = ?")
         params.append(year)
 
-    query = "SELECT nibrs_offense, COUNT(*) as cnt FROM crimes"
+    query = "SELECT SUM(severity) FROM crime_rollup"
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
-    query += " GROUP BY nibrs_offense"
 
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
+    with connection(db_path) as conn:
+        score = conn.execute(query, params).fetchone()[0]
+    return float(score or 0)
 
-    score = 0.0
-    for row in rows:
-        offense = row[0]
-        count = row[1]
-        weight = CRIME_WEIGHTS.get(offense, DEFAULT_WEIGHT) if offense else DEFAULT_WEIGHT
-        score += weight * count
-    return score
+
+def get_crime_total(db_path: Path, year: int | None = None, district: str | None = None,
+                    beat: str | None = None, neighborhood: str | None = None) -> int:
+    """Returns the number of crimes in an area and/or year, from the rollup."""
+    conditions: list[str] = []
+    params: list = []
+
+    if year is not None:
+        conditions.append("report_year = ?")
+        params.append(year)
+    if district is not None:
+        conditions.append(equals_sql("district"))
+        params.append(district)
+    if beat is not None:
+        conditions.append(equals_sql("beat"))
+        params.append(beat)
+    if neighborhood is not None:
+        conditions.append(equals_sql("neighborhood"))
+        params.append(neighborhood)
+
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    with connection(db_path) as conn:
+        return conn.execute(
+            f"SELECT COALESCE(SUM(crimes), 0) FROM crime_rollup{where}", params
+        ).fetchone()[0]
 
 
 def get_top_crime_types(db_path: Path, limit: int = 10, district: str | None = None,
                         beat: str | None = None, neighborhood: str | None = None) -> list[dict]:
-    """Returns [{type, count}] ordered by count desc."""
-    conn = get_connection(db_path)
+    """Returns [{type, count}] ordered by count desc (ties by type)."""
     conditions: list[str] = []
     params: list = []
 
     if district is not None:
-        conditions.append("district = ?")
+        conditions.append(equals_sql("district"))
         params.append(district)
     if beat is not None:
-        conditions.append("beat = ?")
+        conditions.append(equals_sql("beat"))
         params.append(beat)
     if neighborhood is not None:
-        conditions.append("neighborhood = ?")
+        conditions.append(equals_sql("neighborhood"))
         params.append(neighborhood)
 
-    conditions.append("nibrs_offense IS NOT NULL")
-    query = "SELECT nibrs_offense, COUNT(*) as cnt FROM crimes"
+    conditions.append("nibrs_offense_code IS NOT NULL")
+    query = f"SELECT {value_sql('nibrs_offense')} as type, SUM(crimes) as cnt FROM crime_rollup"
     query += " WHERE " + " AND ".join(conditions)
-    query += " GROUP BY nibrs_offense ORDER BY cnt DESC LIMIT ?"
+    query += " GROUP BY nibrs_offense_code ORDER BY cnt DESC, type LIMIT ?"
     params.append(limit)
 
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
+    with connection(db_path) as conn:
+        rows = conn.execute(query, params).fetchall()
     return [{"type": row[0], "count": row[1]} for row in rows]
 
 
 def get_area_options(db_path: Path, area_type: str) -> list[str]:
     """Returns sorted distinct values for an area column (district, beat, neighborhood, report_year)."""
-    conn = get_connection(db_path)
-    query = f"SELECT DISTINCT {area_type} FROM crimes WHERE {area_type} IS NOT NULL ORDER BY {area_type}"
-    rows = conn.execute(query).fetchall()
-    conn.close()
+    if area_type in DICTIONARY_COLUMNS["crimes"]:
+        # One index probe per dictionary value instead of a scan of crimes
+        query = (
+            f"SELECT value FROM text_codes WHERE field = '{area_type}' "
+            f"AND EXISTS (SELECT 1 FROM crimes WHERE {area_type}_code = code) ORDER BY value"
+        )
+    else:
+        query = (
+            f"SELECT DISTINCT {area_type} FROM crimes WHERE {area_type} IS NOT NULL "
+            f"ORDER BY {area_type}"
+        )
+    with connection(db_path) as conn:
+        rows = conn.execute(query).fetchall()
     return [str(row[0]) for row in rows]
 
 
@@ -152,28 +347,27 @@ def get_yoy_change(db_path: Path, district: str | None = None,
     Skips the current calendar year if it has fewer than 12 months of data,
     so that a partial year (e.g. Jan-Feb 2026) doesn't distort the comparison.
     """
-    conn = get_connection(db_path)
     conditions: list[str] = []
     params: list = []
     if district:
-        conditions.append("district = ?")
+        conditions.append(equals_sql("district"))
         params.append(district)
     if beat:
-        conditions.append("beat = ?")
+        conditions.append(equals_sql("beat"))
         params.append(beat)
     if neighborhood:
-        conditions.append("neighborhood = ?")
+        conditions.append(equals_sql("neighborhood"))
         params.append(neighborhood)
 
     where = " WHERE " + " AND ".join(conditions) if conditions else ""
 
     # Get all years with their counts and month spans
-    rows = conn.execute(
-        f"SELECT report_year, COUNT(*), COUNT(DISTINCT report_month) FROM crimes{where} "
-        f"GROUP BY report_year ORDER BY report_year DESC",
-        params,
-    ).fetchall()
-    conn.close()
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT report_year, SUM(crimes), COUNT(DISTINCT report_month) "
+            f"FROM crime_rollup{where} GROUP BY report_year ORDER BY report_year DESC",
+            params,
+        ).fetchall()
 
     # Filter to years with at least 10 months of data (substantially complete years)
     full_years = [(r[0], r[1]) for r in rows if r[2] >= 10]
@@ -199,54 +393,123 @@ def get_yoy_change(db_path: Path, district: str | None = None,
     }
 
 
-def search_streets(db_path: Path, street_query: str, limit: int = 20) -> list[dict]:
-    """Search for streets matching a query and return crime summary per street."""
-    conn = get_connection(db_path)
-    rows = conn.execute("""
-        SELECT address, COUNT(*) as crime_count,
-               AVG(latitude) as avg_lat, AVG(longitude) as avg_lon,
-               GROUP_CONCAT(DISTINCT nibrs_offense) as crime_types,
-               MIN(report_date) as earliest, MAX(report_date) as latest
-        FROM crimes
-        WHERE address LIKE ?
-        GROUP BY address
-        ORDER BY crime_count DESC
-        LIMIT ?
-    """, (f"%{street_query.upper()}%", limit)).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+def get_time_patterns(db_path: Path) -> list[dict]:
+    """Returns [{report_dow, report_hour, count}] for every day-of-week and
+    hour with crimes."""
+    with connection(db_path) as conn:
+        rows = conn.execute(f"""
+            SELECT {value_sql('report_dow')} as report_dow, report_hour, SUM(crimes) as count
+            FROM crime_hour_rollup
+            WHERE report_dow_code IS NOT NULL AND report_hour IS NOT NULL
+            GROUP BY report_dow_code, report_hour
+        """).fetchall()
+    return [dict(row) for row in rows]
 
 
-def get_street_crime_summary(db_path: Path, street_name: str) -> dict:
-    """Get detailed crime summary for a specific street."""
-    conn = get_connection(db_path)
-    total = conn.execute(
-        "SELECT COUNT(*) FROM crimes WHERE address LIKE ?",
-        (f"%{street_name.upper()}%",),
-    ).fetchone()[0]
-
-    by_type = conn.execute(
-        "SELECT nibrs_offense, COUNT(*) as cnt FROM crimes "
-        "WHERE address LIKE ? GROUP BY nibrs_offense ORDER BY cnt DESC",
-        (f"%{street_name.upper()}%",),
-    ).fetchall()
-
-    by_year = conn.execute(
-        "SELECT report_year, COUNT(*) as cnt FROM crimes "
-        "WHERE address LIKE ? GROUP BY report_year ORDER BY report_year",
-        (f"%{street_name.upper()}%",),
-    ).fetchall()
-
-    recent = conn.execute(
-        "SELECT * FROM crimes WHERE address LIKE ? ORDER BY report_date DESC LIMIT 20",
-        (f"%{street_name.upper()}%",),
-    ).fetchall()
-    conn.close()
-
-    score = sum(
-        CRIME_WEIGHTS.get(r[0], DEFAULT_WEIGHT) * r[1]
-        for r in by_type if r[0]
-    )
+def get_monthly_offense_counts(db_path: Path, years: list[int]) -> list[dict]:
+    """Returns [{report_year, report_month, nibrs_offense, count}] for ``years``,
+    ordered by year and month."""
+    if not years:
+        return []
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT report_year, report_month, {value_sql('nibrs_offense')} as nibrs_offense, "
+            f"SUM(crimes) as count FROM crime_rollup "
+            f"WHERE report_year IN ({','.join('?' * len(years))}) "
+            f"GROUP BY report_year, report_month, nibrs_offense_code "
+            f"ORDER BY report_year, report_month",
+            list(years),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _ms_to_iso(ms: int | None) -> str | None:
+    """ISO 8601 text of an epoch-millisecond value, as stored in ``report_date``."""
+    if ms is None:
+        return None
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def _matched_blocks(text: str) -> tuple[str, tuple]:
+    """SQL selecting the ids of the ``blocks`` whose label contains ``text``
+    (normalized to label form, see :func:`src.streets.normalize_query`), and
+    its parameters.
+
+    Three characters or more are looked up in the trigram index as a quoted
+    phrase (a substring match); shorter text scans the block labels.
+    """
+    text = normalize_query(text)
+    if len(text) >= 3:
+        phrase = '"' + text.replace('"', '""') + '"'
+        return "SELECT rowid FROM block_fts WHERE block_fts MATCH ?", (phrase,)
+    return "SELECT id FROM blocks WHERE instr(label, ?) > 0", (text,)
+
+
+def search_streets(db_path: Path, street_query: str, limit: int = 20) -> list[dict]:
+    """Search for street blocks ("100 N MAIN ST") matching ``street_query``
+    (case-insensitive, spelling of suffixes and directions normalized) and
+    return each one's crime summary, most crimes first."""
+    sql, params = _matched_blocks(street_query)
+    with connection(db_path) as conn:
+        rows = conn.execute(f"""
+            SELECT b.label as address, t.crimes as crime_count,
+                   t.centroid_lat as avg_lat, t.centroid_lon as avg_lon,
+                   t.crime_types, t.first_date_ms, t.last_date_ms
+            FROM block_crime_totals t JOIN blocks b ON b.id = t.block_id
+            WHERE t.block_id IN ({sql})
+            ORDER BY t.crimes DESC, b.label
+            LIMIT ?
+        """, (*params, limit)).fetchall()
+    results = []
+    for row in rows:
+        result = dict(row)
+        result["earliest"] = _ms_to_iso(result.pop("first_date_ms"))
+        result["latest"] = _ms_to_iso(result.pop("last_date_ms"))
+        results.append(result)
+    return results
+
+
+def get_street_crime_summary(db_path: Path, street_name: str, exact: bool = False) -> dict:
+    """Get detailed crime summary for a street, or for the blocks matching
+    ``street_name`` when it starts with a house number ("1200 WAR"), or for
+    the one block of that address with ``exact``. Counts and severity come
+    from the precomputed aggregates (see :mod:`src.streets`)."""
+    with connection(db_path) as conn:
+        if exact:
+            level, ids = "block", [address_keys(street_name)[1]]
+        else:
+            sql, params = _matched_blocks(street_name)
+            if normalize_query(street_name)[:1].isdigit():
+                level, ids_sql = "block", sql
+            else:
+                level, ids_sql = "street", f"SELECT DISTINCT street_id FROM blocks WHERE id IN ({sql})"
+            ids = [row[0] for row in conn.execute(ids_sql, params)]
+        ids = [i for i in ids if i is not None]
+        key = f"{level}_id"
+        marks = ",".join("?" * len(ids))
+        total, score = conn.execute(
+            f"SELECT COALESCE(SUM(crimes), 0), COALESCE(SUM(severity), 0) "
+            f"FROM {level}_crime_totals WHERE {key} IN ({marks})",
+            ids,
+        ).fetchone()
+
+        by_type = conn.execute(
+            f"SELECT nibrs_offense, SUM(crimes) as cnt FROM {level}_crime_stats "
+            f"WHERE {key} IN ({marks}) GROUP BY nibrs_offense ORDER BY cnt DESC",
+            ids,
+        ).fetchall()
+
+        by_year = conn.execute(
+            f"SELECT report_year, SUM(crimes) as cnt FROM {level}_crime_stats "
+            f"WHERE {key} IN ({marks}) GROUP BY report_year ORDER BY report_year",
+            ids,
+        ).fetchall()
+
+        recent = conn.execute(
+            f"SELECT * FROM crimes_decoded WHERE {key} IN ({marks}) "
+            f"ORDER BY report_date_ms DESC LIMIT 20",
+            ids,
+        ).fetchall()
 
     return {
         "total": total,
@@ -259,25 +522,91 @@ def get_street_crime_summary(db_path: Path, street_name: str) -> dict:
 
 def get_recent_crimes(db_path: Path, limit: int = 50,
                        district: str | None = None, beat: str | None = None,
-                       neighborhood: str | None = None) -> list[dict]:
-    """Returns the most recent crimes, optionally filtered by area."""
-    conn = get_connection(db_path)
+                       neighborhood: str | None = None,
+                       start: date | datetime | str | None = None,
+                       end: date | datetime | str | None = None,
+                       year: int | None = None) -> list[dict]:
+    """Returns the most recent crimes, optionally filtered by area, report year
+    and report-date window (``end`` exclusive)."""
     conditions: list[str] = []
     params: list = []
+    if year is not None:
+        conditions.append("report_year = ?")
+        params.append(year)
     if district:
-        conditions.append("district = ?")
+        conditions.append(equals_sql("district"))
         params.append(district)
     if beat:
-        conditions.append("beat = ?")
+        conditions.append(equals_sql("beat"))
         params.append(beat)
     if neighborhood:
-        conditions.append("neighborhood = ?")
+        conditions.append(equals_sql("neighborhood"))
         params.append(neighborhood)
+    _add_date_range(conditions, params, start, end)
 
     where = " WHERE " + " AND ".join(conditions) if conditions else ""
-    rows = conn.execute(
-        f"SELECT * FROM crimes{where} ORDER BY report_date DESC LIMIT ?",
-        params + [limit],
-    ).fetchall()
-    conn.close()
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT * FROM crimes_decoded{where} ORDER BY report_date_ms DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
     return [dict(r) for r in rows]
+
+
+# Table -> (columns listed on the Explore page, recency column)
+_RECORD_COLUMNS = {
+    "crimes": (
+        "offense_id, nibrs_offense, nibrs_description, address, district, beat, "
+        "neighborhood, report_date, latitude, longitude", "report_date_ms",
+    ),
+    "calls_for_service": (
+        "call_id, call_type, priority, disposition, address, district, beat, "
+        "call_date, latitude, longitude", "call_date_ms",
+    ),
+    "shotspotter": (
+        "incident_id, rounds_fired, event_type, address, district, beat, "
+        "event_date, latitude, longitude", "event_date_ms",
+    ),
+}
+
+
+def get_records(db_path: Path, table: str, limit: int = 5000, offense: str | None = None,
+                district: str | None = None) -> list[dict]:
+    """Returns the most recent ``limit`` rows of ``table`` with their display
+    columns; crimes can be filtered by offense and district."""
+    columns, recency = _RECORD_COLUMNS[table]
+    conditions: list[str] = []
+    params: list = []
+    if offense is not None:
+        conditions.append(equals_sql("nibrs_offense"))
+        params.append(offense)
+    if district is not None:
+        conditions.append(equals_sql("district"))
+        params.append(district)
+
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT {columns} FROM {decoded(table)}{where} ORDER BY {recency} DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_boundary_at(db_path: Path, boundary_type: str, lat: float, lon: float) -> str | None:
+    """Name of the ``boundary_type`` boundary containing the point, if any.
+
+    Candidates are narrowed by their stored bounding boxes before the exact
+    point-in-polygon test on the full geometry.
+    """
+    with connection(db_path) as conn:
+        rows = conn.execute(
+            "SELECT name, geometry_geojson FROM boundaries "
+            "WHERE boundary_type = ? AND min_lat <= ? AND max_lat >= ? "
+            "AND min_lon <= ? AND max_lon >= ? ORDER BY area_sq_km",
+            (boundary_type, lat, lat, lon, lon),
+        ).fetchall()
+    for row in rows:
+        if contains(json.loads(row["geometry_geojson"]), lat, lon):
+            return row["name"]
+    return None
@@ -0,0 +1,56 @@
+"""Crime rollups: crime counts and severity per cell of two groupings,
+(year, month, district, beat, neighborhood, offense) in ``crime_rollup`` and
+(day of week, hour) in ``crime_hour_rollup``.
+
+The dashboard and trends numbers are sums over these cells instead of
+GROUP BYs over every crime. One cube keyed by all eight columns would hold
+about one cell per crime, so the hour of day, which no query combines with
+the others, has its own rollup. Cells keep the crimes column names, codes
+and NULLs, so a crimes query is answered from a rollup by reading it in
+place of crimes with ``SUM(crimes)`` for ``COUNT(*)``; ``severity`` sums the
+cell's ``CRIME_WEIGHTS`` weights (``DEFAULT_WEIGHT`` for an unknown or
+missing offense), as :func:`src.queries.compute_severity_score` weighs them.
+Triggers on crimes (``database._create_rollup_triggers``) add and subtract
+each inserted, changed or deleted row; cells that reach zero are deleted.
+"""
+import sqlite3
+
+from src.config import CRIME_WEIGHTS, DEFAULT_WEIGHT
+from src.dictionary import value_sql
+
+# Rollup table -> the crimes columns its cells are keyed by
+ROLLUPS = {
+    "crime_rollup": (
+        "report_year", "report_month", "district_code", "beat_code", "neighborhood_code",
+        "nibrs_offense_code",
+    ),
+    "crime_hour_rollup": ("report_dow_code", "report_hour"),
+}
+
+
+def _literal(value) -> str:
+    return "'" + value.replace("'", "''") + "'" if isinstance(value, str) else repr(value)
+
+
+def weight_sql(code: str = "nibrs_offense_code") -> str:
+    """SQL for the ``CRIME_WEIGHTS`` weight of the offense code ``code``.
+
+    Weights are literals rather than parameters so the SQL can go into a
+    trigger; a change to ``CRIME_WEIGHTS`` changes the trigger text, which is
+    how ``init_db()`` notices the rollup must be rebuilt.
+    """
+    cases = " ".join(
+        f"WHEN {_literal(offense)} THEN {_literal(weight)}"
+        for offense, weight in CRIME_WEIGHTS.items()
+    )
+    return f"CASE {value_sql('nibrs_offense', code)} {cases} ELSE {_literal(DEFAULT_WEIGHT)} END"
+
+
+def rebuild_rollup(conn: sqlite3.Connection, rollup: str) -> None:
+    """Recompute every cell of ``rollup`` from crimes; the caller commits."""
+    dimensions = ", ".join(ROLLUPS[rollup])
+    conn.execute(f"DELETE FROM {rollup}")
+    conn.execute(
+        f"INSERT INTO {rollup} ({dimensions}, crimes, severity) "
+        f"SELECT {dimensions}, COUNT(*), SUM({weight_sql()}) FROM crimes GROUP BY {dimensions}"
+    )
@@ -0,0 +1,55 @@
+import logging
+import threading
+import time
+from pathlib import Path
+
+from src.config import LOCK_RETRY_SECONDS, SYNC_INTERVALS
+from src.database import LockHeld, init_db
+from src.sync import SYNC_FUNCTIONS, reconcile_deletions
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(db_path: Path, job: str, incremental: bool = True):
+    """Run one scheduled job: a source sync or the ``reconcile`` deletion pass."""
+    if job == "reconcile":
+        return reconcile_deletions(db_path)
+    if job == "boundaries":
+        return SYNC_FUNCTIONS[job](db_path)
+    return SYNC_FUNCTIONS[job](db_path, incremental=incremental)
+
+
+def run_daemon(
+    db_path: Path,
+    intervals: dict[str, float] | None = None,
+    stop: threading.Event | None = None,
+    incremental: bool = True,
+) -> None:
+    """Run each job on its own interval until ``stop`` is set.
+
+    Every job is due immediately at startup, then ``intervals[job]`` seconds
+    after it last ran (default ``SYNC_INTERVALS``). Jobs run one at a time; if
+    another process holds the sync lock the job is retried after
+    ``LOCK_RETRY_SECONDS``, and a failed job is logged and rescheduled.
+    """
+    intervals = intervals or SYNC_INTERVALS
+    stop = stop or threading.Event()
+    init_db(db_path)
+    due = dict.fromkeys(intervals, time.monotonic())
+    logger.info("Scheduler started: %s", intervals)
+    while not stop.is_set():
+        job = min(due, key=due.get)
+        if stop.wait(max(0.0, due[job] - time.monotonic())):
+            break
+        try:
+            result = run_job(db_path, job, incremental)
+        except LockHeld as exc:
+            logger.info("Skipping %s: %s", job, exc)
+            due[job] = time.monotonic() + LOCK_RETRY_SECONDS
+            continue
+        except Exception:
+            logger.exception("Scheduled %s failed", job)
+        else:
+            logger.info("Scheduled %s finished: %s", job, result)
+        due[job] = time.monotonic() + intervals[job]
+    logger.info("Scheduler stopped")
@@ -0,0 +1,234 @@
+"""Street and block dimension parsed from free-text addresses, and the
+per-block / per-street crime aggregates built on it.
+
+``"100 BLK N MAIN ST PEORIA"``, ``"150 n main street"`` and ``"199 N Main St"``
+all parse to block 100 of street ``N MAIN ST``. Keys are 64-bit hashes of the
+normalized labels, so rows are keyed while they are mapped (no lookup) and
+the same address gets the same key in every table.
+"""
+import hashlib
+import re
+import sqlite3
+from functools import lru_cache
+from typing import NamedTuple
+
+from src.config import CRIME_WEIGHTS, DEFAULT_WEIGHT
+from src.dictionary import value_sql
+
+_SUFFIXES = {
+    "ST": "ST", "STREET": "ST", "AVE": "AVE", "AV": "AVE", "AVENUE": "AVE",
+    "DR": "DR", "DRIVE": "DR", "RD": "RD", "ROAD": "RD", "BLVD": "BLVD",
+    "BOULEVARD": "BLVD", "LN": "LN", "LANE": "LN", "CT": "CT", "COURT": "CT",
+    "PL": "PL", "PLACE": "PL", "PKWY": "PKWY", "PARKWAY": "PKWY", "HWY": "HWY",
+    "HIGHWAY": "HWY", "WAY": "WAY", "TER": "TER", "TERRACE": "TER", "CIR": "CIR",
+    "CIRCLE": "CIR", "TRL": "TRL", "TRAIL": "TRL", "PLZ": "PLZ", "PLAZA": "PLZ",
+}
+_DIRECTIONS = {
+    "N": "N", "NORTH": "N", "S": "S", "SOUTH": "S", "E": "E", "EAST": "E",
+    "W": "W", "WEST": "W", "NE": "NE", "NW": "NW", "SE": "SE", "SW": "SW",
+}
+_BLOCK_WORDS = {"BLK", "BLOCK", "OF"}
+_HOUSE_NUMBER = re.compile(r"^(\d+)(?:-\d+)?[A-Z]?$")
+# Intersections ("MAIN ST / ADAMS ST") are filed under their first street
+_INTERSECTION = re.compile(r"\s*(?:/|&|\bAND\b|\bAT\b)\s*")
+
+
+class Address(NamedTuple):
+    block: int | None  # hundred block (150 -> 100); None without a house number
+    name: str  # "N MAIN"
+    suffix: str  # "ST", or "" if none was recognised
+
+    @property
+    def street(self) -> str:
+        return f"{self.name} {self.suffix}".rstrip()
+
+    @property
+    def label(self) -> str:
+        return self.street if self.block is None else f"{self.block} {self.street}"
+
+
+def _tokens(text: str) -> list[str]:
+    text = _INTERSECTION.split(text.upper(), maxsplit=1)[0]
+    return re.sub(r"[.,#;]", " ", text).split()
+
+
+@lru_cache(maxsize=65536)
+def parse_address(text: str | None) -> Address | None:
+    """Hundred block, street name and suffix of a free-text address.
+
+    Words after the suffix (city, state, unit) are dropped, "BLK"/"BLOCK OF"
+    markers ignored and suffixes and directions spelled out are abbreviated.
+    None for an address with no street name.
+    """
+    tokens = _tokens(text or "")
+    block = None
+    if tokens and (number := _HOUSE_NUMBER.match(tokens[0])):
+        block = int(number.group(1)) // 100 * 100
+        tokens = tokens[1:]
+    while tokens and tokens[0] in _BLOCK_WORDS:
+        tokens = tokens[1:]
+    if tokens:
+        tokens[0] = _DIRECTIONS.get(tokens[0], tokens[0])
+    suffix = ""
+    for i, token in enumerate(tokens[1:], 1):
+        if token in _SUFFIXES:
+            tokens, suffix = tokens[:i], _SUFFIXES[token]
+            break
+    if not tokens:
+        return None
+    return Address(block, " ".join(tokens), suffix)
+
+
+def normalize_query(text: str) -> str:
+    """Street-search text in label form: ``"150 blk north main street"`` ->
+    ``"100 N MAIN ST"``. Unlike :func:`parse_address` nothing is dropped, so
+    a partial name still matches as a substring."""
+    tokens = [token for token in _tokens(text) if token not in _BLOCK_WORDS]
+    if tokens and (number := _HOUSE_NUMBER.match(tokens[0])):
+        tokens[0] = str(int(number.group(1)) // 100 * 100)
+    return " ".join(
+        _SUFFIXES.get(token, _DIRECTIONS.get(token, token)) if i else _DIRECTIONS.get(token, token)
+        for i, token in enumerate(tokens)
+    )
+
+
+def label_key(label: str) -> int:
+    """Signed 64-bit key of a street or block label."""
+    digest = hashlib.blake2b(label.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# street_id of a row whose address can't be parsed (its block_id stays
+# NULL), so refresh_streets() doesn't parse it again on every run
+UNPARSED = 0
+
+
+@lru_cache(maxsize=65536)
+def address_keys(text: str | None) -> tuple[int | None, int | None]:
+    """``(street_id, block_id)`` of a raw address: ``(None, None)`` without an
+    address, ``(UNPARSED, None)`` if it can't be parsed."""
+    if text is None:
+        return None, None
+    address = parse_address(text)
+    if address is None:
+        return UNPARSED, None
+    return label_key(address.street), label_key(address.label)
+
+
+def key_rows(conn: sqlite3.Connection, table: str) -> None:
+    """Key rows written without street/block ids (direct inserts, rows stored
+    before the columns existed). Unparseable addresses are marked
+    ``UNPARSED`` and skipped from then on."""
+    rows = conn.execute(
+        f"SELECT id, address FROM {table} WHERE block_id IS NULL AND address IS NOT NULL "
+        f"AND street_id IS NOT ?",
+        (UNPARSED,),
+    ).fetchall()
+    conn.executemany(
+        f"UPDATE {table} SET street_id = ?, block_id = ? WHERE id = ?",
+        [(*address_keys(address), row_id) for row_id, address in rows],
+    )
+
+
+def _add_dimensions(conn: sqlite3.Connection, tables: tuple[str, ...]) -> None:
+    """Add the ``streets``/``blocks`` rows for queued blocks not yet in them."""
+    new = "SELECT block_id FROM street_changes WHERE block_id NOT IN (SELECT id FROM blocks)"
+    addresses = {
+        address
+        for table in tables
+        for (address,) in conn.execute(
+            f"SELECT DISTINCT address FROM {table} WHERE block_id IN ({new})"
+        )
+    }
+    parsed = {a for a in map(parse_address, addresses) if a is not None}
+    conn.executemany(
+        "INSERT OR IGNORE INTO streets (id, name, suffix, label) VALUES (?, ?, ?, ?)",
+        [(label_key(a.street), a.name, a.suffix, a.street) for a in parsed],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO blocks (id, street_id, block, label) VALUES (?, ?, ?, ?)",
+        [(label_key(a.label), label_key(a.street), a.block, a.label) for a in parsed],
+    )
+
+
+_STATS_COLUMNS = (
+    "report_year, nibrs_offense, crimes, first_date_ms, last_date_ms, lat_sum, lon_sum, located"
+)
+
+
+def _severity_sql() -> tuple[str, list]:
+    """SQL weighting ``crimes`` by ``CRIME_WEIGHTS[nibrs_offense]``, and its
+    parameters; rows without an offense weigh nothing."""
+    cases = " ".join("WHEN ? THEN ?" for _ in CRIME_WEIGHTS)
+    params = [value for item in CRIME_WEIGHTS.items() for value in item]
+    return (
+        f"crimes * CASE WHEN nibrs_offense IS NULL THEN 0 "
+        f"ELSE CASE nibrs_offense {cases} ELSE ? END END",
+        params + [DEFAULT_WEIGHT],
+    )
+
+
+def _write_totals(conn: sqlite3.Connection, level: str, ids: list[int]) -> None:
+    """Rebuild ``{level}_crime_totals`` for ``ids`` from ``{level}_crime_stats``,
+    weighting severity with the current ``CRIME_WEIGHTS``."""
+    marks = ",".join("?" * len(ids))
+    severity, weights = _severity_sql()
+    conn.execute(f"DELETE FROM {level}_crime_totals WHERE {level}_id IN ({marks})", ids)
+    conn.execute(
+        f"INSERT INTO {level}_crime_totals ({level}_id, crimes, severity, first_date_ms, "
+        f"last_date_ms, centroid_lat, centroid_lon, crime_types) "
+        f"SELECT {level}_id, SUM(crimes), SUM({severity}), MIN(first_date_ms), "
+        f"MAX(last_date_ms), SUM(lat_sum) / NULLIF(SUM(located), 0), "
+        f"SUM(lon_sum) / NULLIF(SUM(located), 0), GROUP_CONCAT(DISTINCT nibrs_offense) "
+        f"FROM {level}_crime_stats WHERE {level}_id IN ({marks}) GROUP BY {level}_id",
+        weights + ids,
+    )
+
+
+def refresh_streets(conn: sqlite3.Connection,
+                    tables: tuple[str, ...] = ("crimes", "calls_for_service", "shotspotter")) -> int:
+    """Bring the street dimension and crime aggregates up to date.
+
+    Keys unkeyed rows, adds dimension rows for new blocks, and recomputes
+    the per-block and per-street aggregates of every block queued in
+    ``street_changes`` (by the triggers on the point tables) and of the
+    streets they belong to. Returns the number of blocks refreshed; the
+    caller commits.
+    """
+    for table in tables:
+        key_rows(conn, table)
+    blocks = [row[0] for row in conn.execute("SELECT block_id FROM street_changes")]
+    if not blocks:
+        return 0
+    _add_dimensions(conn, tables)
+    for start in range(0, len(blocks), 500):
+        batch = blocks[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        conn.execute(f"DELETE FROM block_crime_stats WHERE block_id IN ({marks})", batch)
+        conn.execute(
+            f"INSERT INTO block_crime_stats (block_id, {_STATS_COLUMNS}) "
+            f"SELECT block_id, report_year, {value_sql('nibrs_offense')}, COUNT(*), "
+            f"MIN(report_date_ms), MAX(report_date_ms), SUM(latitude), SUM(longitude), "
+            f"COUNT(latitude) FROM crimes WHERE block_id IN ({marks}) "
+            f"GROUP BY block_id, report_year, nibrs_offense_code",
+            batch,
+        )
+        _write_totals(conn, "block", batch)
+    streets = [row[0] for row in conn.execute(
+        "SELECT DISTINCT street_id FROM blocks WHERE id IN (SELECT block_id FROM street_changes)"
+    )]
+    for start in range(0, len(streets), 500):
+        batch = streets[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        conn.execute(f"DELETE FROM street_crime_stats WHERE street_id IN ({marks})", batch)
+        conn.execute(
+            f"INSERT INTO street_crime_stats (street_id, {_STATS_COLUMNS}) "
+            f"SELECT b.street_id, s.report_year, s.nibrs_offense, SUM(s.crimes), "
+            f"MIN(s.first_date_ms), MAX(s.last_date_ms), SUM(s.lat_sum), SUM(s.lon_sum), "
+            f"SUM(s.located) FROM block_crime_stats s JOIN blocks b ON b.id = s.block_id "
+            f"WHERE b.street_id IN ({marks}) GROUP BY b.street_id, s.report_year, s.nibrs_offense",
+            batch,
+        )
+        _write_totals(conn, "street", batch)
+    conn.execute("DELETE FROM street_changes")
+    return len(blocks)
@@ -1,47 +1,204 @@
+import argparse
+import hashlib
 import json
 import logging
-import requests
-from datetime import datetime, timezone
+import math
+import queue
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from src.config import ENDPOINTS, PAGE_SIZE
-from src.database import get_connection, init_db
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from src.archive import PageArchive
+from src.config import (
+    ARCHIVE_DIR,
+    ARCHIVE_MAX_INCREMENTAL_RUNS,
+    BACKFILL_START,
+    ENDPOINTS,
+    FETCH_WORKERS,
+    FIELD_MAPPINGS,
+    GEOMETRY_PRECISION,
+    INSERT_BATCH_SIZE,
+    LAYER_PAGE_SIZES,
+    NATURAL_KEYS,
+    PROGRESS_INTERVAL,
+    RECONCILE_MAX_DELETE_FRACTION,
+    PAGE_SIZE,
+    SYNC_OVERLAP_HOURS,
+    TRACE_MEMORY,
+    WATERMARK_FIELDS,
+    WRITE_QUEUE_SIZE,
+)
+from src.database import (
+    STREET_TABLES,
+    advisory_lock,
+    bulk_load_settings,
+    create_indexes,
+    drop_indexes,
+    get_connection,
+    init_db,
+    lock_holder,
+)
+from src.dictionary import DICTIONARY_COLUMNS, encode_rows
+from src.geometry import BOUNDARY_COLUMNS, boundary_columns
+from src.http_client import get_json, get_stats, last_request, reset_stats
+from src.streets import address_keys, refresh_streets
 
 logger = logging.getLogger(__name__)
 
 
+class FeaturePage(list):
+    """A list of features plus the stats of the request(s) that fetched it."""
+
+    def __init__(
+        self, features: Iterable = (), latency: float = 0.0, nbytes: int = 0,
+        decode_seconds: float = 0.0,
+    ):
+        super().__init__(features)
+        self.latency = latency
+        self.nbytes = nbytes
+        self.decode_seconds = decode_seconds
+
+
 def fetch_arcgis_page(
-    url: str, offset: int = 0, where: str = "1=1"
+    url: str,
+    offset: int = 0,
+    where: str = "1=1",
+    out_fields: str = "*",
+    page_size: int = PAGE_SIZE,
+    return_geometry: bool = True,
 ) -> tuple[list, bool]:
-    """Fetch one page from an ArcGIS REST API query endpoint."""
+    """Fetch one page from an ArcGIS REST API query endpoint.
+
+    ``out_fields`` limits the attributes returned (comma-separated names).
+    Coordinates are rounded to ``GEOMETRY_PRECISION`` decimals server-side, or
+    omitted entirely when ``return_geometry`` is false.
+    """
     params = {
         "where": where,
-        "outFields": "*",
+        "outFields": out_fields,
         "outSR": 4326,
         "f": "json",
-        "resultRecordCount": PAGE_SIZE,
+        "resultRecordCount": page_size,
         "resultOffset": offset,
     }
-    resp = requests.get(f"{url}/query", params=params, timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
-    features = data.get("features", [])
+    if return_geometry:
+        params["geometryPrecision"] = GEOMETRY_PRECISION
+    else:
+        params["returnGeometry"] = "false"
+    data = get_json(f"{url}/query", params)
+    features = FeaturePage(data.get("features", []), **last_request())
     # ArcGIS signals more data via exceededTransferLimit
     has_more = data.get("exceededTransferLimit", False)
     return features, has_more
 
 
-def fetch_all_records(url: str, where: str = "1=1") -> list:
-    """Paginate through all pages of an ArcGIS feature layer."""
-    all_features: list = []
+def iter_pages(url: str, where: str = "1=1", **query) -> Iterator[list]:
+    """Yield each page of features from an ArcGIS layer as it arrives.
+
+    ``query`` is passed through to :func:`fetch_arcgis_page`.
+    """
     offset = 0
     while True:
-        features, has_more = fetch_arcgis_page(url, offset, where)
-        all_features.extend(features)
+        features, has_more = fetch_arcgis_page(url, offset, where, **query)
+        if features:
+            yield features
         if not has_more or len(features) == 0:
             break
         offset += len(features)
-    return all_features
+
+
+def fetch_all_records(url: str, where: str = "1=1", **query) -> FeaturePage:
+    """Paginate through all pages of an ArcGIS feature layer.
+
+    The result's request stats are summed over the pages.
+    """
+    records = FeaturePage()
+    for page in iter_pages(url, where, **query):
+        records.extend(page)
+        records.latency += getattr(page, "latency", 0.0)
+        records.nbytes += getattr(page, "nbytes", 0)
+        records.decode_seconds += getattr(page, "decode_seconds", 0.0)
+    return records
+
+
+def fetch_layer_info(url: str) -> dict:
+    """Return the layer's metadata (``fields``, ``maxRecordCount``, ...)."""
+    return get_json(url, {"f": "json"})
+
+
+def fetch_object_ids(url: str, where: str = "1=1") -> tuple[str, list[int]]:
+    """Return the layer's OBJECTID field name and the sorted IDs matching ``where``.
+
+    ``returnIdsOnly`` is not subject to the layer's max record count, so the
+    whole ID list arrives in one request.
+    """
+    params = {"where": where, "returnIdsOnly": "true", "f": "json"}
+    data = get_json(f"{url}/query", params)
+    return data.get("objectIdFieldName", "OBJECTID"), sorted(data.get("objectIds") or [])
+
+
+def _oid_chunk_wheres(
+    where: str, oid_field: str, ids: list[int], chunk_size: int
+) -> list[str]:
+    """Split sorted IDs into contiguous OBJECTID ranges, one where clause each."""
+    return [
+        f"({where}) AND {oid_field} >= {ids[i]} AND "
+        f"{oid_field} <= {ids[min(i + chunk_size, len(ids)) - 1]}"
+        for i in range(0, len(ids), chunk_size)
+    ]
+
+
+def iter_pages_parallel(
+    url: str,
+    where: str = "1=1",
+    workers: int = FETCH_WORKERS,
+    chunk_size: int | None = None,
+    **query,
+) -> Iterator[list]:
+    """Yield pages of features fetched concurrently by OBJECTID range.
+
+    The ID list is fetched first and split into ``chunk_size`` ranges
+    (default: the page size) that a pool of ``workers`` threads downloads in
+    parallel. At most ``2 * workers`` chunks are in flight, so memory stays
+    bounded while the caller (the single writer) consumes pages in completion
+    order. ``query`` is passed through to :func:`fetch_arcgis_page`.
+    """
+    oid_field, ids = fetch_object_ids(url, where)
+    chunk_size = chunk_size or query.get("page_size", PAGE_SIZE)
+    chunks = iter(_oid_chunk_wheres(where, oid_field, ids, chunk_size))
+    fetch = partial(fetch_all_records, url, **query)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {
+            pool.submit(fetch, chunk_where)
+            for chunk_where in islice(chunks, 2 * workers)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for chunk_where in islice(chunks, 1):
+                    pending.add(pool.submit(fetch, chunk_where))
+                features = future.result()
+                if features:
+                    yield features
 
 
 def _ts_to_iso(ms_timestamp: int | None) -> str | None:
@@ -52,6 +209,30 @@ def _ts_to_iso(ms_timestamp: int | None) -> str | None:
     return dt.isoformat()
 
 
+def _ts_to_iso_many(ms_timestamps: list) -> list[str | None]:
+    """:func:`_ts_to_iso` for a whole page of timestamps at once.
+
+    Formats with numpy's ``datetime64`` instead of building a ``datetime`` per
+    value; output is identical, including the microsecond part for
+    timestamps that aren't whole seconds.
+    """
+    ms = np.array([np.nan if v is None else v for v in ms_timestamps], dtype="float64")
+    missing = np.isnan(ms)
+    if missing.all():
+        return [None] * len(ms_timestamps)
+    stamps = np.where(missing, 0, ms).astype("int64").astype("datetime64[ms]")
+    iso = np.where(
+        ms % 1000 == 0,
+        np.datetime_as_string(stamps, unit="s"),
+        np.datetime_as_string(stamps, unit="us"),
+    )
+    out = np.char.add(iso, "+00:00").tolist()
+    if missing.any():
+        for i in np.flatnonzero(missing).tolist():
+            out[i] = None
+    return out
+
+
 def _get_attr(attributes: dict, *keys: str):
     """Try multiple key variants and return the first match, or None."""
     for key in keys:
@@ -60,203 +241,1242 @@ def _get_attr(attributes: dict, *keys: str):
     return None
 
 
-def sync_crimes(db_path: Path) -> int:
-    """Fetch all crime records and insert into the crimes table."""
-    url = ENDPOINTS["crimes"]
-    features = fetch_all_records(url)
+def get_watermark(db_path: Path, table: str) -> int | None:
+    """Return the stored high-watermark (ms timestamp) for a table, if any."""
     conn = get_connection(db_path)
-    for feat in features:
-        attrs = feat.get("attributes", {})
-        geom = feat.get("geometry", {})
-        conn.execute(
-            """INSERT OR IGNORE INTO crimes (
-                offense_id, call_id, statute, nibrs_code, nibrs_offense,
-                nibrs_description, crime_against, attempt_completed,
-                address, city, state, zip, beat, district, neighborhood,
-                weapon_category, weapon_description, report_date,
-                report_year, report_month, report_hour, report_dow,
-                latitude, longitude
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-            (
-                attrs.get("offenseid"),
-                attrs.get("callid"),
-                attrs.get("statute"),
-                attrs.get("nibrscode"),
-                attrs.get("nibrsoffense"),
-                attrs.get("nibrsdesc"),
-                attrs.get("nibrscrimeag"),
-                attrs.get("attemptcompleted"),
-                attrs.get("fulladdr"),
-                attrs.get("city"),
-                attrs.get("state"),
-                attrs.get("zip5"),
-                attrs.get("beat"),
-                attrs.get("district"),
-                attrs.get("neighborhood"),
-                attrs.get("weaponcat"),
-                attrs.get("weapondesc"),
-                _ts_to_iso(attrs.get("reportdate")),
-                attrs.get("reportyear"),
-                attrs.get("reportmonth"),
-                attrs.get("reporthour"),
-                attrs.get("reportdow"),
-                geom.get("y"),
-                geom.get("x"),
-            ),
-        )
-    conn.commit()
-    count = conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0]
+    row = conn.execute(
+        "SELECT watermark FROM sync_state WHERE table_name = ?", (table,)
+    ).fetchone()
     conn.close()
-    _log_sync(db_path, "peoria_pd_arcgis", "crimes", count)
-    logger.info("Synced %d crime records", count)
-    return count
+    return row[0] if row else None
 
 
-def sync_calls_for_service(db_path: Path) -> int:
-    """Fetch all calls-for-service records and insert into the table."""
-    url = ENDPOINTS["calls_for_service"]
-    features = fetch_all_records(url)
-    conn = get_connection(db_path)
-    for feat in features:
-        attrs = feat.get("attributes", {})
-        geom = feat.get("geometry", {})
-        conn.execute(
-            """INSERT OR IGNORE INTO calls_for_service (
-                call_id, call_type, priority, disposition,
-                address, beat, district, call_date,
-                latitude, longitude
-            ) VALUES (?,?,?,?,?,?,?,?,?,?)""",
-            (
-                _get_attr(attrs, "callid", "CallID", "CALLID", "call_id"),
-                _get_attr(attrs, "calltype", "CallType", "CALLTYPE", "call_type"),
-                _get_attr(attrs, "priority", "Priority", "PRIORITY"),
-                _get_attr(attrs, "disposition", "Disposition", "DISPOSITION"),
-                _get_attr(attrs, "fulladdr", "FullAddr", "FULLADDR", "address"),
-                _get_attr(attrs, "beat", "Beat", "BEAT"),
-                _get_attr(attrs, "district", "District", "DISTRICT"),
-                _ts_to_iso(
-                    _get_attr(attrs, "calldate", "CallDate", "CALLDATE", "call_date")
-                ),
-                geom.get("y") if geom else None,
-                geom.get("x") if geom else None,
-            ),
+def _set_watermark(conn, table: str, watermark: int | None) -> None:
+    """Advance a table's watermark; never moves it backwards."""
+    if watermark is None:
+        return
+    conn.execute(
+        """INSERT INTO sync_state (table_name, watermark, updated_at)
+           VALUES (?, ?, datetime('now'))
+           ON CONFLICT(table_name) DO UPDATE SET
+               watermark = MAX(watermark, excluded.watermark),
+               updated_at = excluded.updated_at""",
+        (table, watermark),
+    )
+
+
+def _incremental_where(
+    db_path: Path, table: str, overlap_hours: float = SYNC_OVERLAP_HOURS
+) -> str:
+    """Build an ArcGIS where clause selecting rows newer than the watermark.
+
+    The watermark is pulled back by ``overlap_hours`` so records that were
+    edited or back-dated upstream since the last run are fetched again.
+    Falls back to ``1=1`` when the table has never been synced.
+    """
+    watermark = get_watermark(db_path, table)
+    if watermark is None:
+        return "1=1"
+    since = datetime.fromtimestamp(watermark / 1000, tz=timezone.utc)
+    since -= timedelta(hours=overlap_hours)
+    return f"{WATERMARK_FIELDS[table]} >= {_arcgis_timestamp(since)}"
+
+
+def _arcgis_timestamp(dt: datetime) -> str:
+    """ArcGIS SQL timestamp literal for ``dt`` (taken as UTC)."""
+    return f"TIMESTAMP '{dt.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+
+def _max_ts(current: int | None, value) -> int | None:
+    """Running maximum over possibly-missing ms timestamps."""
+    if value is None:
+        return current
+    return value if current is None else max(current, value)
+
+
+def _max_rss_kb() -> int | None:
+    """The process's peak RSS so far (KB), or None where it isn't available."""
+    if resource is None:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS
+
+
+@contextmanager
+def _peak_memory() -> Iterator[Callable[[], int | None]]:
+    """Measure the enclosed run; yields a function returning its peak so far (KB).
+
+    With ``TRACE_MEMORY`` (or when tracemalloc is already tracing) that is the
+    exact Python heap peak since the block started. Tracing slows
+    allocation-heavy code several-fold, so by default it is how far the block
+    has raised the process's peak RSS: the run's own growth when it sets a new
+    peak, 0 when a long-lived process already peaked higher in an earlier run.
+    """
+    if TRACE_MEMORY or tracemalloc.is_tracing():
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield lambda: tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            if started:
+                tracemalloc.stop()
+    else:
+        baseline = _max_rss_kb()
+        yield lambda: None if baseline is None else _max_rss_kb() - baseline
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    """Yield successive lists of up to ``size`` items."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+# A producer fetches and transforms one source, yielding ``(write, rows,
+# page)`` batches for the writer, which calls ``write(conn, rows)`` (returning
+# the rows written); it fills in ``state`` (e.g. the new watermark) once
+# exhausted. ``page`` is None except on the last batch of each fetched page,
+# where it carries that page's telemetry (see _page_stats).
+Writer = Callable[[sqlite3.Connection, list[tuple]], int]
+Batch = tuple[Writer, list[tuple], dict | None]
+Producer = Callable[[dict], Iterator[Batch]]
+
+
+# Converter names usable in FIELD_MAPPINGS; each converts a page's worth of
+# values (a list) at once.
+_CONVERTERS: dict[str, Callable[[list], list]] = {"timestamp": _ts_to_iso_many}
+
+
+def _resolve_field(candidates: tuple, available: list[str], lowered: dict) -> str | None:
+    """Pick the first candidate present in the layer, exactly or ignoring case."""
+    for name in candidates:
+        if name in available:
+            return name
+    for name in candidates:
+        if name.lower() in lowered:
+            return lowered[name.lower()]
+    return None
+
+
+class FieldMapper:
+    """A table's ``FIELD_MAPPINGS`` resolved against one layer's actual fields.
+
+    Built once per sync, so each row is extracted with a single
+    ``itemgetter`` call rather than probing key spellings per column. Columns
+    with no matching field are left out of ``insert_sql`` (and so stay NULL).
+    ``source_fields`` and ``has_geometry`` describe what the layer query must
+    return. Rows carry the text of dictionary-encoded columns;
+    :meth:`write` encodes them for ``insert_sql``.
+    """
+
+    def __init__(self, table: str, field_names: Iterable[str]):
+        available = list(field_names)
+        lowered = {name.lower(): name for name in available}
+        plain_columns, plain_keys = [], []
+        converted_columns, converted = [], []
+        geom_columns, geom_keys = [], []
+        self.ts_key = None
+        for column, candidates, converter in FIELD_MAPPINGS[table]:
+            geom_key = next(
+                (c.split(".", 1)[1] for c in candidates if c.startswith("geometry.")), None
+            )
+            if geom_key:
+                geom_columns.append(column)
+                geom_keys.append(geom_key)
+                continue
+            key = _resolve_field(candidates, available, lowered)
+            if key is None:
+                logger.warning("%s.%s: no field among %s", table, column, candidates)
+            elif converter:
+                converted_columns.append(column)
+                converted.append((key, _CONVERTERS[converter]))
+                if converter == "timestamp" and self.ts_key is None:
+                    self.ts_key = key
+            else:
+                plain_columns.append(column)
+                plain_keys.append(key)
+
+        # Row layout is plain attributes, then converted ones, then geometry,
+        # then the street/block keys of the address (if mapped), then the
+        # content hash; the generated upsert lists columns in the same order.
+        self.columns = plain_columns + converted_columns + geom_columns
+        self._address = self.columns.index("address") if "address" in self.columns else None
+        if self._address is not None:
+            self.columns += ["street_id", "block_id"]
+        encoded = DICTIONARY_COLUMNS.get(table, ())
+        self._encoded = {i: c for i, c in enumerate(self.columns) if c in encoded}
+        stored = [f"{c}_code" if c in encoded else c for c in self.columns]
+        key = NATURAL_KEYS[table]
+        updates = "".join(
+            f"{column} = excluded.{column}, " for column in stored if column != key
         )
-    conn.commit()
-    count = conn.execute("SELECT COUNT(*) FROM calls_for_service").fetchone()[0]
-    conn.close()
-    _log_sync(db_path, "peoria_pd_arcgis", "calls_for_service", count)
-    logger.info("Synced %d calls-for-service records", count)
-    return count
+        self.insert_sql = (
+            f"INSERT INTO {table} ({', '.join(stored)}, row_hash) "
+            f"VALUES ({','.join('?' * (len(self.columns) + 1))}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {updates}"
+            f"row_hash = excluded.row_hash, synced_at = datetime('now') "
+            f"WHERE {table}.row_hash IS NOT excluded.row_hash"
+        )
+        # A field can feed two columns (e.g. report_date and report_date_ms)
+        self.source_fields = list(dict.fromkeys(plain_keys + [key for key, _ in converted]))
+        self.has_geometry = bool(geom_keys)
+        self._plain_keys = plain_keys
+        self._plain = _tuple_getter(plain_keys)
+        self._converted = converted
+        self._geom = _tuple_getter(geom_keys)
+        self._no_point = (None,) * len(geom_keys)
 
+    def row(self, attrs: dict, geom: dict) -> tuple:
+        return self.rows([{"attributes": attrs, "geometry": geom}])[0]
 
-def sync_shotspotter(db_path: Path) -> int:
-    """Fetch all ShotSpotter records and insert into the table."""
-    url = ENDPOINTS["shotspotter"]
-    features = fetch_all_records(url)
-    conn = get_connection(db_path)
+    def rows(self, features: list) -> list[tuple]:
+        """Map a page of features; converted columns are converted per page."""
+        attrs = [f.get("attributes") or {} for f in features]
+        plain, plain_keys = self._plain, self._plain_keys
+        values = []
+        for a in attrs:
+            try:
+                values.append(plain(a))
+            except KeyError:
+                values.append(tuple(a.get(k) for k in plain_keys))
+        if self._converted:
+            columns = [convert([a.get(key) for a in attrs]) for key, convert in self._converted]
+            values = [v + c for v, c in zip(values, zip(*columns))]
+        geom, no_point, address = self._geom, self._no_point, self._address
+        rows = []
+        for v, f in zip(values, features):
+            try:
+                v += geom(f.get("geometry") or {})
+            except KeyError:
+                v += no_point
+            # The keys are derived from the address, so the hash leaves them out
+            row_hash = _row_hash(v)
+            if address is not None:
+                v += address_keys(v[address])
+            rows.append(v + (row_hash,))
+        return rows
+
+    def write(self, conn, rows: list[tuple]) -> int:
+        """Upsert mapped ``rows`` on ``conn``; returns the rows inserted or changed."""
+        rows = encode_rows(conn, self._encoded, rows)
+        return conn.executemany(self.insert_sql, rows).rowcount
+
+    def max_timestamp(self, features: list) -> int | None:
+        """Newest value of the mapped timestamp field across ``features``."""
+        if self.ts_key is None:
+            return None
+        key = self.ts_key
+        values = [
+            ts for f in features
+            if (ts := (f.get("attributes") or {}).get(key)) is not None
+        ]
+        return max(values, default=None)
+
+
+def _row_hash(values: tuple) -> int:
+    """Compact 64-bit content hash of a mapped row, stored as ``row_hash``."""
+    digest = hashlib.blake2b(repr(values).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _tuple_getter(keys: list[str]) -> Callable[[dict], tuple]:
+    """``itemgetter`` that always returns a tuple, even for 0 or 1 keys."""
+    if not keys:
+        return lambda _: ()
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda d: (d[key],)
+    return itemgetter(*keys)
+
+
+def _layer_query(layer: str, info: dict, mapper: FieldMapper | None = None) -> dict:
+    """:func:`fetch_arcgis_page` options for ``layer``.
+
+    The page size comes from ``LAYER_PAGE_SIZES`` capped by the layer's
+    ``maxRecordCount``; with a ``mapper``, only its source fields (and
+    geometry, if mapped) are requested.
+    """
+    page_size = LAYER_PAGE_SIZES.get(layer, PAGE_SIZE)
+    if info.get("maxRecordCount"):
+        page_size = min(page_size, info["maxRecordCount"])
+    query = {"page_size": page_size}
+    if mapper is not None:
+        query["out_fields"] = ",".join(mapper.source_fields)
+        query["return_geometry"] = mapper.has_geometry
+    return query
+
+
+def _point_layer_batches(
+    db_path: Path,
+    table: str,
+    incremental: bool,
+    overlap_hours: float,
+    batch_size: int,
+    workers: int,
+    state: dict,
+) -> Iterator[Batch]:
+    """Fetch one point layer from ArcGIS and yield ``(write, rows, page)`` batches.
+
+    The :class:`FieldMapper` is compiled from the layer's metadata so pages
+    carry only the mapped fields; if the layer doesn't list its fields, all
+    fields are requested and the mapper is compiled from the first page.
+    Pages are pulled lazily from :func:`iter_pages` (or
+    :func:`iter_pages_parallel` when ``workers > 1``), so memory is bounded by
+    a page plus a batch regardless of layer size. Sets ``state["watermark"]``
+    to the newest timestamp seen.
+    """
+    url = ENDPOINTS[table]
+    where = _incremental_where(db_path, table, overlap_hours) if incremental else "1=1"
+    info = fetch_layer_info(url)
+    field_names = [field["name"] for field in info.get("fields") or []]
+    mapper = FieldMapper(table, field_names) if field_names else None
+    query = _layer_query(table, info, mapper)
+    if workers > 1:
+        pages = iter_pages_parallel(url, where, workers, **query)
+    else:
+        pages = iter_pages(url, where, **query)
+    archive = _archive()
+    if archive is not None:
+        pages = archive.record(table, pages, where, query)
+    yield from _mapped_batches(table, pages, batch_size, state, mapper)
+
+
+def _mapped_batches(
+    table: str,
+    pages: Iterable[list],
+    batch_size: int,
+    state: dict,
+    mapper: FieldMapper | None = None,
+) -> Iterator[Batch]:
+    """Map ``pages`` of features to ``(write, rows, page)`` batches for ``table``.
+
+    Each page is split into batches of up to ``batch_size`` rows. Without a
+    ``mapper`` one is compiled from the first page's fields. Sets
+    ``state["watermark"]`` to the newest timestamp seen.
+    """
+    watermark = None
+    for page_no, page in enumerate(pages, 1):
+        started = time.perf_counter()
+        if mapper is None:
+            mapper = FieldMapper(table, page[0].get("attributes") or {})
+        watermark = _max_ts(watermark, mapper.max_timestamp(page))
+        rows = mapper.rows(page)
+        stats = _page_stats(page_no, page, time.perf_counter() - started)
+        yield from _with_page_stats(mapper.write, rows, batch_size, stats)
+    state["watermark"] = watermark
+
+
+def _page_stats(page_no: int, page: list, transform_seconds: float) -> dict:
+    """Telemetry for one fetched page; request fields are None for pages not
+    fetched over HTTP (e.g. replayed from the archive)."""
+    return {
+        "page_no": page_no,
+        "latency_seconds": getattr(page, "latency", None),
+        "response_bytes": getattr(page, "nbytes", None),
+        "decode_seconds": getattr(page, "decode_seconds", None),
+        "transform_seconds": transform_seconds,
+    }
+
+
+def _with_page_stats(
+    write: Writer, rows: list[tuple], batch_size: int, stats: dict,
+) -> Iterator[Batch]:
+    """Split one page's rows into batches, attaching ``stats`` to the last."""
+    batches = list(_batched(rows, batch_size)) or [[]]
+    for batch in batches[:-1]:
+        yield write, batch, None
+    yield write, batches[-1], stats
+
+
+def _archive() -> PageArchive | None:
+    """The page archive fetched pages are recorded to, if enabled."""
+    return PageArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+
+
+def _feature_key(table: str) -> Callable[[dict], object]:
+    """The natural key (``NATURAL_KEYS``) of a raw ``table`` feature, for
+    :meth:`PageArchive.compact`; the field is resolved as :class:`FieldMapper`
+    does, once per distinct set of attribute names."""
+    candidates = next(
+        names for column, names, _ in FIELD_MAPPINGS[table] if column == NATURAL_KEYS[table]
+    )
+    fields: dict[tuple, str | None] = {}
+
+    def key(feature: dict) -> object:
+        attributes = feature.get("attributes") or {}
+        names = tuple(attributes)
+        if names not in fields:
+            fields[names] = _resolve_field(
+                candidates, list(names), {name.lower(): name for name in names},
+            )
+        return attributes.get(fields[names]) if fields[names] else None
+
+    return key
+
+
+class SyncResult(dict):
+    """``{table: row_count}`` with per-source wall-clock seconds in ``timings``,
+    records downloaded per source in ``fetched`` and the run's peak memory
+    (KB, see :func:`_peak_memory`) in ``peak_memory_kb``."""
+
+    def __init__(
+        self, counts: dict, timings: dict, fetched: dict | None = None,
+        peak_memory_kb: int | None = None,
+    ):
+        super().__init__(counts)
+        self.timings = timings
+        self.fetched = fetched or {}
+        self.peak_memory_kb = peak_memory_kb
+
+
+# Name of the advisory lock every sync, backfill and reconciliation holds, so
+# the app and the scheduler daemon never write at the same time
+SYNC_LOCK = "sync"
+
+
+def _start_progress(conn, tables: Iterable[str]) -> None:
+    """Mark ``tables`` as running in ``sync_progress`` (caller commits)."""
+    conn.executemany(
+        """INSERT OR REPLACE INTO sync_progress
+               (table_name, status, records_fetched, started_at, updated_at)
+           VALUES (?, 'running', 0, datetime('now'), datetime('now'))""",
+        [(table,) for table in tables],
+    )
+
+
+def _update_progress(
+    conn, table: str, fetched: int, status: str = "running", error: str | None = None,
+) -> None:
+    conn.execute(
+        """UPDATE sync_progress SET
+               status = ?, records_fetched = ?, updated_at = datetime('now'),
+               finished_at = CASE WHEN ? = 'running' THEN NULL ELSE datetime('now') END,
+               error = ?
+           WHERE table_name = ?""",
+        (status, fetched, status, error, table),
+    )
+
+
+def _record_page(
+    conn, run_id: str, table: str, page: dict, rows: int, written: int, insert_seconds: float,
+) -> dict:
+    """Insert one ``sync_page_stats`` row (caller commits) and return it."""
+    record = {
+        "run_id": run_id, "table_name": table, **page,
+        "rows": rows, "rows_written": written, "rows_ignored": rows - written,
+        "insert_seconds": insert_seconds,
+    }
+    conn.execute(
+        f"INSERT INTO sync_page_stats ({', '.join(record)}) "
+        f"VALUES ({','.join('?' * len(record))})",
+        tuple(record.values()),
+    )
+    return record
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _page_summary(pages: list[dict], fetched: int, seconds: float) -> dict:
+    """Per-run ``sync_log`` columns summarising a source's page telemetry."""
+    latencies = [p["latency_seconds"] for p in pages if p["latency_seconds"] is not None]
+    return {
+        "pages": len(pages),
+        "response_bytes": sum(p["response_bytes"] or 0 for p in pages),
+        "rows_per_second": round(fetched / seconds, 1) if seconds else None,
+        "p50_page_seconds": _percentile(latencies, 50),
+        "p95_page_seconds": _percentile(latencies, 95),
+        "decode_seconds": round(sum(p["decode_seconds"] or 0 for p in pages), 3),
+        "insert_seconds": round(sum(p["insert_seconds"] for p in pages), 3),
+    }
+
+
+class _Aborted(Exception):
+    """Raised in producer threads when the writer has stopped."""
+
+
+# Queue markers sent in place of an insert statement when a producer ends
+_DONE = object()
+_FAILED = object()
+
+
+def _table_is_empty(conn, table: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+
+def _streets_queued(conn) -> bool:
+    return not _table_is_empty(conn, "street_changes")
+
+
+def _run_sources(
+    db_path: Path, producers: dict[str, Producer], rebuild: bool = False,
+    source: str = "peoria_pd_arcgis",
+) -> SyncResult:
+    """Run each producer on its own thread and funnel every write through this one.
+
+    Producers fetch and transform concurrently, handing batches over a bounded
+    queue; the calling thread owns the only SQLite connection, so the database
+    never sees competing writers. Each source's rows, watermark and
+    ``sync_log`` entry are committed when its producer finishes. If a source
+    fails, the others still complete and the first error is re-raised.
+
+    Tables that are empty, or all tables when ``rebuild`` is set, are bulk
+    loaded: secondary indexes are dropped and rebuilt followed by ``ANALYZE``
+    once the source finishes, under :func:`bulk_load_settings`. A rebuild runs
+    the sources one after another, each dropping its indexes, clearing its
+    table and watermark and reloading it in a single transaction that is
+    committed only if the source succeeds, so readers see the old rows and
+    indexes until the new ones are complete and a failed source leaves its
+    table as it was.
+    """
+    writes: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    stop = threading.Event()
+    started = time.perf_counter()
+
+    def put(item: tuple) -> None:
+        while True:
+            try:
+                writes.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    raise _Aborted
+
+    def produce(table: str, producer: Producer) -> None:
+        state: dict = {}
+        try:
+            for write, rows, page in producer(state):
+                put((table, write, rows, page))
+        except _Aborted:
+            return
+        except Exception as exc:  # handed to the writer, re-raised there
+            put((table, _FAILED, exc, None))
+        else:
+            put((table, _DONE, state, None))
+
+    threads = {
+        table: threading.Thread(
+            target=produce, args=(table, producer), name=f"sync-{table}", daemon=True,
+        )
+        for table, producer in producers.items()
+    }
+    counts: dict[str, int] = {}
+    timings: dict[str, float] = {}
+    fetched = dict.fromkeys(producers, 0)
+    changed = dict.fromkeys(producers, 0)
+    errors: list[Exception] = []
+    run_id = uuid.uuid4().hex[:12]
+    pages: dict[str, list[dict]] = {table: [] for table in producers}
+    # rows, rows written and insert seconds of each table's current page
+    page_writes = {table: [0, 0, 0.0] for table in producers}
+    with advisory_lock(db_path, SYNC_LOCK):
+        conn = get_connection(db_path)
+        bulk = [table for table in producers if rebuild or _table_is_empty(conn, table)]
+        initial = {
+            table: 0 if rebuild else conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in producers
+        }
+        _start_progress(conn, producers)
+        conn.commit()
+
+        def start(table: str) -> None:
+            if table in bulk:
+                if rebuild:
+                    # sqlite3 autocommits DDL outside a transaction; opening
+                    # one first keeps the index and R*Tree drops in the
+                    # rebuild's transaction, hidden from readers until it commits
+                    conn.execute("BEGIN")
+                drop_indexes(conn, table)
+                if rebuild:
+                    conn.execute(f"DELETE FROM {table}")
+                    conn.execute("DELETE FROM sync_state WHERE table_name = ?", (table,))
+                logger.info("Bulk loading %s with deferred index builds", table)
+            threads[table].start()
+
+        order = list(producers)
+        # a rebuild starts each source once the previous one has committed
+        waiting = order[1:] if rebuild else []
+        try:
+            with _peak_memory() as peak_so_far, \
+                    (bulk_load_settings(conn) if bulk else nullcontext()):
+                for table in order[:1] if rebuild else order:
+                    start(table)
+                remaining = len(threads)
+                flushed = time.perf_counter()
+                while remaining:
+                    table, op, payload, page = writes.get()
+                    if op not in (_DONE, _FAILED):
+                        insert_started = time.perf_counter()
+                        # inserted plus actually-updated rows
+                        written = op(conn, payload)
+                        current = page_writes[table]
+                        current[0] += len(payload)
+                        current[1] += written
+                        current[2] += time.perf_counter() - insert_started
+                        changed[table] += written
+                        fetched[table] += len(payload)
+                        if page is not None:
+                            pages[table].append(
+                                _record_page(conn, run_id, table, page, *current)
+                            )
+                            page_writes[table] = [0, 0, 0.0]
+                        # Commit periodically so other processes see progress;
+                        # a rebuild stays one transaction so readers keep the
+                        # old rows until it finishes
+                        if not rebuild and time.perf_counter() - flushed > PROGRESS_INTERVAL:
+                            for name in producers:
+                                _update_progress(conn, name, fetched[name])
+                            conn.commit()
+                            flushed = time.perf_counter()
+                        continue
+                    remaining -= 1
+                    timings[table] = round(time.perf_counter() - started, 3)
+                    rolled_back = rebuild and op is _FAILED
+                    if rolled_back:
+                        # the table, its indexes and watermark as they were
+                        conn.rollback()
+                        changed[table] = 0
+                    if op is _DONE:
+                        _set_watermark(conn, table, payload.get("watermark"))
+                    if table in bulk and not rolled_back:
+                        create_indexes(conn, table)
+                        conn.execute(f"ANALYZE {table}")
+                    # Only the point tables feed the street aggregates. Blocks
+                    # are also queued by recreated triggers (a bulk load) and
+                    # by init_db() keying rows from before the street columns.
+                    if table in STREET_TABLES and not rolled_back and (
+                        changed[table] or _streets_queued(conn)
+                    ):
+                        refresh_streets(conn)
+                    conn.commit()
+                    counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    peak_kb = peak_so_far()
+                    inserted = 0 if rolled_back else counts[table] - initial[table]
+                    updated = changed[table] - inserted
+                    _write_sync_log(
+                        conn, source, table, fetched[table],
+                        status="completed" if op is _DONE else "failed",
+                        run_id=run_id, table_rows=counts[table],
+                        peak_memory_kb=peak_kb, duration_seconds=timings[table],
+                        records_inserted=inserted, records_updated=updated,
+                        records_unchanged=fetched[table] - changed[table],
+                        **_page_summary(pages[table], fetched[table], timings[table]),
+                    )
+                    _update_progress(
+                        conn, table, fetched[table],
+                        status="completed" if op is _DONE else "failed",
+                        error=str(payload) if op is _FAILED else None,
+                    )
+                    conn.commit()
+                    if op is _FAILED:
+                        errors.append(payload)
+                        logger.error("Sync of %s failed: %s", table, payload)
+                    else:
+                        logger.info(
+                            "Synced %s: %d fetched (%d new, %d updated), %d total "
+                            "in %.1fs (peak %s KB)",
+                            table, fetched[table], inserted, updated, counts[table],
+                            timings[table], peak_kb,
+                        )
+                    if waiting:
+                        start(waiting.pop(0))
+                run_peak_kb = peak_so_far()
+        finally:
+            stop.set()
+            for table in bulk:  # never leave a table without its indexes
+                create_indexes(conn, table)
+            conn.commit()
+            conn.close()
+        archive = _archive()
+        if archive is not None and not errors:
+            for table in producers:
+                if table in NATURAL_KEYS:
+                    archive.compact(
+                        table, _feature_key(table), ARCHIVE_MAX_INCREMENTAL_RUNS, PAGE_SIZE,
+                    )
+            removed = archive.prune()
+            if removed:
+                logger.info("Pruned %d archived pages no longer needed for replay", removed)
+        if errors:
+            raise errors[0]
+        return SyncResult(counts, timings, fetched, run_peak_kb)
+
+
+def sync_crimes(
+    db_path: Path,
+    incremental: bool = False,
+    overlap_hours: float = SYNC_OVERLAP_HOURS,
+    batch_size: int = INSERT_BATCH_SIZE,
+    workers: int = 1,
+    rebuild: bool = False,
+) -> int:
+    """Fetch crime records and insert into the crimes table.
+
+    With ``incremental=True`` only records at or after the stored watermark
+    (minus ``overlap_hours``) are requested. ``workers > 1`` fetches OBJECTID
+    chunks concurrently instead of paging by offset. ``rebuild=True`` clears
+    the table and reloads it in bulk mode (as happens automatically when the
+    table is empty).
+    """
+    producer = _point_layer_producer(
+        db_path, "crimes", incremental and not rebuild, overlap_hours, batch_size, workers,
+    )
+    return _run_sources(db_path, {"crimes": producer}, rebuild)["crimes"]
+
+
+def sync_calls_for_service(
+    db_path: Path,
+    incremental: bool = False,
+    overlap_hours: float = SYNC_OVERLAP_HOURS,
+    batch_size: int = INSERT_BATCH_SIZE,
+    workers: int = 1,
+    rebuild: bool = False,
+) -> int:
+    """Fetch calls-for-service records and insert into the table."""
+    producer = _point_layer_producer(
+        db_path, "calls_for_service", incremental and not rebuild, overlap_hours, batch_size, workers,
+    )
+    return _run_sources(db_path, {"calls_for_service": producer}, rebuild)["calls_for_service"]
+
+
+def sync_shotspotter(
+    db_path: Path,
+    incremental: bool = False,
+    overlap_hours: float = SYNC_OVERLAP_HOURS,
+    batch_size: int = INSERT_BATCH_SIZE,
+    workers: int = 1,
+    rebuild: bool = False,
+) -> int:
+    """Fetch ShotSpotter records and insert into the table."""
+    producer = _point_layer_producer(
+        db_path, "shotspotter", incremental and not rebuild, overlap_hours, batch_size, workers,
+    )
+    return _run_sources(db_path, {"shotspotter": producer}, rebuild)["shotspotter"]
+
+
+def _point_layer_producer(
+    db_path: Path,
+    table: str,
+    incremental: bool = False,
+    overlap_hours: float = SYNC_OVERLAP_HOURS,
+    batch_size: int = INSERT_BATCH_SIZE,
+    workers: int = 1,
+) -> Producer:
+    return partial(
+        _point_layer_batches, db_path, table,
+        incremental, overlap_hours, batch_size, workers,
+    )
+
+
+_BOUNDARY_LAYERS = ("beats", "districts", "community_policing")
+
+# Upsert rewriting a boundary only when its content changed, so rowcount
+# counts new and changed boundaries like the point tables' row_hash upsert
+_BOUNDARIES_INSERT = (
+    f"INSERT INTO boundaries (boundary_type, name, {', '.join(BOUNDARY_COLUMNS)}) "
+    f"VALUES ({','.join('?' * (len(BOUNDARY_COLUMNS) + 2))}) "
+    f"ON CONFLICT(boundary_type, name) DO UPDATE SET "
+    f"{', '.join(f'{c} = excluded.{c}' for c in BOUNDARY_COLUMNS)} "
+    f"WHERE {' OR '.join(f'boundaries.{c} IS NOT excluded.{c}' for c in BOUNDARY_COLUMNS)}"
+)
+
+
+def _write_boundaries(conn: sqlite3.Connection, rows: list[tuple]) -> int:
+    return conn.executemany(_BOUNDARIES_INSERT, rows).rowcount
+
+
+def _boundary_rows(boundary_type: str, features: list) -> list[tuple]:
+    """One row per boundary: its GeoJSON at full and simplified detail plus
+    bounding box, area and centroid (:func:`src.geometry.boundary_columns`)."""
+    rows = []
     for feat in features:
         attrs = feat.get("attributes", {})
         geom = feat.get("geometry", {})
-        conn.execute(
-            """INSERT OR IGNORE INTO shotspotter (
-                incident_id, rounds_fired, event_type,
-                address, beat, district, event_date,
-                latitude, longitude
-            ) VALUES (?,?,?,?,?,?,?,?,?)""",
-            (
-                _get_attr(
-                    attrs, "ShotSpotter_ID", "incidentid", "IncidentID",
-                    "INCIDENTID", "incident_id",
-                ),
-                _get_attr(
-                    attrs, "Rounds", "roundsfired", "RoundsFired",
-                    "ROUNDSFIRED", "rounds_fired",
-                ),
-                _get_attr(
-                    attrs, "Type", "eventtype", "EventType",
-                    "EVENTTYPE", "event_type",
-                ),
-                _get_attr(attrs, "Address", "fulladdr", "FullAddr", "FULLADDR", "address"),
-                _get_attr(attrs, "Beat", "beat", "BEAT"),
-                _get_attr(attrs, "District", "district", "DISTRICT"),
-                _ts_to_iso(
-                    _get_attr(
-                        attrs, "Date", "eventdate", "EventDate",
-                        "EVENTDATE", "event_date",
-                    )
-                ),
-                geom.get("y") if geom else None,
-                geom.get("x") if geom else None,
-            ),
+        name = _get_attr(
+            attrs, "beat", "district", "name", "Name", "NAME",
+            "BEAT", "DISTRICT", "AREA",
         )
-    conn.commit()
-    count = conn.execute("SELECT COUNT(*) FROM shotspotter").fetchone()[0]
-    conn.close()
-    _log_sync(db_path, "peoria_pd_arcgis", "shotspotter", count)
-    logger.info("Synced %d shotspotter records", count)
-    return count
+        if name is None:
+            name = str(attrs.get("OBJECTID", "unknown"))
+        rows.append((boundary_type, name, *boundary_columns(geom).values()))
+    return rows
 
 
-def sync_boundaries(db_path: Path) -> int:
+def _boundary_batches(state: dict) -> Iterator[Batch]:
+    """Fetch each boundary layer and yield its rows as one batch."""
+    archive = _archive()
+    for page_no, boundary_type in enumerate(_BOUNDARY_LAYERS, 1):
+        query = _layer_query(boundary_type, {})
+        features = fetch_all_records(ENDPOINTS[boundary_type], **query)
+        if archive is not None:
+            for _ in archive.record(boundary_type, [features], "1=1", query):
+                pass
+        started = time.perf_counter()
+        rows = _boundary_rows(boundary_type, features)
+        if rows:
+            stats = _page_stats(page_no, features, time.perf_counter() - started)
+            yield _write_boundaries, rows, stats
+
+
+def _replayed_boundary_batches(archive: PageArchive, state: dict) -> Iterator[Batch]:
+    """Like :func:`_boundary_batches`, reading the layers from ``archive``."""
+    for page_no, boundary_type in enumerate(_BOUNDARY_LAYERS, 1):
+        started = time.perf_counter()
+        rows = [
+            row for page in archive.replay(boundary_type)
+            for row in _boundary_rows(boundary_type, page)
+        ]
+        if rows:
+            stats = _page_stats(page_no, [], time.perf_counter() - started)
+            yield _write_boundaries, rows, stats
+
+
+def sync_boundaries(db_path: Path, rebuild: bool = False) -> int:
     """Fetch beat, district, and community policing boundary layers."""
-    boundary_layers = {
-        "beats": ENDPOINTS["beats"],
-        "districts": ENDPOINTS["districts"],
-        "community_policing": ENDPOINTS["community_policing"],
-    }
-    conn = get_connection(db_path)
-    total = 0
-    for boundary_type, url in boundary_layers.items():
-        features = fetch_all_records(url)
-        for feat in features:
-            attrs = feat.get("attributes", {})
-            geom = feat.get("geometry", {})
-            name = _get_attr(
-                attrs, "beat", "district", "name", "Name", "NAME",
-                "BEAT", "DISTRICT", "AREA",
+    return _run_sources(db_path, {"boundaries": _boundary_batches}, rebuild)["boundaries"]
+
+
+# Per-source sync entry points, keyed by the table (or "boundaries") they fill
+SYNC_FUNCTIONS: dict[str, Callable[..., int]] = {
+    "crimes": sync_crimes,
+    "calls_for_service": sync_calls_for_service,
+    "shotspotter": sync_shotspotter,
+    "boundaries": sync_boundaries,
+}
+
+
+def replay_archive(
+    db_path: Path | None = None,
+    tables: Iterable[str] | None = None,
+    archive_dir: Path | None = None,
+) -> SyncResult:
+    """Rebuild tables from the page archive without touching the network.
+
+    Each table is cleared and bulk loaded from its latest full archived run
+    plus the incremental runs after it, going through the same field mapping
+    and upsert as a live sync. Tables with no full run archived are left
+    untouched. Returns a :class:`SyncResult` like :func:`run_full_sync`.
+    """
+    if db_path is None:
+        from src.config import DB_PATH
+
+        db_path = DB_PATH
+    archive = PageArchive(archive_dir or ARCHIVE_DIR)
+    init_db(db_path)
+    producers: dict[str, Producer] = {}
+    for table in tables or (*FIELD_MAPPINGS, "boundaries"):
+        if table == "boundaries":
+            if any(archive.has_full_run(layer) for layer in _BOUNDARY_LAYERS):
+                producers[table] = partial(_replayed_boundary_batches, archive)
+        elif archive.has_full_run(table):
+            producers[table] = partial(
+                _mapped_batches, table, archive.replay(table), INSERT_BATCH_SIZE,
             )
-            if name is None:
-                name = str(attrs.get("OBJECTID", "unknown"))
-            geometry_geojson = json.dumps(geom) if geom else None
-            conn.execute(
-                """INSERT OR REPLACE INTO boundaries (
-                    boundary_type, name, geometry_geojson
-                ) VALUES (?,?,?)""",
-                (boundary_type, name, geometry_geojson),
+        if table not in producers:
+            logger.warning("Nothing archived for %s; leaving it as is", table)
+    result = _run_sources(db_path, producers, rebuild=True, source="archive_replay")
+    logger.info("Replay complete: %s (seconds: %s)", dict(result), result.timings)
+    return result
+
+
+def _sorted_difference(local: Iterable[int], upstream: list[int]) -> Iterator[int]:
+    """Yield IDs from sorted ``local`` that are absent from sorted ``upstream``."""
+    remaining = iter(upstream)
+    current = next(remaining, None)
+    for oid in local:
+        while current is not None and current < oid:
+            current = next(remaining, None)
+        if current != oid:
+            yield oid
+
+
+# Local OBJECTIDs of a table in order, for the merge against upstream's list
+OBJECT_IDS_SQL = "SELECT object_id FROM {table} WHERE object_id IS NOT NULL ORDER BY object_id"
+
+
+def reconcile_deletions(
+    db_path: Path,
+    tables: Iterable[str] | None = None,
+    max_delete_fraction: float = RECONCILE_MAX_DELETE_FRACTION,
+    batch_size: int = 500,
+) -> dict[str, int]:
+    """Delete local rows whose upstream record no longer exists.
+
+    Only the layer's OBJECTID list is downloaded (``returnIdsOnly``), then
+    sorted-merged against the local ``object_id`` column. Missing rows are
+    recorded in ``deleted_records`` (table, natural key, OBJECTID) and deleted
+    in batches. A pass that would remove more than ``max_delete_fraction`` of a
+    table is skipped with a warning. Rows synced before ``object_id`` was
+    stored are left alone. Returns ``{table: rows_deleted}``.
+    """
+    with advisory_lock(db_path, SYNC_LOCK):
+        deleted: dict[str, int] = {}
+        for table in tables or FIELD_MAPPINGS:
+            started = time.perf_counter()
+            _, upstream = fetch_object_ids(ENDPOINTS[table])
+            conn = get_connection(db_path)
+            local = conn.execute(OBJECT_IDS_SQL.format(table=table))
+            local_count = 0
+
+            def counted(rows):
+                nonlocal local_count
+                for row in rows:
+                    local_count += 1
+                    yield row[0]
+
+            missing = list(_sorted_difference(counted(local), upstream))
+            status = "reconciled"
+            if missing and len(missing) > max_delete_fraction * local_count:
+                logger.warning(
+                    "Not reconciling %s: %d of %d rows missing upstream exceeds %.0f%%",
+                    table, len(missing), local_count, max_delete_fraction * 100,
+                )
+                status = "skipped"
+                missing = []
+            key = NATURAL_KEYS[table]
+            for batch in _batched(missing, batch_size):
+                marks = ",".join("?" * len(batch))
+                conn.execute(
+                    f"INSERT INTO deleted_records (table_name, natural_key, object_id) "
+                    f"SELECT ?, {key}, object_id FROM {table} WHERE object_id IN ({marks})",
+                    (table, *batch),
+                )
+                conn.execute(f"DELETE FROM {table} WHERE object_id IN ({marks})", batch)
+            refresh_streets(conn)
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            _write_sync_log(
+                conn, "peoria_pd_arcgis", table, len(upstream), status=status,
+                table_rows=count,
+                duration_seconds=round(time.perf_counter() - started, 3),
+                records_deleted=len(missing),
             )
-        total += len(features)
-    conn.commit()
-    count = conn.execute("SELECT COUNT(*) FROM boundaries").fetchone()[0]
-    conn.close()
-    _log_sync(db_path, "peoria_pd_arcgis", "boundaries", count)
-    logger.info("Synced %d boundary records", count)
-    return count
+            conn.commit()
+            conn.close()
+            deleted[table] = len(missing)
+            logger.info("Reconciled %s: %d rows deleted", table, len(missing))
+    return deleted
 
 
-def _log_sync(db_path: Path, source: str, table: str, count: int) -> None:
-    """Insert a record into the sync_log table."""
-    conn = get_connection(db_path)
+def _add_months(dt: datetime, months: int) -> datetime:
+    month = dt.month - 1 + months
+    return dt.replace(year=dt.year + month // 12, month=month % 12 + 1)
+
+
+def backfill_windows(
+    table: str, start: str = BACKFILL_START, end: datetime | None = None, months: int = 1,
+) -> list[tuple[str, str]]:
+    """Partition ``table``'s layer into ``(window_key, where)`` date windows.
+
+    Windows are ``months`` long from ``start`` (``YYYY-MM-DD``) on the table's
+    ``WATERMARK_FIELDS`` date; the last one is open-ended so nothing dated
+    after ``end`` (default now) is missed. Two extra windows catch records
+    dated before ``start`` and records with no date.
+    """
+    field = WATERMARK_FIELDS[table]
+    lo = datetime.strptime(start, "%Y-%m-%d")
+    end = end or datetime.now(timezone.utc).replace(tzinfo=None)
+    windows = [
+        ("undated", f"{field} IS NULL"),
+        (f"before-{lo:%Y-%m}", f"{field} < {_arcgis_timestamp(lo)}"),
+    ]
+    while True:
+        hi = _add_months(lo, months)
+        if hi > end:
+            windows.append((f"{lo:%Y-%m}", f"{field} >= {_arcgis_timestamp(lo)}"))
+            return windows
+        windows.append((
+            f"{lo:%Y-%m}",
+            f"{field} >= {_arcgis_timestamp(lo)} AND {field} < {_arcgis_timestamp(hi)}",
+        ))
+        lo = hi
+
+
+def _fetch_window(table: str, where: str, query: dict) -> list:
+    """Download every feature in one backfill window (archiving its pages)."""
+    pages = iter_pages(ENDPOINTS[table], where, **query)
+    archive = _archive()
+    if archive is not None:
+        pages = archive.record(table, pages, where, query)
+    return [feat for page in pages for feat in page]
+
+
+def backfill(
+    db_path: Path | None = None,
+    tables: Iterable[str] | None = None,
+    start: str = BACKFILL_START,
+    months: int = 1,
+    workers: int = FETCH_WORKERS,
+    end: datetime | None = None,
+) -> dict[str, dict[str, int]]:
+    """Resumable historical load of the point layers, one date window at a time.
+
+    Each layer is split by :func:`backfill_windows`; windows are downloaded in
+    parallel by ``workers`` threads while this thread upserts each finished
+    window and marks it done in ``backfill_windows`` in the same transaction.
+    Windows already completed (with the same where clause) are skipped, so a
+    rerun resumes after a crash and retries only failed or missing windows; a
+    window that fails is recorded with its error and doesn't stop the others.
+    Returns ``{table: {"completed", "failed", "skipped", "records"}}``.
+    """
+    if db_path is None:
+        from src.config import DB_PATH
+
+        db_path = DB_PATH
+    init_db(db_path)
+    with advisory_lock(db_path, SYNC_LOCK):
+        conn = get_connection(db_path)
+        done = {
+            (row[0], row[1]): row[2]
+            for row in conn.execute(
+                "SELECT table_name, window_key, where_clause FROM backfill_windows "
+                "WHERE status = 'completed'"
+            )
+        }
+        summary: dict[str, dict[str, int]] = {}
+        mappers: dict[str, FieldMapper | None] = {}
+        queries: dict[str, dict] = {}
+        todo = []
+        for table in tables or FIELD_MAPPINGS:
+            summary[table] = dict.fromkeys(("completed", "failed", "skipped", "records"), 0)
+            info = fetch_layer_info(ENDPOINTS[table])
+            field_names = [field["name"] for field in info.get("fields") or []]
+            mappers[table] = FieldMapper(table, field_names) if field_names else None
+            queries[table] = _layer_query(table, info, mappers[table])
+            for key, where in backfill_windows(table, start, end, months):
+                if done.get((table, key)) == where:
+                    summary[table]["skipped"] += 1
+                else:
+                    todo.append((table, key, where))
+        logger.info("Backfill: %d windows to fetch", len(todo))
+        _start_progress(conn, summary)
+        conn.commit()
+
+        pending_windows = iter(todo)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                def submit(window):
+                    table, _, where = window
+                    return pool.submit(_fetch_window, table, where, queries[table])
+
+                pending = {submit(w): w for w in islice(pending_windows, 2 * workers)}
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        table, key, where = pending.pop(future)
+                        for window in islice(pending_windows, 1):
+                            pending[submit(window)] = window
+                        try:
+                            features = future.result()
+                        except Exception as exc:
+                            logger.error("Backfill of %s %s failed: %s", table, key, exc)
+                            _checkpoint_window(conn, table, key, where, "failed", 0, str(exc))
+                            conn.commit()
+                            summary[table]["failed"] += 1
+                            continue
+                        if features and mappers[table] is None:
+                            mappers[table] = FieldMapper(table, features[0].get("attributes") or {})
+                        mapper = mappers[table]
+                        summary[table]["completed"] += 1
+                        summary[table]["records"] += len(features)
+                        with conn:  # rows and checkpoint commit together
+                            if features:
+                                mapper.write(conn, mapper.rows(features))
+                                _set_watermark(conn, table, mapper.max_timestamp(features))
+                            _checkpoint_window(conn, table, key, where, "completed", len(features))
+                            _update_progress(conn, table, summary[table]["records"])
+                        logger.info("Backfilled %s %s: %d records", table, key, len(features))
+            refresh_streets(conn)
+            for table, counts in summary.items():
+                count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                status = "backfill_incomplete" if counts["failed"] else "backfilled"
+                _write_sync_log(
+                    conn, "peoria_pd_arcgis", table, counts["records"], status=status,
+                    table_rows=count,
+                )
+                _update_progress(conn, table, counts["records"], status=status)
+            conn.commit()
+        finally:
+            conn.close()
+    return summary
+
+
+def _checkpoint_window(
+    conn, table: str, key: str, where: str, status: str, records: int, error: str | None = None,
+) -> None:
     conn.execute(
-        """INSERT INTO sync_log (source, table_name, records_fetched, completed_at, status)
-           VALUES (?, ?, ?, datetime('now'), 'completed')""",
-        (source, table, count),
+        """INSERT INTO backfill_windows
+               (table_name, window_key, where_clause, status, records, attempts, error,
+                completed_at)
+           VALUES (?, ?, ?, ?, ?, 1, ?, datetime('now'))
+           ON CONFLICT(table_name, window_key) DO UPDATE SET
+               where_clause = excluded.where_clause,
+               status = excluded.status,
+               records = excluded.records,
+               attempts = backfill_windows.attempts + 1,
+               error = excluded.error,
+               completed_at = excluded.completed_at""",
+        (table, key, where, status, records, error),
     )
-    conn.commit()
-    conn.close()
 
 
-def run_full_sync(db_path: Path | None = None) -> dict:
-    """Run a full sync of all data sources."""
+def _write_sync_log(
+    conn, source: str, table: str, count: int, status: str = "completed", **columns,
+) -> None:
+    """Insert a sync_log row on an existing connection (caller commits).
+
+    ``count`` is the records fetched; ``columns`` fill any other sync_log
+    columns by name (``table_rows``, ``duration_seconds``, ...).
+    """
+    values = {
+        "source": source, "table_name": table, "records_fetched": count,
+        "status": status, **columns,
+    }
+    conn.execute(
+        f"INSERT INTO sync_log ({', '.join(values)}, completed_at) "
+        f"VALUES ({','.join('?' * len(values))}, datetime('now'))",
+        tuple(values.values()),
+    )
+
+
+def run_full_sync(
+    db_path: Path | None = None, incremental: bool = False, workers: int = 1,
+    rebuild: bool = False,
+) -> SyncResult:
+    """Run a sync of all data sources concurrently.
+
+    Every source is fetched on its own thread while this thread performs all
+    database writes (see :func:`_run_sources`). ``incremental`` and
+    ``workers`` apply to the crimes, calls-for-service and ShotSpotter layers;
+    boundaries are small and always re-fetched in full. ``rebuild`` clears
+    every table and bulk loads it from scratch, one source at a time. The
+    result maps each table to its row count and carries per-source seconds in
+    ``.timings``.
+    """
     if db_path is None:
         from src.config import DB_PATH
 
         db_path = DB_PATH
     init_db(db_path)
-    counts = {
-        "crimes": sync_crimes(db_path),
-        "calls_for_service": sync_calls_for_service(db_path),
-        "shotspotter": sync_shotspotter(db_path),
-        "boundaries": sync_boundaries(db_path),
+    producers: dict[str, Producer] = {
+        table: _point_layer_producer(
+            db_path, table, incremental=incremental and not rebuild, workers=workers,
+        )
+        for table in FIELD_MAPPINGS
     }
-    logger.info("Full sync complete: %s", counts)
-    return counts
+    producers["boundaries"] = _boundary_batches
+    reset_stats()
+    result = _run_sources(db_path, producers, rebuild)
+    logger.info(
+        "Full sync complete: %s (seconds: %s, peak %s KB)",
+        dict(result), result.timings, result.peak_memory_kb,
+    )
+    http_stats = get_stats()
+    for url, stats in http_stats.items():
+        logger.info(
+            "%s: %d requests (%d retries), %d bytes, %.1fs total / %.2fs max latency",
+            url, stats["requests"], stats["retries"], stats["bytes"],
+            stats["seconds"], stats["max_seconds"],
+        )
+    for table, per_record in bytes_per_record(result, http_stats).items():
+        logger.info("%s: %.0f bytes/record", table, per_record)
+    return result
+
+
+def bytes_per_record(result: SyncResult, http_stats: dict[str, dict]) -> dict[str, float]:
+    """Response bytes downloaded per fetched record for each point layer."""
+    report = {}
+    for table in FIELD_MAPPINGS:
+        fetched = result.fetched.get(table)
+        stats = http_stats.get(f"{ENDPOINTS[table]}/query")
+        if fetched and stats:
+            report[table] = stats["bytes"] / fetched
+    return report
+
+
+def sync_status(db_path: Path) -> dict:
+    """Current ``sync_progress`` rows and the live sync lock holder, for display.
+
+    ``lock`` is None when nobody holds the lock, including when the ``locks``
+    row was left by a process that died or stopped heartbeating (see
+    :func:`lock_holder`).
+    """
+    conn = get_connection(db_path)
+    progress = [dict(row) for row in conn.execute(
+        "SELECT * FROM sync_progress ORDER BY table_name"
+    )]
+    lock = lock_holder(conn, SYNC_LOCK)
+    conn.close()
+    return {"progress": progress, "lock": lock}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Headless entry point: ``python -m src.sync <command> [options]``."""
+    from src.config import DB_PATH
+    from src.database import LockHeld
+
+    parser = argparse.ArgumentParser(prog="python -m src.sync", description="Sync Peoria PD data")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    full = commands.add_parser("full", help="sync every source")
+    source = commands.add_parser("source", help="sync one source")
+    source.add_argument("name", choices=list(SYNC_FUNCTIONS))
+    for sub in (full, source):
+        sub.add_argument("--incremental", action="store_true", help="only fetch since the watermark")
+        sub.add_argument("--rebuild", action="store_true", help="clear and bulk reload")
+        sub.add_argument("--workers", type=int, default=1, help="parallel page fetchers")
+    fill = commands.add_parser("backfill", help="resumable monthly history load")
+    fill.add_argument("--tables", nargs="+", choices=list(FIELD_MAPPINGS))
+    fill.add_argument("--start", default=BACKFILL_START, help="first month (YYYY-MM-DD)")
+    fill.add_argument("--months", type=int, default=1, help="months per window")
+    fill.add_argument("--workers", type=int, default=FETCH_WORKERS)
+    commands.add_parser("reconcile", help="delete rows removed upstream")
+    commands.add_parser("replay", help="rebuild tables from the page archive")
+    commands.add_parser("daemon", help="run syncs on the SYNC_INTERVALS schedule")
+    commands.add_parser("status", help="show sync progress and lock holder")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    init_db(args.db)
+    try:
+        if args.command == "full":
+            result = run_full_sync(args.db, args.incremental, args.workers, args.rebuild)
+        elif args.command == "source":
+            options = {"rebuild": args.rebuild}
+            if args.name != "boundaries":
+                options.update(incremental=args.incremental, workers=args.workers)
+            result = SYNC_FUNCTIONS[args.name](args.db, **options)
+        elif args.command == "backfill":
+            result = backfill(args.db, args.tables, args.start, args.months, args.workers)
+        elif args.command == "reconcile":
+            result = reconcile_deletions(args.db)
+        elif args.command == "replay":
+            result = replay_archive(args.db)
+        elif args.command == "daemon":
+            from src.scheduler import run_daemon
+
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            try:
+                run_daemon(args.db, stop=stop)
+            except KeyboardInterrupt:
+                pass
+            return 0
+        else:
+            result = sync_status(args.db)
+    except LockHeld as exc:
+        logger.error("Another sync is running: %s", exc)
+        return 2
+    print(json.dumps(result, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
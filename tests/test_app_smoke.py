@@ -8,7 +8,8 @@ from src.queries import (
     get_top_crime_types,
     get_area_options,
 )
-from src.map_utils import create_base_map, add_crime_heatmap
+from src.map_utils import create_base_map, add_crime_heatmap, add_boundary_overlay
+from src.sync import _BOUNDARIES_INSERT, _boundary_rows
 
 
 @pytest.fixture
@@ -18,7 +19,7 @@ def populated_db(tmp_path):
     conn = get_connection(path)
     for i in range(50):
         conn.execute("""
-            INSERT INTO crimes (offense_id, nibrs_offense, nibrs_description,
+            INSERT INTO crimes_decoded (offense_id, nibrs_offense, nibrs_description,
                 district, beat, neighborhood, address,
                 report_date, report_year, report_month, report_hour, report_dow,
                 latitude, longitude)
@@ -68,3 +69,23 @@ def test_map_creation(populated_db):
 
     m = add_crime_heatmap(m, crimes)
     assert m is not None
+
+
+def test_boundary_overlay_uses_simplified_geometry(populated_db):
+    # A district edge digitized at ~1 m spacing with sub-metre jitter
+    edge = [[-89.6 + k * 0.00001, 40.7 + 0.000001 * (k % 2)] for k in range(2000)]
+    ring = [[-89.6, 40.7], [-89.58, 40.72]] + edge[::-1]
+    conn = get_connection(populated_db)
+    conn.executemany(_BOUNDARIES_INSERT, _boundary_rows(
+        "districts", [{"attributes": {"district": "1"}, "geometry": {"rings": [ring]}}],
+    ))
+    conn.commit()
+    conn.close()
+
+    full = add_boundary_overlay(create_base_map(), populated_db, "districts", "full")
+    medium = add_boundary_overlay(create_base_map(), populated_db, "districts")
+    full_html, medium_html = full.get_root().render(), medium.get_root().render()
+    assert '"name": "1"' in medium_html
+    assert len(medium_html) < len(full_html) / 4
+    with pytest.raises(ValueError):
+        add_boundary_overlay(create_base_map(), populated_db, "districts", "huge")
@@ -0,0 +1,94 @@
+from src.archive import PageArchive, query_key
+
+
+def _page(*ids):
+    return [{"attributes": {"OBJECTID": i}} for i in ids]
+
+
+def _object_id(feature):
+    return feature["attributes"].get("OBJECTID")
+
+
+class TestPageArchive:
+    def test_round_trip_and_dedup(self, tmp_path):
+        archive = PageArchive(tmp_path)
+        first = archive.put_page(_page(1, 2))
+        second = archive.put_page(_page(1, 2))
+
+        assert first == second
+        assert archive.get_page(first) == _page(1, 2)
+        assert len(list((tmp_path / "objects").rglob("*.json.gz"))) == 1
+
+    def test_record_passes_pages_through(self, tmp_path):
+        archive = PageArchive(tmp_path)
+        pages = list(archive.record("crimes", iter([_page(1), _page(2)]), "1=1", {"page_size": 2}))
+
+        assert pages == [_page(1), _page(2)]
+        (run,) = archive.runs("crimes")
+        assert run["records"] == 2
+        assert run["query"] == {"page_size": 2}
+        assert [archive.get_page(d) for d in run["pages"]] == pages
+
+    def test_interrupted_run_not_recorded(self, tmp_path):
+        archive = PageArchive(tmp_path)
+        recording = archive.record("crimes", iter([_page(1), _page(2)]))
+        next(recording)
+        recording.close()
+
+        assert archive.runs("crimes") == []
+        assert not archive.has_full_run("crimes")
+
+    def test_replay_starts_at_latest_full_run(self, tmp_path):
+        archive = PageArchive(tmp_path)
+        for where, page in (
+            ("1=1", _page(1)),
+            ("x > 1", _page(2)),
+            ("1=1", _page(3)),
+            ("x > 3", _page(4)),
+        ):
+            list(archive.record("crimes", [page], where))
+
+        assert list(archive.replay("crimes")) == [_page(3), _page(4)]
+
+    def test_prune_keeps_only_what_replay_needs(self, tmp_path):
+        archive = PageArchive(tmp_path)
+        for layer, where, page in (
+            ("crimes", "1=1", _page(1)),
+            ("crimes", "x > 1", _page(2)),
+            ("crimes", "1=1", _page(3)),
+            ("crimes", "x > 3", _page(4)),
+            ("shotspotter", "x > 0", _page(5)),
+        ):
+            list(archive.record(layer, [page], where))
+        replayed = list(archive.replay("crimes"))
+
+        assert archive.prune() == 2
+        assert list(archive.replay("crimes")) == replayed
+        assert [run["where"] for run in archive.runs("crimes")] == ["1=1", "x > 3"]
+        # a layer without a full run keeps everything
+        assert len(archive.runs("shotspotter")) == 1
+        assert len(list((tmp_path / "objects").rglob("*.json.gz"))) == 3
+        assert archive.prune() == 0
+
+    def test_compact_folds_incremental_runs_into_a_full_run(self, tmp_path):
+        archive = PageArchive(tmp_path)
+        list(archive.record("crimes", [_page(1, 2), _page(3)], "1=1"))
+        list(archive.record("crimes", [_page(2, 4)], "x > 1"))
+        assert not archive.compact("crimes", _object_id, max_runs=1)
+
+        updated = [{"attributes": {"OBJECTID": 1, "v": 2}}, {"attributes": {}}]
+        list(archive.record("crimes", [updated], "x > 2"))
+        assert archive.compact("crimes", _object_id, max_runs=1, page_size=2)
+
+        assert archive.prune() == 4
+        (run,) = archive.runs("crimes")
+        assert run["where"] == "1=1" and run["records"] == 5
+        assert list(archive.replay("crimes")) == [
+            [{"attributes": {"OBJECTID": 3}}, {"attributes": {"OBJECTID": 2}}],
+            [{"attributes": {"OBJECTID": 4}}, updated[0]],
+            [updated[1]],
+        ]
+
+    def test_query_key_ignores_param_order(self):
+        assert query_key("1=1", {"a": 1, "b": 2}) == query_key("1=1", {"b": 2, "a": 1})
+        assert query_key("1=1", {}) != query_key("x > 1", {})
@@ -1,5 +1,22 @@
+import json
+import socket
+import threading
+
 import pytest
-from src.database import init_db, get_connection
+from src.database import (
+    LockHeld,
+    advisory_lock,
+    INDEXES,
+    SPATIAL_TABLES,
+    bulk_load_settings,
+    close_connections,
+    connection,
+    create_indexes,
+    drop_indexes,
+    get_connection,
+    init_db,
+)
+from src.streets import label_key, refresh_streets
 
 
 @pytest.fixture
@@ -66,10 +83,262 @@ def test_init_db_is_idempotent(db_path):
     init_db(db_path)
     init_db(db_path)
     conn = get_connection(db_path)
-    expected_tables = {"crimes", "calls_for_service", "shotspotter", "boundaries", "sync_log"}
+    expected_tables = {
+        "crimes", "calls_for_service", "shotspotter", "boundaries", "sync_log",
+        "sync_state", "deleted_records", "backfill_windows", "sync_progress", "locks",
+        "sync_page_stats",
+        *(f"{table}_rtree{suffix}" for table in SPATIAL_TABLES
+          for suffix in ("", "_node", "_parent", "_rowid")),
+        "streets", "blocks", "street_changes", "block_crime_stats", "street_crime_stats",
+        "block_crime_totals", "street_crime_totals", "text_codes",
+        "crime_rollup", "crime_hour_rollup",
+        *(f"block_fts{suffix}" for suffix in ("", "_data", "_idx", "_docsize", "_config")),
+    }
     cursor = conn.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
     )
     tables = {row[0] for row in cursor.fetchall()}
     assert tables == expected_tables
     conn.close()
+
+
+def test_init_db_on_current_schema_writes_nothing(db_path):
+    init_db(db_path)
+    conn = get_connection(db_path)
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    codes = conn.execute("SELECT COUNT(*) FROM text_codes").fetchone()[0]
+    # A sync's committed rows queue street blocks that init_db() leaves to it
+    conn.execute("INSERT INTO crimes (offense_id, block_id) VALUES ('A', 1)")
+    conn.commit()
+    # A sync holding the write lock does not block a page's init_db()
+    conn.execute("BEGIN IMMEDIATE")
+    init_db(db_path)
+    conn.rollback()
+    assert conn.execute("PRAGMA schema_version").fetchone()[0] == version
+    assert conn.execute("SELECT COUNT(*) FROM text_codes").fetchone()[0] == codes
+    conn.close()
+
+
+def _index_names(conn, table):
+    return {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name=? "
+            "AND name NOT LIKE 'sqlite_autoindex%'",
+            (table,),
+        )
+    }
+
+
+def test_drop_and_create_indexes(db_path):
+    init_db(db_path)
+    conn = get_connection(db_path)
+    assert _index_names(conn, "crimes") == set(INDEXES["crimes"])
+    drop_indexes(conn, "crimes")
+    assert _index_names(conn, "crimes") == set()
+    create_indexes(conn, "crimes")
+    assert _index_names(conn, "crimes") == set(INDEXES["crimes"])
+    conn.close()
+
+
+def _queued(conn):
+    return {row[0] for row in conn.execute("SELECT block_id FROM street_changes")}
+
+
+def test_street_triggers_queue_changed_blocks(db_path):
+    init_db(db_path)
+    conn = get_connection(db_path)
+    conn.executemany(
+        "INSERT INTO crimes (offense_id, block_id, row_hash) VALUES (?, ?, ?)",
+        [("A", 1, 10), ("B", 1, 11), ("C", 2, 12), ("D", None, 13)],
+    )
+    assert _queued(conn) == {1, 2}
+    conn.execute("DELETE FROM street_changes")
+    conn.execute("UPDATE crimes SET synced_at = 'now' WHERE offense_id = 'A'")
+    conn.execute("UPDATE crimes SET row_hash = 14 WHERE offense_id = 'A'")
+    assert _queued(conn) == {1}
+    conn.execute("UPDATE crimes SET block_id = 3 WHERE offense_id = 'C'")
+    conn.execute("DELETE FROM crimes WHERE offense_id = 'B'")
+    assert _queued(conn) == {1, 2, 3}
+
+    # Dropped for a bulk load: everything is queued when they come back
+    conn.execute("DELETE FROM street_changes")
+    conn.execute("INSERT INTO block_crime_stats (block_id, crimes) VALUES (9, 1)")
+    drop_indexes(conn, "crimes")
+    conn.execute("INSERT INTO crimes (offense_id, block_id) VALUES ('E', 4)")
+    assert _queued(conn) == set()
+    create_indexes(conn, "crimes")
+    assert _queued(conn) == {1, 3, 4, 9}
+    conn.close()
+
+
+def test_init_db_keys_old_rows_and_retires_address_index(db_path):
+    conn = get_connection(db_path)
+    conn.execute("CREATE TABLE crimes (id INTEGER PRIMARY KEY, offense_id TEXT UNIQUE, "
+                 "address TEXT, report_date TEXT, report_year INTEGER, report_month INTEGER, "
+                 "report_hour INTEGER, report_dow TEXT, district TEXT, beat TEXT, "
+                 "neighborhood TEXT, nibrs_offense TEXT, latitude REAL, longitude REAL)")
+    conn.execute("INSERT INTO crimes (offense_id, nibrs_offense, address) "
+                 "VALUES ('A', 'Robbery', '150 N MAIN ST'), ('B', 'Robbery', NULL)")
+    conn.execute("CREATE TABLE crime_addresses (address TEXT PRIMARY KEY, crimes INTEGER)")
+    conn.execute("CREATE TRIGGER crime_addresses_insert AFTER INSERT ON crimes "
+                 "BEGIN INSERT INTO crime_addresses VALUES (new.address, 1); END")
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    conn = get_connection(db_path)
+    keyed = conn.execute("SELECT offense_id, block_id IS NOT NULL FROM crimes ORDER BY offense_id")
+    assert [tuple(r) for r in keyed] == [("A", 1), ("B", 0)]
+    # Aggregates are left to the sync writer, which finds the block queued
+    assert _queued(conn) == {label_key("100 N MAIN ST")}
+    assert conn.execute("SELECT COUNT(*) FROM block_crime_totals").fetchone()[0] == 0
+    refresh_streets(conn)
+    totals = conn.execute(
+        "SELECT b.label, t.crimes FROM block_crime_totals t JOIN blocks b ON b.id = t.block_id"
+    )
+    assert [tuple(r) for r in totals] == [("100 N MAIN ST", 1)]
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name LIKE 'crime_addresses%'"
+    ).fetchone() is None
+    conn.close()
+
+
+def test_bulk_load_settings_restores_pragmas(db_path):
+    init_db(db_path)
+    conn = get_connection(db_path)
+    before = conn.execute("PRAGMA synchronous").fetchone()[0]
+    with bulk_load_settings(conn):
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == before
+    conn.close()
+
+
+def test_advisory_lock_excludes_second_holder(db_path):
+    init_db(db_path)
+    with advisory_lock(db_path, "sync") as owner:
+        conn = get_connection(db_path)
+        assert conn.execute("SELECT owner FROM locks").fetchone()[0] == owner
+        conn.close()
+        with pytest.raises(LockHeld):
+            with advisory_lock(db_path, "sync"):
+                pass
+    with advisory_lock(db_path, "sync"):  # released on exit
+        pass
+
+
+def test_advisory_lock_takes_over_dead_or_stale_owner(db_path):
+    init_db(db_path)
+    conn = get_connection(db_path)
+    conn.execute(
+        "INSERT INTO locks VALUES ('sync', 'elsewhere:1:1', datetime('now', '-2 hours'), "
+        "datetime('now', '-2 hours'))"
+    )
+    conn.commit()
+    with advisory_lock(db_path, "sync", stale_after=3600):
+        pass
+    conn.execute(
+        "INSERT INTO locks VALUES ('sync', ?, datetime('now'), datetime('now'))",
+        (f"{socket.gethostname()}:999999999:1",),
+    )
+    conn.commit()
+    conn.close()
+    with advisory_lock(db_path, "sync"):
+        pass
+
+
+def test_init_db_adds_epoch_ms_columns_to_old_tables(db_path):
+    conn = get_connection(db_path)
+    conn.execute("CREATE TABLE crimes (id INTEGER PRIMARY KEY, offense_id TEXT UNIQUE, "
+                 "address TEXT, report_date TEXT, report_year INTEGER, report_month INTEGER, "
+                 "report_hour INTEGER, report_dow TEXT, district TEXT, beat TEXT, "
+                 "neighborhood TEXT, nibrs_offense TEXT, latitude REAL, longitude REAL)")
+    conn.execute("INSERT INTO crimes (offense_id, report_date) "
+                 "VALUES ('A', '2023-11-14T22:13:20+00:00'), ('B', NULL)")
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    conn = get_connection(db_path)
+    rows = conn.execute("SELECT offense_id, report_date_ms FROM crimes ORDER BY offense_id")
+    assert [tuple(r) for r in rows] == [("A", 1700000000000), ("B", None)]
+    assert "idx_crimes_report_date_ms" in _index_names(conn, "crimes")
+    conn.close()
+
+
+def test_init_db_derives_boundary_columns_for_old_rows(db_path):
+    conn = get_connection(db_path)
+    conn.execute("CREATE TABLE boundaries (id INTEGER PRIMARY KEY, boundary_type TEXT, "
+                 "name TEXT, geometry_geojson TEXT, UNIQUE(boundary_type, name))")
+    conn.execute("INSERT INTO boundaries (boundary_type, name, geometry_geojson) VALUES "
+                 "('beats', '1A', '{\"rings\": [[[0, 0], [0, 2], [2, 2], [2, 0], [0, 0]]]}')")
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    conn = get_connection(db_path)
+    row = conn.execute("SELECT * FROM boundaries").fetchone()
+    assert json.loads(row["geometry_geojson"])["type"] == "Polygon"
+    assert row["geojson_medium"] is not None
+    assert (row["min_lon"], row["max_lat"], row["centroid_lat"]) == (0, 2, 1)
+    conn.close()
+
+
+def test_connection_is_reused_per_thread(db_path):
+    init_db(db_path)
+    with connection(db_path) as first:
+        pass
+    with connection(db_path) as second:
+        assert second is first
+    other = []
+    thread = threading.Thread(target=lambda: other.append(connection(db_path).__enter__()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+    close_connections()
+    with connection(db_path) as third:
+        assert third is not first
+    close_connections()
+
+
+def test_connection_commits_or_rolls_back(db_path):
+    init_db(db_path)
+    with connection(db_path) as conn:
+        conn.execute("INSERT INTO sync_state (table_name, watermark) VALUES ('a', 1)")
+    with pytest.raises(ZeroDivisionError):
+        with connection(db_path) as conn:
+            conn.execute("INSERT INTO sync_state (table_name, watermark) VALUES ('b', 2)")
+            1 / 0
+    check = get_connection(db_path)
+    assert [r[0] for r in check.execute("SELECT table_name FROM sync_state")] == ["a"]
+    check.close()
+    close_connections()
+
+
+def test_init_db_dictionary_encodes_old_text_columns(db_path):
+    conn = get_connection(db_path)
+    conn.execute("CREATE TABLE crimes (id INTEGER PRIMARY KEY, offense_id TEXT UNIQUE, "
+                 "address TEXT, report_date TEXT, report_year INTEGER, report_month INTEGER, "
+                 "report_hour INTEGER, report_dow TEXT, district TEXT, beat TEXT, "
+                 "neighborhood TEXT, nibrs_offense TEXT, latitude REAL, longitude REAL, "
+                 "source TEXT)")
+    conn.execute("CREATE INDEX idx_crimes_district ON crimes(district)")
+    conn.execute("INSERT INTO crimes (offense_id, district, nibrs_offense, source) VALUES "
+                 "('A', '1', 'Robbery', 'peoria_pd_arcgis'), ('B', '2', 'Robbery', NULL)")
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    conn = get_connection(db_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(crimes)")}
+    assert {"district", "nibrs_offense", "source"}.isdisjoint(columns)
+    rows = conn.execute(
+        "SELECT offense_id, district, nibrs_offense, source FROM crimes_decoded ORDER BY offense_id"
+    )
+    assert [tuple(r) for r in rows] == [
+        ("A", "1", "Robbery", "peoria_pd_arcgis"), ("B", "2", "Robbery", None),
+    ]
+    assert [r[0] for r in conn.execute("SELECT DISTINCT nibrs_offense_code FROM crimes")] == [1]
+    assert _index_names(conn, "crimes") == set(INDEXES["crimes"])
+    conn.close()
+    init_db(db_path)  # nothing left to encode
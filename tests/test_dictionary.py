@@ -0,0 +1,78 @@
+import pytest
+
+from src.database import get_connection, init_db
+from src.dictionary import codes, encode_rows, equals_sql, value_sql
+from src.streets import UNPARSED, address_keys
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = tmp_path / "dictionary.db"
+    init_db(path)
+    conn = get_connection(path)
+    yield conn
+    conn.close()
+
+
+def test_codes_number_new_values_per_field(conn):
+    first = codes(conn, [("district", "1"), ("district", "2"), ("beat", "1A")])
+    assert sorted(first[("district", v)] for v in ("1", "2")) == [1, 2]
+    assert first[("beat", "1A")] == 1
+    again = codes(conn, [("district", "2"), ("district", "3")])
+    assert again == {("district", "2"): first[("district", "2")], ("district", "3"): 3}
+    # The seeded default of crimes.source_code
+    assert codes(conn, [("source", "peoria_pd_arcgis")]) == {("source", "peoria_pd_arcgis"): 1}
+
+
+def test_encode_rows_replaces_text_with_codes(conn):
+    rows = [("A", "Robbery", "1"), ("B", None, "1"), ("C", "Robbery", None)]
+    encoded = encode_rows(conn, {1: "nibrs_offense", 2: "district"}, rows)
+    robbery, district = encoded[0][1], encoded[0][2]
+    assert encoded == [("A", robbery, district), ("B", None, district), ("C", robbery, None)]
+    assert conn.execute(f"SELECT {value_sql('nibrs_offense', '?')}", (robbery,)).fetchone()[0] == "Robbery"
+    assert encode_rows(conn, {}, rows) is rows
+
+
+def test_decoded_view_round_trips_and_filters_by_code(conn):
+    conn.executemany(
+        "INSERT INTO crimes_decoded (offense_id, nibrs_offense, district) VALUES (?, ?, ?)",
+        [("A", "Robbery", "1"), ("B", "Burglary", "1"), ("C", "Robbery", None)],
+    )
+    rows = conn.execute(
+        "SELECT offense_id, nibrs_offense, district, source FROM crimes_decoded ORDER BY offense_id"
+    )
+    assert [tuple(r) for r in rows] == [
+        ("A", "Robbery", "1", "peoria_pd_arcgis"),
+        ("B", "Burglary", "1", "peoria_pd_arcgis"),
+        ("C", "Robbery", None, "peoria_pd_arcgis"),
+    ]
+    matched = conn.execute(
+        f"SELECT offense_id FROM crimes WHERE {equals_sql('nibrs_offense')} ORDER BY offense_id",
+        ("Robbery",),
+    )
+    assert [r[0] for r in matched] == ["A", "C"]
+    # A value never stored matches nothing rather than erroring
+    assert conn.execute(
+        f"SELECT COUNT(*) FROM crimes WHERE {equals_sql('district', 'crimes')}", ("99",)
+    ).fetchone()[0] == 0
+
+
+def test_decoded_view_insert_derives_date_ms_and_street_keys(conn):
+    conn.executemany(
+        "INSERT INTO crimes_decoded (offense_id, address, report_date, report_date_ms) "
+        "VALUES (?, ?, ?, ?)",
+        [("A", "150 N MAIN ST", "2024-06-15T12:00:00+00:00", None),
+         ("B", "100", None, None),
+         ("C", None, "2024-06-15T12:00:00+00:00", 5)],
+    )
+    rows = conn.execute(
+        "SELECT offense_id, report_date_ms, street_id, block_id FROM crimes ORDER BY offense_id"
+    )
+    assert [tuple(r) for r in rows] == [
+        ("A", 1718452800000, *address_keys("150 N MAIN ST")),
+        ("B", None, UNPARSED, None),
+        ("C", 5, None, None),  # given values are kept
+    ]
+    conn.execute("INSERT INTO calls_for_service_decoded (call_id, call_date) "
+                 "VALUES ('X', '1970-01-01T00:00:01+00:00')")
+    assert conn.execute("SELECT call_date_ms FROM calls_for_service").fetchone()[0] == 1000
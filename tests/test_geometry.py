@@ -0,0 +1,78 @@
+import json
+import math
+
+import pytest
+
+from src.geometry import (
+    area_and_centroid,
+    bbox,
+    boundary_columns,
+    contains,
+    rings_to_geojson,
+    simplify,
+    vertex_count,
+)
+
+# ArcGIS winding: outer rings clockwise, holes counter-clockwise
+OUTER = [[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]]
+HOLE = [[2, 2], [4, 2], [4, 4], [2, 4], [2, 2]]
+ISLAND = [[20, 0], [20, 1], [21, 1], [21, 0], [20, 0]]
+
+
+def test_rings_to_geojson_attaches_holes_and_rewinds():
+    geojson = rings_to_geojson({"rings": [HOLE, OUTER]})
+    assert geojson == {"type": "Polygon", "coordinates": [OUTER[::-1], HOLE[::-1]]}
+
+
+def test_rings_to_geojson_multipolygon():
+    geojson = rings_to_geojson({"rings": [OUTER, HOLE, ISLAND]})
+    assert geojson["type"] == "MultiPolygon"
+    assert [len(polygon) for polygon in geojson["coordinates"]] == [2, 1]
+
+
+def test_rings_to_geojson_empty():
+    assert rings_to_geojson(None) is None
+    assert rings_to_geojson({"rings": []}) is None
+    assert boundary_columns(None)["geometry_geojson"] is None
+
+
+def test_area_centroid_and_contains_account_for_holes():
+    geojson = rings_to_geojson({"rings": [OUTER, HOLE]})
+    area, lat, lon = area_and_centroid(geojson)
+    assert area == pytest.approx(96 * 111.32 ** 2 * math.cos(math.radians(lat)))
+    assert (lat, lon) == pytest.approx((488 / 96, 488 / 96))
+    assert contains(geojson, 5, 5)
+    assert not contains(geojson, 3, 3)
+    assert not contains(geojson, 5, 15)
+    assert bbox(geojson) == (0, 0, 10, 10)
+
+
+def test_simplify_drops_near_collinear_vertices_and_keeps_ring_closed():
+    edge = [[k / 100, 0.00001 * (k % 2)] for k in range(101)]
+    ring = edge + [[1, 1], [0, 1], [0, 0]]
+    geojson = rings_to_geojson({"rings": [ring]})
+    assert vertex_count(geojson) == 104
+
+    simplified = simplify(geojson, 0.0001)
+    outer = simplified["coordinates"][0]
+    assert outer[0] == outer[-1]
+    assert sorted(map(tuple, outer[:-1])) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert simplify(geojson, 0.0)["coordinates"][0] == geojson["coordinates"][0]
+
+
+def test_simplify_drops_holes_smaller_than_tolerance():
+    geojson = rings_to_geojson({"rings": [OUTER, HOLE]})
+    assert len(simplify(geojson, 0.5)["coordinates"]) == 2
+    assert simplify(geojson, 5)["coordinates"] == [OUTER[::-1]]
+
+
+def test_boundary_columns_levels_get_smaller():
+    ring = [[-89.6 + 0.01 * math.cos(t / 500 * math.tau) + 0.00002 * (t % 3),
+             40.7 + 0.01 * math.sin(t / 500 * math.tau)] for t in range(500)]
+    columns = boundary_columns({"rings": [ring[::-1] + [ring[-1]]]})
+    sizes = [len(columns[c]) for c in ("geometry_geojson", "geojson_fine", "geojson_medium", "geojson_coarse")]
+    assert sizes == sorted(sizes, reverse=True)
+    assert sizes[-1] < sizes[0] / 4
+    assert json.loads(columns["geojson_medium"])["type"] == "Polygon"
+    assert columns["min_lat"] < columns["centroid_lat"] < columns["max_lat"]
+    assert columns["area_sq_km"] == pytest.approx(math.pi * 1.1132 * 0.8435, rel=0.02)
@@ -0,0 +1,132 @@
+import json
+from unittest.mock import patch, MagicMock
+
+import pytest
+import requests
+
+from src import http_client
+from src.http_client import (
+    ArcGISError,
+    get_json,
+    get_session,
+    get_stats,
+    last_request,
+    reset_stats,
+)
+
+
+def _response(status=200, body=None, headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.content = json.dumps(body or {}).encode()
+    resp.headers = headers or {}
+    if status >= 400:
+        resp.raise_for_status.side_effect = requests.HTTPError(str(status))
+    return resp
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    reset_stats()
+    with patch("src.http_client.time.sleep") as sleep:
+        yield sleep
+
+
+@pytest.fixture
+def session():
+    with patch("src.http_client.get_session") as get:
+        yield get.return_value
+
+
+def test_session_is_shared():
+    assert get_session() is get_session()
+
+
+def test_retries_transient_status_then_succeeds(session, no_sleep):
+    session.get.side_effect = [_response(503), _response(429), _response(body={"ok": 1})]
+
+    assert get_json("http://example.com/query", {}) == {"ok": 1}
+    assert session.get.call_count == 3
+    assert no_sleep.call_count == 2
+
+
+def test_honours_retry_after(session, no_sleep):
+    session.get.side_effect = [_response(429, headers={"Retry-After": "7"}), _response()]
+
+    get_json("http://example.com/query", {})
+
+    no_sleep.assert_called_once_with(7.0)
+
+
+def test_client_error_is_not_retried(session):
+    session.get.return_value = _response(404)
+
+    with pytest.raises(requests.HTTPError):
+        get_json("http://example.com/query", {})
+    assert session.get.call_count == 1
+
+
+def test_gives_up_after_max_retries(session):
+    session.get.side_effect = requests.Timeout("slow")
+
+    with pytest.raises(requests.Timeout):
+        get_json("http://example.com/query", {}, timeout=1)
+    assert session.get.call_count == 6  # first try + HTTP_MAX_RETRIES
+
+
+def test_arcgis_error_body_is_retried_when_transient(session, no_sleep):
+    session.get.side_effect = [
+        _response(body={"error": {"code": 500, "message": "Unable to complete operation."}}),
+        _response(body={"features": []}),
+    ]
+
+    assert get_json("http://example.com/query", {}) == {"features": []}
+    assert no_sleep.call_count == 1
+    assert get_stats()["http://example.com/query"]["retries"] == 1
+
+
+def test_arcgis_error_body_raises(session):
+    session.get.return_value = _response(
+        body={"error": {"code": 400, "message": "Invalid query", "details": ["bad where"]}},
+    )
+
+    with pytest.raises(ArcGISError, match="400.*Invalid query.*bad where") as raised:
+        get_json("http://example.com/query", {})
+    assert raised.value.code == 400
+    assert session.get.call_count == 1
+
+    session.get.return_value = _response(body={"error": {"code": 503, "message": "Busy"}})
+    session.get.reset_mock()
+    with pytest.raises(ArcGISError):
+        get_json("http://example.com/query", {}, max_retries=2)
+    assert session.get.call_count == 3
+
+
+def test_records_stats(session):
+    session.get.side_effect = [_response(502), _response()]
+
+    get_json("http://example.com/query", {})
+
+    stats = get_stats()["http://example.com/query"]
+    assert stats["requests"] == 2
+    assert stats["retries"] == 1
+    assert stats["bytes"] == 4
+
+
+def test_last_request_timings(session):
+    session.get.return_value = _response(body={"features": []})
+
+    get_json("http://example.com/query", {})
+
+    last = last_request()
+    assert last["nbytes"] == len(b'{"features": []}')
+    assert last["latency"] >= 0
+    assert last["decode_seconds"] >= 0
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_decodes_with_or_without_orjson(session, fast):
+    session.get.return_value = _response(body={"features": [{"a": 1}]})
+    orjson = http_client.orjson if fast else None
+    with patch("src.http_client.orjson", orjson):
+        assert get_json("http://example.com/query", {}) == {"features": [{"a": 1}]}
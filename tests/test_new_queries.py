@@ -1,7 +1,10 @@
 """Tests for new query functions: YoY change, street search, recent crimes."""
+from datetime import date
+
 import pytest
 from src.database import init_db, get_connection
 from src.queries import get_yoy_change, search_streets, get_street_crime_summary, get_recent_crimes
+from src.streets import refresh_streets
 
 
 @pytest.fixture
@@ -29,13 +32,14 @@ def db_path(tmp_path):
     ]
     for r in records:
         conn.execute(
-            """INSERT INTO crimes (offense_id, nibrs_offense, address, district, beat,
+            """INSERT INTO crimes_decoded (offense_id, nibrs_offense, address, district, beat,
                neighborhood, report_year, report_month, latitude, longitude,
                report_date)
                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
                printf('%d-%02d-15T12:00:00+00:00', ?, ?))""",
             r + (r[6], r[7]),
         )
+    refresh_streets(conn)  # the street aggregates, as sync builds them
     conn.commit()
     conn.close()
     return path
@@ -81,6 +85,30 @@ def test_street_crime_summary(db_path):
     assert len(summary["by_year"]) == 2  # 2024 and 2025
 
 
+def test_search_streets_is_case_insensitive_and_literal(db_path):
+    assert [r["address"] for r in search_streets(db_path, "  main street ")] == [
+        "100 MAIN ST", "200 MAIN ST",
+    ]
+    assert search_streets(db_path, "MAIN%PEORIA") == []
+    assert len(search_streets(db_path, "ST")) == 3  # shorter than a trigram
+    assert len(search_streets(db_path, "MAIN", limit=1)) == 1
+
+
+def test_street_crime_summary_exact_address(db_path):
+    conn = get_connection(db_path)
+    conn.execute("INSERT INTO crimes_decoded (offense_id, nibrs_offense, address, report_year) "
+                 "VALUES ('X-01', 'Robbery', '1100 MAIN ST PEORIA', 2025)")
+    refresh_streets(conn)
+    conn.commit()
+    conn.close()
+    assert get_street_crime_summary(db_path, "100 MAIN ST")["total"] == 6  # and 1100
+    assert get_street_crime_summary(db_path, "main street")["total"] == 9
+    summary = get_street_crime_summary(db_path, "100 MAIN ST PEORIA", exact=True)
+    assert summary["total"] == 5
+    assert {r["address"] for r in summary["recent"]} == {"100 MAIN ST PEORIA"}
+    assert get_street_crime_summary(db_path, "NONEXISTENT")["total"] == 0
+
+
 def test_get_recent_crimes(db_path):
     recent = get_recent_crimes(db_path, limit=5)
     assert len(recent) == 5
@@ -92,3 +120,9 @@ def test_get_recent_crimes(db_path):
 def test_get_recent_crimes_with_filter(db_path):
     recent = get_recent_crimes(db_path, limit=50, district="10")
     assert len(recent) == 13  # all records are district 10
+
+
+def test_get_recent_crimes_date_window(db_path):
+    recent = get_recent_crimes(db_path, start="2024-11-01", end=date(2025, 2, 1))
+    assert [r["offense_id"] for r in recent] == ["Y2-01", "Y1-08", "Y1-07", "Y1-06"]
+    assert recent[0]["report_date_ms"] == 1736942400000  # 2025-01-15T12:00Z
@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.arcgis_stub import ArcGISStub
+from src import plan_audit
+from src.database import close_connections, get_connection, init_db
+from src.streets import refresh_streets
+from src.sync import FieldMapper
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    """A database of stub-generated rows for every large table, ANALYZEd so
+    the planner sees realistic statistics."""
+    path = tmp_path_factory.mktemp("plan_audit") / "audit.db"
+    init_db(path)
+    stub = ArcGISStub({"crimes": 5000, "calls_for_service": 2000, "shotspotter": 500})
+    conn = get_connection(path)
+    for table in plan_audit.LARGE_TABLES:
+        layer = stub.layers[table]
+        mapper = FieldMapper(table, layer.attributes(0))
+        features = [
+            {"attributes": layer.attributes(i), "geometry": layer.geometry(i)}
+            for i in range(layer.size)
+        ]
+        mapper.write(conn, mapper.rows(features))
+    refresh_streets(conn)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    yield path
+    close_connections()
+
+
+def test_workload_captures_query_layer_sql(db_path):
+    labels = {label for label, _, _ in plan_audit.workload(db_path)}
+    assert "search_streets" in labels
+    assert "get_crime_trend(year, district)" in labels
+    assert "get_time_patterns" in labels
+
+
+def test_no_full_scans(db_path):
+    assert plan_audit.full_scans(db_path) == []
+
+
+def test_detects_full_scan(db_path, monkeypatch):
+    monkeypatch.setattr(plan_audit, "_STATEMENTS", [
+        ("unindexed", "SELECT * FROM crimes WHERE zip = ?", ("61602",)),
+    ])
+    scans = plan_audit.full_scans(db_path)
+    assert scans == [("unindexed", "SELECT * FROM crimes WHERE zip = ?", "SCAN crimes")]
+    assert plan_audit.main(["--db", str(db_path)]) == 1
+
+
+def test_detects_full_scan_under_alias(db_path, monkeypatch):
+    monkeypatch.setattr(plan_audit, "_CALLS", [])
+    monkeypatch.setattr(plan_audit, "_STATEMENTS", [
+        ("aliased", "SELECT t.id FROM crimes t WHERE t.zip = ?", ("61602",)),
+    ])
+    assert [step for _, _, step in plan_audit.full_scans(db_path)] == ["SCAN t"]
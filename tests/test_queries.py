@@ -7,7 +7,16 @@ from src.queries import (
     compute_severity_score,
     get_area_options,
     get_crimes_near_address,
+    get_nearest_crimes,
+    get_points_near,
+    get_boundary_at,
+    get_crime_total,
+    get_monthly_offense_counts,
+    get_records,
+    get_row_count,
+    haversine_miles,
 )
+from src.sync import _BOUNDARIES_INSERT, _boundary_rows
 
 
 @pytest.fixture
@@ -35,7 +44,7 @@ def db_path(tmp_path):
     ]
     for r in records:
         conn.execute(
-            """INSERT INTO crimes
+            """INSERT INTO crimes_decoded
                (offense_id, nibrs_offense, nibrs_description, district, beat, neighborhood,
                 report_year, report_month, latitude, longitude)
                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
@@ -156,3 +165,103 @@ def test_get_crimes_near_address_no_results(db_path):
     """Test that a distant location returns no crimes."""
     result = get_crimes_near_address(db_path, lat=0.0, lon=0.0, radius_miles=0.5)
     assert len(result) == 0
+
+
+def test_get_crimes_near_address_is_a_true_radius(db_path):
+    lat, lon = 40.6936, -89.5890  # OFF001
+    result = get_crimes_near_address(db_path, lat, lon, radius_miles=0.3)
+    conn = get_connection(db_path)
+    expected = {
+        row["offense_id"] for row in conn.execute("SELECT * FROM crimes")
+        if haversine_miles(lat, lon, row["latitude"], row["longitude"]) <= 0.3
+    }
+    conn.close()
+    assert {r["offense_id"] for r in result} == expected
+    assert 0 < len(expected) < 10
+    distances = [r["distance_miles"] for r in result]
+    assert distances == sorted(distances) and distances[0] == 0.0
+
+
+def test_get_crimes_near_address_filters(db_path):
+    result = get_crimes_near_address(db_path, 40.696, -89.587, 1.0, offense="Larceny/Theft Offenses")
+    assert {r["offense_id"] for r in result} == {"OFF007", "OFF008", "OFF009", "OFF010"}
+    conn = get_connection(db_path)
+    conn.execute("UPDATE crimes SET report_date = '2025-0' || report_month || '-15', "
+                 "report_date_ms = report_month")  # ordering is all that matters here
+    conn.commit()
+    conn.close()
+    result = get_crimes_near_address(db_path, 40.696, -89.587, 1.0, start="1970-01-01", sort="date")
+    assert [r["report_month"] for r in result] == sorted(r["report_month"] for r in result)[::-1]
+    with pytest.raises(ValueError):
+        get_crimes_near_address(db_path, 40.696, -89.587, sort="rank")
+
+
+def test_page_totals_and_records(db_path):
+    assert get_row_count(db_path) == 10
+    assert get_row_count(db_path, "shotspotter") == 0
+    assert get_crime_total(db_path) == 10
+    assert get_crime_total(db_path, year=2025, district="10", beat="1A") == 10
+    assert get_crime_total(db_path, year=2024) == 0
+    records = get_records(db_path, "crimes", offense="Assault Offenses", district="10")
+    assert sorted(r["offense_id"] for r in records) == [f"OFF00{i}" for i in range(1, 7)]
+    assert set(records[0]) == {
+        "offense_id", "nibrs_offense", "nibrs_description", "address", "district", "beat",
+        "neighborhood", "report_date", "latitude", "longitude",
+    }
+    assert len(get_records(db_path, "crimes", limit=3)) == 3
+    assert get_records(db_path, "calls_for_service") == []
+
+
+def test_get_monthly_offense_counts(db_path):
+    rows = get_monthly_offense_counts(db_path, [2025])
+    assert [r["report_month"] for r in rows] == [1, 1, 2, 2, 3, 3]
+    assert {(r["report_month"], r["nibrs_offense"]): r["count"] for r in rows} == {
+        (1, "Assault Offenses"): 3, (1, "Larceny/Theft Offenses"): 2,
+        (2, "Assault Offenses"): 2, (2, "Larceny/Theft Offenses"): 1,
+        (3, "Assault Offenses"): 1, (3, "Larceny/Theft Offenses"): 1,
+    }
+    assert get_monthly_offense_counts(db_path, []) == []
+
+
+def test_get_nearest_crimes(db_path):
+    lat, lon = 40.6958, -89.5872
+    conn = get_connection(db_path)
+    by_distance = sorted(
+        conn.execute("SELECT offense_id, latitude, longitude FROM crimes"),
+        key=lambda row: haversine_miles(lat, lon, row["latitude"], row["longitude"]),
+    )
+    conn.close()
+    result = get_nearest_crimes(db_path, lat, lon, k=3)
+    assert [r["offense_id"] for r in result] == [row["offense_id"] for row in by_distance[:3]]
+    assert len(get_nearest_crimes(db_path, 40.696, -89.587, k=50)) == 10
+    assert get_nearest_crimes(db_path, 0.0, 0.0, k=3) == []
+
+
+def test_spatial_index_follows_writes(db_path):
+    conn = get_connection(db_path)
+    conn.execute("UPDATE crimes SET latitude = 40.8, longitude = -89.7 WHERE offense_id = 'OFF001'")
+    conn.execute("DELETE FROM crimes WHERE offense_id = 'OFF002'")
+    conn.commit()
+    conn.close()
+    near = {r["offense_id"] for r in get_crimes_near_address(db_path, 40.696, -89.587, 1.0)}
+    assert near == {f"OFF{i:03d}" for i in range(3, 11)}
+    moved = get_points_near(db_path, "crimes", 40.8, -89.7, 0.1)
+    assert [r["offense_id"] for r in moved] == ["OFF001"]
+
+
+def test_get_boundary_at(db_path):
+    features = [
+        {"attributes": {"district": "1"},
+         "geometry": {"rings": [[[-89.6, 40.6], [-89.6, 40.7], [-89.5, 40.7], [-89.6, 40.6]]]}},
+        {"attributes": {"district": "2"},
+         "geometry": {"rings": [[[-89.6, 40.6], [-89.5, 40.7], [-89.5, 40.6], [-89.6, 40.6]]]}},
+    ]
+    conn = get_connection(db_path)
+    conn.executemany(_BOUNDARIES_INSERT, _boundary_rows("districts", features))
+    conn.commit()
+    conn.close()
+    # Both triangles share a bounding box; the exact test tells them apart
+    assert get_boundary_at(db_path, "districts", 40.68, -89.58) == "1"
+    assert get_boundary_at(db_path, "districts", 40.62, -89.52) == "2"
+    assert get_boundary_at(db_path, "districts", 40.8, -89.55) is None
+    assert get_boundary_at(db_path, "beats", 40.68, -89.58) is None
@@ -0,0 +1,198 @@
+import random
+from collections import Counter
+
+import pytest
+
+from src import queries
+from src.config import CRIME_WEIGHTS, DEFAULT_WEIGHT
+from src.database import close_connections, create_indexes, drop_indexes, get_connection, init_db
+from src.rollup import ROLLUPS, rebuild_rollup
+
+_VALUES = {
+    "district": ["1", "2", "3", None],
+    "beat": ["1A", "1B", "2A", None],
+    "neighborhood": ["Downtown", "West Bluff", None],
+    "nibrs_offense": ["Robbery", "Assault Offenses", "Arson", "Unweighted Offense", None],
+    "report_dow": ["Monday", "Friday", "Sunday", None],
+}
+_COLUMNS = (
+    "offense_id", "report_year", "report_month", "report_hour", *_VALUES,
+)
+
+
+def _random_crime(rng: random.Random, offense_id: str) -> tuple:
+    return (
+        offense_id,
+        rng.choice([2023, 2024, 2025, None]),
+        rng.choice([*range(1, 13), None]),
+        rng.choice([0, 7, 13, 23, None]),
+        *(rng.choice(values) for values in _VALUES.values()),
+    )
+
+
+def _insert(conn, rows):
+    conn.executemany(
+        f"INSERT INTO crimes_decoded ({', '.join(_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+        rows,
+    )
+
+
+def _mutate(conn, rng: random.Random, rounds: int) -> None:
+    """Random inserts, updates (plain and upserts), deletes and re-inserts."""
+    ids = [row[0] for row in conn.execute("SELECT offense_id FROM crimes")]
+    for n in range(rounds):
+        offense_id = rng.choice(ids)
+        action = rng.randrange(5)
+        if action == 0:
+            conn.execute("DELETE FROM crimes WHERE offense_id = ?", (offense_id,))
+            ids.remove(offense_id)
+        elif action == 1:
+            field = rng.choice(list(_VALUES))
+            conn.execute(
+                f"UPDATE crimes SET {field}_code = "
+                f"(SELECT code FROM text_codes WHERE field = '{field}' AND value = ?) "
+                f"WHERE offense_id = ?",
+                (rng.choice(_VALUES[field]), offense_id),
+            )
+        elif action == 2:
+            conn.execute(
+                "INSERT INTO crimes (offense_id, report_hour, report_month) VALUES (?, ?, ?) "
+                "ON CONFLICT(offense_id) DO UPDATE SET "
+                "report_hour = excluded.report_hour, report_month = excluded.report_month",
+                (offense_id, rng.choice([1, 2, None]), rng.choice([1, 6, None])),
+            )
+        elif action == 3:
+            conn.execute("UPDATE crimes SET row_hash = ? WHERE offense_id = ?", (n, offense_id))
+        else:
+            _insert(conn, [_random_crime(rng, f"NEW-{n}")])
+            ids.append(f"NEW-{n}")
+
+
+def _raw_rows(conn) -> list[dict]:
+    return [
+        dict(row) for row in
+        conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM crimes_decoded")
+    ]
+
+
+def _matches(row: dict, **filters) -> bool:
+    return all(value is None or row[field] == value for field, value in filters.items())
+
+
+def _weight(offense) -> float:
+    return CRIME_WEIGHTS.get(offense, DEFAULT_WEIGHT) if offense else DEFAULT_WEIGHT
+
+
+def _nulls_first(key):
+    return tuple((value is not None, value) for value in key)
+
+
+def _expected_yoy(rows: list[dict]) -> dict:
+    counts = Counter(row["report_year"] for row in rows)
+    months = {year: set() for year in counts}
+    for row in rows:
+        if row["report_month"] is not None:
+            months[row["report_year"]].add(row["report_month"])
+    ordered = sorted(counts.items(), key=lambda item: _nulls_first(item[:1]), reverse=True)
+    full = [(year, count) for year, count in ordered if len(months[year]) >= 10]
+    candidates = full if len(full) >= 2 else ordered
+    if len(candidates) < 2:
+        return {"current_year": candidates[0][0] if candidates else None,
+                "current": candidates[0][1] if candidates else 0,
+                "previous": 0, "change_pct": None}
+    (current_year, current), (previous_year, previous) = candidates[:2]
+    change = (current - previous) / previous * 100 if previous else None
+    return {"current_year": current_year, "current": current,
+            "previous_year": previous_year, "previous": previous,
+            "change_pct": round(change, 1) if change is not None else None}
+
+
+def _assert_matches_raw(db_path, conn) -> None:
+    rows = _raw_rows(conn)
+    for area in ("district", "beat", "neighborhood", "report_year"):
+        for year in (None, 2024):
+            expected = Counter(row[area] for row in rows if _matches(row, report_year=year))
+            assert queries.get_crime_counts_by_area(db_path, area, year) == {
+                key: count for key, count in expected.items() if key
+            }
+    for filters in ({}, {"district": "1"}, {"beat": "2A"}, {"neighborhood": "Downtown"},
+                    {"report_year": 2025, "district": "2"}):
+        selected = [row for row in rows if _matches(row, **filters)]
+        area = {k: v for k, v in filters.items() if k != "report_year"}
+        year = filters.get("report_year")
+
+        trend = Counter((row["report_year"], row["report_month"]) for row in selected)
+        assert queries.get_crime_trend(db_path, year, **area) == [
+            {"year": y, "month": m, "count": trend[y, m]}
+            for y, m in sorted(trend, key=_nulls_first)
+        ]
+        assert queries.compute_severity_score(db_path, year=year, **area) == float(
+            sum(_weight(row["nibrs_offense"]) for row in selected)
+        )
+        if year is None:
+            types = Counter(row["nibrs_offense"] for row in selected if row["nibrs_offense"])
+            top = sorted(types.items(), key=lambda item: (-item[1], item[0]))[:3]
+            assert queries.get_top_crime_types(db_path, limit=3, **area) == [
+                {"type": offense, "count": count} for offense, count in top
+            ]
+            assert queries.get_yoy_change(db_path, **area) == _expected_yoy(selected)
+    patterns = Counter(
+        (row["report_dow"], row["report_hour"]) for row in rows
+        if row["report_dow"] is not None and row["report_hour"] is not None
+    )
+    found = queries.get_time_patterns(db_path)
+    assert sorted(found, key=lambda row: (row["report_dow"], row["report_hour"])) == [
+        {"report_dow": dow, "report_hour": hour, "count": patterns[dow, hour]}
+        for dow, hour in sorted(patterns)
+    ]
+
+
+def _cells(conn, rollup: str) -> Counter:
+    return Counter(tuple(row) for row in conn.execute(f"SELECT * FROM {rollup}"))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rollup_answers_match_raw_table(tmp_path, seed):
+    rng = random.Random(seed)
+    db_path = tmp_path / "rollup.db"
+    init_db(db_path)
+    conn = get_connection(db_path)
+    _insert(conn, [_random_crime(rng, f"OFF-{i}") for i in range(300)])
+    conn.commit()
+    _assert_matches_raw(db_path, conn)
+
+    _mutate(conn, rng, 200)
+    conn.commit()
+    _assert_matches_raw(db_path, conn)
+
+    # The incrementally maintained cells are exactly a fresh rebuild's
+    for rollup in ROLLUPS:
+        maintained = _cells(conn, rollup)
+        rebuild_rollup(conn, rollup)
+        assert _cells(conn, rollup) == maintained
+        assert conn.execute(f"SELECT COUNT(*) FROM {rollup} WHERE crimes = 0").fetchone()[0] == 0
+    conn.close()
+    close_connections()
+
+
+def test_rollup_rebuilt_after_bulk_load_and_weight_change(tmp_path, monkeypatch):
+    db_path = tmp_path / "rollup.db"
+    init_db(db_path)
+    conn = get_connection(db_path)
+    drop_indexes(conn, "crimes")
+    _insert(conn, [("A", 2024, 1, 1, "1", "1A", None, "Robbery", "Monday"),
+                   ("B", 2024, 1, 1, "1", "1A", None, "Robbery", "Monday")])
+    assert conn.execute("SELECT COUNT(*) FROM crime_rollup").fetchone()[0] == 0
+    create_indexes(conn, "crimes")
+    conn.commit()
+    assert conn.execute("SELECT crimes, severity FROM crime_rollup").fetchone()[:] == (
+        2, 2 * CRIME_WEIGHTS["Robbery"],
+    )
+
+    monkeypatch.setitem(CRIME_WEIGHTS, "Robbery", 100)
+    create_indexes(conn, "crimes")  # as init_db() does on the next start
+    conn.commit()
+    assert queries.compute_severity_score(db_path) == 200.0
+    conn.close()
+    close_connections()
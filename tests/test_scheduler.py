@@ -0,0 +1,72 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.database import LockHeld, advisory_lock, init_db
+from src.scheduler import run_daemon, run_job
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test_scheduler.db"
+    init_db(path)
+    return path
+
+
+def _stop_after(n, stop, result=0):
+    """side_effect that returns ``result`` and sets ``stop`` on the nth call."""
+    calls = []
+
+    def effect(*args, **kwargs):
+        calls.append(args)
+        if len(calls) >= n:
+            stop.set()
+        return result
+
+    return effect
+
+
+def test_run_job_dispatch(db_path):
+    with patch.dict("src.scheduler.SYNC_FUNCTIONS", {"crimes": lambda db, **kw: kw}):
+        assert run_job(db_path, "crimes") == {"incremental": True}
+    with patch("src.scheduler.reconcile_deletions", return_value={"crimes": 0}):
+        assert run_job(db_path, "reconcile") == {"crimes": 0}
+
+
+@patch("src.scheduler.run_job")
+def test_runs_each_job_on_its_interval(mock_job, db_path):
+    stop = threading.Event()
+    mock_job.side_effect = _stop_after(4, stop)
+
+    run_daemon(db_path, {"crimes": 0.01, "boundaries": 3600}, stop=stop)
+
+    jobs = [call.args[1] for call in mock_job.call_args_list]
+    assert sorted(jobs[:2]) == ["boundaries", "crimes"]  # both due at startup
+    assert jobs[2:] == ["crimes", "crimes"]
+
+
+@patch("src.scheduler.LOCK_RETRY_SECONDS", 0.01)
+@patch("src.scheduler.run_job")
+def test_retries_when_locked_and_survives_failures(mock_job, db_path):
+    stop = threading.Event()
+    outcomes = iter([LockHeld("busy"), RuntimeError("upstream 500"), 5])
+
+    def effect(*args):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        stop.set()
+        return outcome
+
+    mock_job.side_effect = effect
+    run_daemon(db_path, {"crimes": 0.01}, stop=stop)
+    assert mock_job.call_count == 3
+
+
+def test_sync_refuses_while_locked(db_path):
+    from src.sync import sync_crimes
+
+    with advisory_lock(db_path, "sync"):
+        with pytest.raises(LockHeld):
+            sync_crimes(db_path)
@@ -0,0 +1,129 @@
+import pytest
+
+from src.config import CRIME_WEIGHTS, DEFAULT_WEIGHT
+from src.database import get_connection, init_db
+from src.streets import (
+    Address,
+    address_keys,
+    label_key,
+    normalize_query,
+    parse_address,
+    refresh_streets,
+    UNPARSED,
+)
+
+
+@pytest.mark.parametrize("text", [
+    "100 BLK N MAIN ST PEORIA", "150 n main street", "199 N. Main St, Peoria IL",
+    "100 BLOCK OF NORTH MAIN ST", "100-199 N MAIN ST APT 4", "N MAIN ST & ADAMS ST",
+])
+def test_spellings_parse_to_one_street(text):
+    address = parse_address(text)
+    assert address.street == "N MAIN ST"
+    assert address_keys(text)[0] == label_key("N MAIN ST")
+
+
+def test_parse_address():
+    assert parse_address("2215 W KNOXVILLE AVENUE") == Address(2200, "W KNOXVILLE", "AVE")
+    assert parse_address("2215 W KNOXVILLE AVENUE").label == "2200 W KNOXVILLE AVE"
+    assert parse_address("ST JAMES ST").label == "ST JAMES ST"  # "ST" as a name
+    assert parse_address("WAR MEMORIAL") == Address(None, "WAR MEMORIAL", "")
+    assert parse_address("") is None
+    assert parse_address("100") is None
+    assert address_keys(None) == (None, None)
+    assert address_keys("100") == (UNPARSED, None)
+
+
+def test_normalize_query():
+    assert normalize_query("150 blk north main street") == "100 N MAIN ST"
+    assert normalize_query("  war memorial ") == "WAR MEMORIAL"
+
+
+def _insert(conn, *rows):
+    conn.executemany(
+        "INSERT INTO crimes_decoded (offense_id, nibrs_offense, address, report_year, "
+        "report_date_ms, latitude, longitude) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def _totals(conn, level):
+    return {
+        row[0]: tuple(row[1:]) for row in conn.execute(
+            f"SELECT d.label, t.crimes, t.severity, t.first_date_ms, t.last_date_ms "
+            f"FROM {level}_crime_totals t JOIN {level}s d ON d.id = t.{level}_id"
+        )
+    }
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = tmp_path / "streets.db"
+    init_db(path)
+    conn = get_connection(path)
+    _insert(
+        conn,
+        ("A", "Robbery", "110 MAIN ST", 2024, 1000, 40.0, -89.0),
+        ("B", "Assault Offenses", "120 main street", 2025, 3000, 42.0, -89.0),
+        ("C", "Robbery", "250 MAIN ST", 2025, 2000, None, None),
+        ("D", "Robbery", "5 ADAMS ST", 2025, 4000, 40.0, -89.0),
+        ("E", "Robbery", None, 2025, 5000, 40.0, -89.0),
+    )
+    assert refresh_streets(conn) == 3
+    yield conn
+    conn.close()
+
+
+def test_refresh_builds_block_and_street_aggregates(conn):
+    robbery = CRIME_WEIGHTS.get("Robbery", DEFAULT_WEIGHT)
+    assault = CRIME_WEIGHTS.get("Assault Offenses", DEFAULT_WEIGHT)
+    assert _totals(conn, "block") == {
+        "100 MAIN ST": (2, robbery + assault, 1000, 3000),
+        "200 MAIN ST": (1, robbery, 2000, 2000),
+        "0 ADAMS ST": (1, robbery, 4000, 4000),
+    }
+    assert _totals(conn, "street") == {
+        "MAIN ST": (3, 2 * robbery + assault, 1000, 3000),
+        "ADAMS ST": (1, robbery, 4000, 4000),
+    }
+    # Centroids average the located crimes only
+    assert conn.execute(
+        "SELECT centroid_lat FROM street_crime_totals WHERE street_id = ?",
+        (label_key("MAIN ST"),),
+    ).fetchone()[0] == 41.0
+    assert conn.execute("SELECT COUNT(*) FROM street_changes").fetchone()[0] == 0
+
+
+def test_refresh_is_incremental(conn):
+    assert refresh_streets(conn) == 0
+    conn.execute("UPDATE crimes SET address = '7 ADAMS ST', block_id = NULL WHERE offense_id = 'C'")
+    conn.execute("DELETE FROM crimes WHERE offense_id = 'A'")
+    assert refresh_streets(conn) == 3  # 100 and 200 MAIN ST, 0 ADAMS ST
+    totals = _totals(conn, "block")
+    assert "200 MAIN ST" not in totals
+    assert totals["100 MAIN ST"][0] == 1
+    assert totals["0 ADAMS ST"][0] == 2
+    assert _totals(conn, "street")["MAIN ST"][0] == 1
+
+    conn.execute("INSERT INTO text_codes VALUES ('nibrs_offense', 99, 'Homicide Offenses')")
+    conn.execute("UPDATE crimes SET nibrs_offense_code = 99, row_hash = 1 WHERE offense_id = 'B'")
+    assert refresh_streets(conn) == 1
+    stats = conn.execute(
+        "SELECT nibrs_offense, crimes FROM block_crime_stats WHERE block_id = ?",
+        (label_key("100 MAIN ST"),),
+    )
+    assert [tuple(r) for r in stats] == [("Homicide Offenses", 1)]
+
+
+def test_unparseable_addresses_are_parsed_once(conn, monkeypatch):
+    _insert(conn, ("F", "Robbery", "100", 2025, 6000, 40.0, -89.0))
+    conn.execute("UPDATE crimes SET street_id = NULL WHERE offense_id = 'F'")
+    assert refresh_streets(conn) == 0
+    assert conn.execute(
+        "SELECT street_id, block_id FROM crimes WHERE offense_id = 'F'"
+    ).fetchone()[:] == (UNPARSED, None)
+
+    parsed = []
+    monkeypatch.setattr("src.streets.address_keys", lambda text: parsed.append(text))
+    assert refresh_streets(conn) == 0
+    assert parsed == []
@@ -1,19 +1,46 @@
 import json
+import socket
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 
 import pytest
 
-from src.database import init_db, get_connection
+from benchmarks.arcgis_stub import ArcGISStub
+from src.archive import PageArchive
+from src.config import ENDPOINTS
+from src.database import INDEXES, advisory_lock, drop_indexes, init_db, get_connection
+from src.http_client import ArcGISError
+from src.streets import label_key, refresh_streets
 from src.sync import (
     fetch_arcgis_page,
     fetch_all_records,
+    iter_pages,
+    iter_pages_parallel,
+    fetch_object_ids,
     _ts_to_iso,
+    _ts_to_iso_many,
     sync_crimes,
     sync_calls_for_service,
     sync_shotspotter,
     sync_boundaries,
     run_full_sync,
-    _log_sync,
+    _incremental_where,
+    get_watermark,
+    FieldMapper,
+    reconcile_deletions,
+    _sorted_difference,
+    _layer_query,
+    bytes_per_record,
+    SyncResult,
+    replay_archive,
+    fetch_layer_info,
+    backfill,
+    backfill_windows,
+    main,
+    sync_status,
+    SYNC_LOCK,
+    FeaturePage,
+    _percentile,
 )
 
 
@@ -28,6 +55,21 @@ def db_path(tmp_path):
     return path
 
 
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path):
+    """Record fetched pages under the test's tmp dir, not the project."""
+    path = tmp_path / "archive"
+    with patch("src.sync.ARCHIVE_DIR", path):
+        yield path
+
+
+@pytest.fixture(autouse=True)
+def layer_info():
+    """Layer metadata without a field list, so syncs request all fields."""
+    with patch("src.sync.fetch_layer_info", return_value={}) as mock_info:
+        yield mock_info
+
+
 # ---------------------------------------------------------------------------
 # Helpers to build fake ArcGIS feature dicts
 # ---------------------------------------------------------------------------
@@ -62,6 +104,11 @@ def _make_crime_feature(offense_id="OFF-001", call_id="CALL-001", lat=40.7, lon=
     }
 
 
+def _with_oid(feature, oid):
+    feature["attributes"]["OBJECTID"] = oid
+    return feature
+
+
 def _make_call_feature(call_id="CFS-001"):
     return {
         "attributes": {
@@ -120,21 +167,89 @@ class TestTsToIso:
         assert result is not None
         assert "1970" in result
 
+    def test_page_conversion_matches_per_row(self):
+        values = [1700000000000, 1700000000123, None, 0, -86400001, 1.7e12]
+        assert _ts_to_iso_many(values) == [_ts_to_iso(v) for v in values]
+        assert _ts_to_iso_many([None, None]) == [None, None]
+        assert _ts_to_iso_many([]) == []
+
+
+# ---------------------------------------------------------------------------
+# Tests for FieldMapper
+# ---------------------------------------------------------------------------
+
+class TestFieldMapper:
+    def test_resolves_fields_ignoring_case(self):
+        mapper = FieldMapper("calls_for_service", [
+            "CallID", "CallType", "Priority", "Disposition", "FullAddr",
+            "Beat", "District", "CallDate",
+        ])
+        row = mapper.row(
+            {"CallID": "C1", "CallType": "ALARM", "Priority": "P2",
+             "Disposition": "GOA", "FullAddr": "1 MAIN ST", "Beat": "1A",
+             "District": "1", "CallDate": 0},
+            {"x": -89.5, "y": 40.6},
+        )
+        assert dict(zip(mapper.columns, row)) == {
+            "call_id": "C1", "call_type": "ALARM", "priority": "P2",
+            "disposition": "GOA", "address": "1 MAIN ST", "beat": "1A",
+            "district": "1", "call_date": "1970-01-01T00:00:00+00:00",
+            "call_date_ms": 0, "latitude": 40.6, "longitude": -89.5,
+            "street_id": label_key("MAIN ST"), "block_id": label_key("0 MAIN ST"),
+        }
+        assert mapper.ts_key == "CallDate"
+
+    def test_address_keys_excluded_from_row_hash(self):
+        mapper = FieldMapper("crimes", _make_crime_feature()["attributes"])
+        spelled = _make_crime_feature()
+        spelled["attributes"]["fulladdr"] = "100 N Main Street"
+        abbreviated = _make_crime_feature()
+        abbreviated["attributes"]["fulladdr"] = "150 NORTH MAIN ST"
+        first, second = (dict(zip(mapper.columns + ["row_hash"], row))
+                         for row in mapper.rows([spelled, abbreviated]))
+        assert first["block_id"] == second["block_id"] == label_key("100 N MAIN ST")
+        assert first["row_hash"] != second["row_hash"]
+
+    def test_unmapped_columns_left_out_of_insert(self):
+        mapper = FieldMapper("shotspotter", ["ShotSpotter_ID", "Date"])
+        assert mapper.columns == [
+            "incident_id", "event_date_ms", "event_date", "latitude", "longitude",
+        ]
+        assert mapper.insert_sql.count("?") == 6  # plus row_hash
+        assert mapper.source_fields == ["ShotSpotter_ID", "Date"]
+
+    def test_missing_attribute_and_geometry(self):
+        mapper = FieldMapper("shotspotter", ["ShotSpotter_ID", "Date"])
+        assert mapper.row({"ShotSpotter_ID": "S1"}, {})[:-1] == ("S1", None, None, None, None)
+
+    def test_row_hash_tracks_content(self):
+        mapper = FieldMapper("crimes", _make_crime_feature()["attributes"])
+        original = _make_crime_feature()
+        edited = _make_crime_feature()
+        edited["attributes"]["nibrsoffense"] = "Robbery"
+        rows = mapper.rows([original, _make_crime_feature(), edited])
+        assert rows[0][-1] == rows[1][-1]
+        assert rows[0][-1] != rows[2][-1]
+
+    def test_max_timestamp(self):
+        mapper = FieldMapper("crimes", _make_crime_feature()["attributes"])
+        older = _make_crime_feature("OFF-2")
+        older["attributes"]["reportdate"] = 5
+        features = [older, _make_crime_feature(), {"attributes": {"reportdate": None}}]
+        assert mapper.max_timestamp(features) == 1700000000000
+
 
 # ---------------------------------------------------------------------------
 # Tests for fetch_arcgis_page
 # ---------------------------------------------------------------------------
 
 class TestFetchArcgisPage:
-    @patch("src.sync.requests.get")
+    @patch("src.sync.get_json")
     def test_returns_features_and_has_more_true(self, mock_get):
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = {
+        mock_get.return_value = {
             "features": [{"attributes": {"id": 1}}],
             "exceededTransferLimit": True,
         }
-        mock_resp.raise_for_status = MagicMock()
-        mock_get.return_value = mock_resp
 
         features, has_more = fetch_arcgis_page("http://example.com/layer", offset=0)
 
@@ -142,47 +257,62 @@ class TestFetchArcgisPage:
         assert has_more is True
         mock_get.assert_called_once()
         call_kwargs = mock_get.call_args
-        assert call_kwargs[1]["params"]["outFields"] == "*"
-        assert call_kwargs[1]["params"]["f"] == "json"
-        assert call_kwargs[1]["params"]["outSR"] == 4326
+        assert call_kwargs[0][1]["outFields"] == "*"
+        assert call_kwargs[0][1]["f"] == "json"
+        assert call_kwargs[0][1]["outSR"] == 4326
 
-    @patch("src.sync.requests.get")
+    @patch("src.sync.get_json")
     def test_returns_features_and_has_more_false(self, mock_get):
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = {
+        mock_get.return_value = {
             "features": [{"attributes": {"id": 1}}],
         }
-        mock_resp.raise_for_status = MagicMock()
-        mock_get.return_value = mock_resp
 
         features, has_more = fetch_arcgis_page("http://example.com/layer", offset=0)
 
         assert len(features) == 1
         assert has_more is False
 
-    @patch("src.sync.requests.get")
+    @patch("src.sync.get_json")
     def test_empty_response(self, mock_get):
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = {"features": []}
-        mock_resp.raise_for_status = MagicMock()
-        mock_get.return_value = mock_resp
+        mock_get.return_value = {"features": []}
 
         features, has_more = fetch_arcgis_page("http://example.com/layer", offset=0)
 
         assert features == []
         assert has_more is False
 
-    @patch("src.sync.requests.get")
+    @patch("src.sync.get_json")
     def test_passes_where_clause(self, mock_get):
-        mock_resp = MagicMock()
-        mock_resp.json.return_value = {"features": []}
-        mock_resp.raise_for_status = MagicMock()
-        mock_get.return_value = mock_resp
+        mock_get.return_value = {"features": []}
 
         fetch_arcgis_page("http://example.com/layer", offset=0, where="status='open'")
 
         call_kwargs = mock_get.call_args
-        assert call_kwargs[1]["params"]["where"] == "status='open'"
+        assert call_kwargs[0][1]["where"] == "status='open'"
+
+    @patch("src.sync.get_json")
+    def test_trimmed_query(self, mock_get):
+        mock_get.return_value = {"features": []}
+
+        fetch_arcgis_page(
+            "http://example.com/layer", out_fields="a,b", page_size=500,
+        )
+
+        params = mock_get.call_args[0][1]
+        assert params["outFields"] == "a,b"
+        assert params["resultRecordCount"] == 500
+        assert params["geometryPrecision"] == 6
+        assert "returnGeometry" not in params
+
+    @patch("src.sync.get_json")
+    def test_without_geometry(self, mock_get):
+        mock_get.return_value = {"features": []}
+
+        fetch_arcgis_page("http://example.com/layer", return_geometry=False)
+
+        params = mock_get.call_args[0][1]
+        assert params["returnGeometry"] == "false"
+        assert "geometryPrecision" not in params
 
 
 # ---------------------------------------------------------------------------
@@ -207,18 +337,126 @@ class TestFetchAllRecords:
         assert len(result) == 3
         assert mock_page.call_count == 2
 
+    @patch("src.sync.fetch_arcgis_page")
+    def test_iter_pages_is_lazy(self, mock_page):
+        mock_page.side_effect = [
+            ([{"id": 1}, {"id": 2}], True),
+            ([{"id": 3}], False),
+        ]
+        pages = iter_pages("http://example.com/layer")
+        assert next(pages) == [{"id": 1}, {"id": 2}]
+        assert mock_page.call_count == 1
+        assert list(pages) == [[{"id": 3}]]
+        assert mock_page.call_args[0][1] == 2
+
+
+# ---------------------------------------------------------------------------
+# Tests for parallel OBJECTID-chunked fetching
+# ---------------------------------------------------------------------------
+
+class TestParallelFetch:
+    @patch("src.sync.get_json")
+    def test_fetch_object_ids(self, mock_get):
+        mock_get.return_value = {
+            "objectIdFieldName": "FID",
+            "objectIds": [5, 3, 1],
+        }
+
+        field, ids = fetch_object_ids("http://example.com/layer")
+
+        assert field == "FID"
+        assert ids == [1, 3, 5]
+        assert mock_get.call_args[0][1]["returnIdsOnly"] == "true"
+
+    @patch("src.sync.fetch_arcgis_page")
+    @patch("src.sync.fetch_object_ids")
+    def test_fetches_every_chunk(self, mock_ids, mock_page):
+        mock_ids.return_value = ("OBJECTID", list(range(1, 11)))
+        mock_page.side_effect = lambda url, offset, where, **query: (
+            [{"where": where}], False
+        )
+
+        pages = list(iter_pages_parallel(
+            "http://example.com/layer", workers=3, chunk_size=3,
+        ))
+
+        wheres = sorted(p[0]["where"] for p in pages)
+        assert wheres == sorted([
+            "(1=1) AND OBJECTID >= 1 AND OBJECTID <= 3",
+            "(1=1) AND OBJECTID >= 4 AND OBJECTID <= 6",
+            "(1=1) AND OBJECTID >= 7 AND OBJECTID <= 9",
+            "(1=1) AND OBJECTID >= 10 AND OBJECTID <= 10",
+        ])
+
+    @patch("src.sync.fetch_object_ids")
+    def test_empty_layer(self, mock_ids):
+        mock_ids.return_value = ("OBJECTID", [])
+        assert list(iter_pages_parallel("http://example.com/layer")) == []
+
+    @patch("src.sync.iter_pages")
+    @patch("src.sync.iter_pages_parallel")
+    def test_sync_uses_parallel_when_workers_set(self, mock_parallel, mock_pages, db_path):
+        mock_parallel.return_value = [
+            [_make_crime_feature("OFF-001")],
+            [_make_crime_feature("OFF-002")],
+        ]
+        count = sync_crimes(db_path, workers=4)
+        assert count == 2
+        mock_pages.assert_not_called()
+        assert mock_parallel.call_args[0][2] == 4
+
+
+# ---------------------------------------------------------------------------
+# Tests for per-layer query options
+# ---------------------------------------------------------------------------
+
+class TestLayerQuery:
+    def test_requests_only_mapped_fields(self):
+        fields = list(_make_crime_feature()["attributes"]) + ["Shape__Area", "GlobalID"]
+        query = _layer_query("crimes", {}, FieldMapper("crimes", fields))
+
+        out_fields = query["out_fields"].split(",")
+        assert "offenseid" in out_fields
+        assert "reportdate" in out_fields
+        assert "GlobalID" not in out_fields
+        assert query["return_geometry"] is True
+
+    def test_page_size_capped_by_layer(self):
+        assert _layer_query("crimes", {})["page_size"] == 2000
+        assert _layer_query("crimes", {"maxRecordCount": 1000})["page_size"] == 1000
+        assert _layer_query("beats", {})["page_size"] == 500
+
+    @patch("src.sync.iter_pages")
+    def test_sync_uses_layer_metadata(self, mock_pages, layer_info, db_path):
+        feature = _make_crime_feature("OFF-001")
+        layer_info.return_value = {
+            "fields": [{"name": name} for name in feature["attributes"]] + [{"name": "GlobalID"}],
+            "maxRecordCount": 1000,
+        }
+        mock_pages.return_value = [[feature]]
+
+        assert sync_crimes(db_path) == 1
+        query = mock_pages.call_args[1]
+        assert "GlobalID" not in query["out_fields"]
+        assert query["page_size"] == 1000
+
+    def test_bytes_per_record(self):
+        result = SyncResult({"crimes": 4}, {}, {"crimes": 4, "shotspotter": 0})
+        stats = {f"{ENDPOINTS['crimes']}/query": {"bytes": 2000}}
+        assert bytes_per_record(result, stats) == {"crimes": 500}
+
 
 # ---------------------------------------------------------------------------
 # Tests for sync_crimes
 # ---------------------------------------------------------------------------
 
 class TestSyncCrimes:
-    @patch("src.sync.fetch_all_records")
-    def test_inserts_records(self, mock_fetch, db_path):
-        mock_fetch.return_value = [
+    @patch("src.sync.iter_pages")
+    def test_inserts_records(self, mock_pages, db_path):
+        mock_pages.return_value = [[
             _make_crime_feature("OFF-001"),
             _make_crime_feature("OFF-002"),
-        ]
+        ]]
         count = sync_crimes(db_path)
         assert count == 2
 
@@ -229,20 +467,36 @@ class TestSyncCrimes:
         assert rows[0]["address"] == "123 MAIN ST"
         assert rows[0]["latitude"] == 40.7
         assert rows[0]["report_year"] == 2023
+        assert rows[0]["report_date"] == "2023-11-14T22:13:20+00:00"
+        assert rows[0]["report_date_ms"] == 1700000000000
         conn.close()
 
-    @patch("src.sync.fetch_all_records")
-    def test_skips_duplicates(self, mock_fetch, db_path):
-        mock_fetch.return_value = [
+    @patch("src.sync.iter_pages")
+    def test_skips_duplicates(self, mock_pages, db_path):
+        mock_pages.return_value = [[
             _make_crime_feature("OFF-001"),
             _make_crime_feature("OFF-001"),  # duplicate
-        ]
+        ]]
         count = sync_crimes(db_path)
         assert count == 1
 
-    @patch("src.sync.fetch_all_records")
-    def test_report_date_converted(self, mock_fetch, db_path):
-        mock_fetch.return_value = [_make_crime_feature("OFF-003")]
+    @patch("src.sync.iter_pages")
+    def test_streams_pages_in_batches(self, mock_pages, db_path):
+        mock_pages.return_value = [
+            [_make_crime_feature(f"OFF-{p}-{i}") for i in range(5)]
+            for p in range(3)
+        ]
+        count = sync_crimes(db_path, batch_size=4)
+        assert count == 15
+
+        conn = get_connection(db_path)
+        log = conn.execute("SELECT peak_memory_kb FROM sync_log").fetchone()
+        assert log["peak_memory_kb"] is not None
+        conn.close()
+
+    @patch("src.sync.iter_pages")
+    def test_report_date_converted(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-003")]]
         sync_crimes(db_path)
 
         conn = get_connection(db_path)
@@ -251,9 +505,9 @@ class TestSyncCrimes:
         assert "2023" in row["report_date"]
         conn.close()
 
-    @patch("src.sync.fetch_all_records")
-    def test_logs_sync(self, mock_fetch, db_path):
-        mock_fetch.return_value = [_make_crime_feature("OFF-010")]
+    @patch("src.sync.iter_pages")
+    def test_logs_sync(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-010")]]
         sync_crimes(db_path)
 
         conn = get_connection(db_path)
@@ -271,24 +525,24 @@ class TestSyncCrimes:
 # ---------------------------------------------------------------------------
 
 class TestSyncCallsForService:
-    @patch("src.sync.fetch_all_records")
-    def test_inserts_records(self, mock_fetch, db_path):
-        mock_fetch.return_value = [_make_call_feature("CFS-001")]
+    @patch("src.sync.iter_pages")
+    def test_inserts_records(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_call_feature("CFS-001")]]
         count = sync_calls_for_service(db_path)
         assert count == 1
 
         conn = get_connection(db_path)
-        row = conn.execute("SELECT * FROM calls_for_service").fetchone()
+        row = conn.execute("SELECT * FROM calls_for_service_decoded").fetchone()
         assert row["call_id"] == "CFS-001"
         assert row["call_type"] == "DISTURBANCE"
         conn.close()
 
-    @patch("src.sync.fetch_all_records")
-    def test_skips_duplicates(self, mock_fetch, db_path):
-        mock_fetch.return_value = [
+    @patch("src.sync.iter_pages")
+    def test_skips_duplicates(self, mock_pages, db_path):
+        mock_pages.return_value = [[
             _make_call_feature("CFS-001"),
             _make_call_feature("CFS-001"),
-        ]
+        ]]
         count = sync_calls_for_service(db_path)
         assert count == 1
 
@@ -298,9 +552,9 @@ class TestSyncCallsForService:
 # ---------------------------------------------------------------------------
 
 class TestSyncShotspotter:
-    @patch("src.sync.fetch_all_records")
-    def test_inserts_records(self, mock_fetch, db_path):
-        mock_fetch.return_value = [_make_shotspotter_feature("SS-001")]
+    @patch("src.sync.iter_pages")
+    def test_inserts_records(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_shotspotter_feature("SS-001")]]
         count = sync_shotspotter(db_path)
         assert count == 1
 
@@ -311,6 +565,253 @@ class TestSyncShotspotter:
         conn.close()
 
 
+# ---------------------------------------------------------------------------
+# Tests for incremental (watermark) sync
+# ---------------------------------------------------------------------------
+
+class TestIncrementalSync:
+    def test_where_is_everything_before_first_sync(self, db_path):
+        assert _incremental_where(db_path, "crimes") == "1=1"
+
+    @patch("src.sync.iter_pages")
+    def test_sync_records_watermark(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+        assert get_watermark(db_path, "crimes") == 1700000000000
+
+    @patch("src.sync.iter_pages")
+    def test_incremental_where_applies_overlap(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+
+        where = _incremental_where(db_path, "crimes", overlap_hours=24)
+        # 1700000000000 ms = 2023-11-14 22:13:20 UTC, minus one day
+        assert where == "reportdate >= TIMESTAMP '2023-11-13 22:13:20'"
+
+    @patch("src.sync.iter_pages")
+    def test_incremental_sync_passes_where(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_call_feature("CFS-001")]]
+        sync_calls_for_service(db_path)
+        sync_calls_for_service(db_path, incremental=True)
+
+        assert mock_pages.call_args_list[0][0][1] == "1=1"
+        assert mock_pages.call_args_list[1][0][1].startswith("calldate >= TIMESTAMP")
+
+    @patch("src.sync.iter_pages")
+    def test_watermark_never_moves_backwards(self, mock_pages, db_path):
+        newer = _make_crime_feature("OFF-001")
+        older = _make_crime_feature("OFF-002")
+        older["attributes"]["reportdate"] = 1600000000000
+        mock_pages.return_value = [[newer]]
+        sync_crimes(db_path)
+        mock_pages.return_value = [[older]]
+        sync_crimes(db_path, incremental=True)
+        assert get_watermark(db_path, "crimes") == 1700000000000
+
+    @patch("src.http_client.time.sleep")
+    @patch("src.http_client.get_response")
+    def test_arcgis_error_body_fails_the_sync(self, mock_response, mock_sleep, db_path):
+        with patch("src.sync.iter_pages", return_value=[[_make_crime_feature("OFF-001")]]):
+            sync_crimes(db_path)
+        newer = _make_crime_feature("OFF-002")
+        newer["attributes"]["reportdate"] = 1800000000000
+        bodies = [{"features": [newer], "exceededTransferLimit": True}] + [
+            {"error": {"code": 500, "message": "Unable to complete operation."}}
+        ] * 10
+        mock_response.side_effect = [MagicMock(content=json.dumps(b).encode()) for b in bodies]
+
+        with pytest.raises(ArcGISError):
+            sync_crimes(db_path, incremental=True)
+        assert get_watermark(db_path, "crimes") == 1700000000000
+
+
+# ---------------------------------------------------------------------------
+# Tests for change-aware upserts
+# ---------------------------------------------------------------------------
+
+class TestUpsert:
+    @staticmethod
+    def _last_log(db_path):
+        conn = get_connection(db_path)
+        row = conn.execute(
+            "SELECT records_inserted, records_updated, records_unchanged "
+            "FROM sync_log ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        conn.close()
+        return tuple(row)
+
+    @patch("src.sync.iter_pages")
+    def test_edited_record_is_updated(self, mock_pages, db_path):
+        mock_pages.return_value = [[
+            _make_crime_feature("OFF-001"), _make_crime_feature("OFF-002"),
+        ]]
+        sync_crimes(db_path)
+        assert self._last_log(db_path) == (2, 0, 0)
+
+        edited = _make_crime_feature("OFF-002")
+        edited["attributes"]["nibrsoffense"] = "Robbery"
+        mock_pages.return_value = [[
+            _make_crime_feature("OFF-001"), edited, _make_crime_feature("OFF-003"),
+        ]]
+        assert sync_crimes(db_path) == 3
+        assert self._last_log(db_path) == (1, 1, 1)
+
+        conn = get_connection(db_path)
+        offense = conn.execute(
+            "SELECT nibrs_offense FROM crimes_decoded WHERE offense_id = 'OFF-002'"
+        ).fetchone()[0]
+        conn.close()
+        assert offense == "Robbery"
+
+    @patch("src.sync.iter_pages")
+    def test_unchanged_records_are_not_rewritten(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_call_feature("CFS-001")]]
+        sync_calls_for_service(db_path)
+        conn = get_connection(db_path)
+        conn.execute("UPDATE calls_for_service SET synced_at = 'marker'")
+        conn.commit()
+        conn.close()
+
+        sync_calls_for_service(db_path)
+
+        conn = get_connection(db_path)
+        synced_at = conn.execute("SELECT synced_at FROM calls_for_service").fetchone()[0]
+        conn.close()
+        assert synced_at == "marker"
+        assert self._last_log(db_path) == (0, 0, 1)
+
+
+# ---------------------------------------------------------------------------
+# Tests for deletion reconciliation
+# ---------------------------------------------------------------------------
+
+class TestReconcileDeletions:
+    def test_sorted_difference(self):
+        assert list(_sorted_difference([1, 2, 4, 7, 9], [2, 3, 4, 9])) == [1, 7]
+        assert list(_sorted_difference([1, 2], [])) == [1, 2]
+
+    @pytest.fixture
+    def synced(self, db_path):
+        with patch("src.sync.iter_pages") as mock_pages:
+            mock_pages.return_value = [[
+                _with_oid(_make_crime_feature(f"OFF-{i}"), i) for i in range(1, 41)
+            ]]
+            sync_crimes(db_path)
+        return db_path
+
+    @patch("src.sync.fetch_object_ids")
+    def test_deletes_rows_missing_upstream(self, mock_ids, synced):
+        mock_ids.return_value = ("OBJECTID", [i for i in range(1, 41) if i != 7])
+
+        assert reconcile_deletions(synced, ["crimes"]) == {"crimes": 1}
+
+        conn = get_connection(synced)
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 39
+        tomb = conn.execute("SELECT natural_key, object_id FROM deleted_records").fetchall()
+        log = conn.execute(
+            "SELECT status, records_deleted FROM sync_log ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        conn.close()
+        assert [tuple(t) for t in tomb] == [("OFF-7", 7)]
+        assert tuple(log) == ("reconciled", 1)
+
+    @patch("src.sync.fetch_object_ids")
+    def test_skips_suspiciously_large_deletions(self, mock_ids, synced):
+        mock_ids.return_value = ("OBJECTID", [])
+
+        assert reconcile_deletions(synced, ["crimes"]) == {"crimes": 0}
+
+        conn = get_connection(synced)
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 40
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Tests for bulk-load mode
+# ---------------------------------------------------------------------------
+
+class TestBulkLoad:
+    @patch("src.sync.iter_pages")
+    def test_empty_table_is_bulk_loaded(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        with patch("src.sync.drop_indexes", wraps=drop_indexes) as mock_drop:
+            sync_crimes(db_path)
+        mock_drop.assert_called_once()
+
+        conn = get_connection(db_path)
+        indexes = {r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='crimes'"
+        )}
+        assert set(INDEXES["crimes"]) <= indexes
+        stats = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'crimes'"
+        ).fetchone()[0]
+        assert stats > 0
+        conn.close()
+
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_streets_refreshed_only_after_point_table_changes(
+        self, mock_pages, mock_fetch, db_path,
+    ):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        mock_fetch.return_value = [_make_boundary_feature("Beat 1A")]
+        with patch("src.sync.refresh_streets", wraps=refresh_streets) as mock_refresh:
+            sync_crimes(db_path)
+            assert mock_refresh.call_count == 1
+            sync_crimes(db_path)  # nothing changed
+            sync_boundaries(db_path)
+        assert mock_refresh.call_count == 1
+
+    @patch("src.sync.iter_pages")
+    def test_populated_table_keeps_indexes(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+        mock_pages.return_value = [[_make_crime_feature("OFF-002")]]
+        with patch("src.sync.drop_indexes") as mock_drop:
+            assert sync_crimes(db_path) == 2
+        mock_drop.assert_not_called()
+
+    @patch("src.sync.iter_pages")
+    def test_rebuild_replaces_rows_and_watermark(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+        fresh = _make_crime_feature("OFF-002")
+        fresh["attributes"]["reportdate"] = 1600000000000
+        mock_pages.return_value = [[fresh]]
+
+        assert sync_crimes(db_path, incremental=True, rebuild=True) == 1
+        assert mock_pages.call_args[0][1] == "1=1"
+        assert get_watermark(db_path, "crimes") == 1600000000000
+
+    @patch("src.sync.iter_pages")
+    def test_failed_rebuild_keeps_rows_and_watermark(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+        watermark = get_watermark(db_path, "crimes")
+
+        def pages(url, where="1=1", **query):
+            yield [_make_crime_feature("OFF-002")]
+            raise RuntimeError("upstream 500")
+
+        mock_pages.side_effect = pages
+        with pytest.raises(RuntimeError):
+            sync_crimes(db_path, rebuild=True)
+
+        assert get_watermark(db_path, "crimes") == watermark
+        conn = get_connection(db_path)
+        assert [r[0] for r in conn.execute("SELECT offense_id FROM crimes")] == ["OFF-001"]
+        indexes = {r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='crimes'"
+        )}
+        assert set(INDEXES["crimes"]) <= indexes
+        status = conn.execute(
+            "SELECT status FROM sync_log ORDER BY id DESC LIMIT 1"
+        ).fetchone()[0]
+        conn.close()
+        assert status == "failed"
+
+
 # ---------------------------------------------------------------------------
 # Tests for sync_boundaries
 # ---------------------------------------------------------------------------
@@ -326,25 +827,58 @@ class TestSyncBoundaries:
         conn = get_connection(db_path)
         rows = conn.execute("SELECT * FROM boundaries").fetchall()
         assert len(rows) == 3
-        # Verify geometry stored as JSON string
+        # Rings are stored as GeoJSON, plus simplified levels and a bbox
         geom = json.loads(rows[0]["geometry_geojson"])
-        assert "rings" in geom
+        assert geom == {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        }
+        assert json.loads(rows[0]["geojson_coarse"]) == geom
+        assert (rows[0]["min_lat"], rows[0]["max_lon"]) == (0, 1)
+        assert (rows[0]["centroid_lat"], rows[0]["centroid_lon"]) == (0.5, 0.5)
+        assert rows[0]["vertices"] == 5
+        conn.close()
+
+    @patch("src.sync.fetch_all_records")
+    def test_unchanged_boundaries_are_not_counted_as_updated(self, mock_fetch, db_path):
+        mock_fetch.return_value = [_make_boundary_feature("Beat 1A")]
+        sync_boundaries(db_path)
+        sync_boundaries(db_path)
+        moved = _make_boundary_feature("Beat 1A")
+        moved["geometry"]["rings"][0][2] = [2, 2]
+        mock_fetch.side_effect = [[moved], *[[_make_boundary_feature("Beat 1A")]] * 2]
+        sync_boundaries(db_path)
+
+        conn = get_connection(db_path)
+        logged = conn.execute(
+            "SELECT records_inserted, records_updated, records_unchanged FROM sync_log "
+            "WHERE table_name = 'boundaries' ORDER BY id"
+        ).fetchall()
+        assert [tuple(r) for r in logged] == [(3, 0, 0), (0, 0, 3), (0, 1, 2)]
+        assert conn.execute(
+            "SELECT max_lat FROM boundaries WHERE boundary_type = 'beats'"
+        ).fetchone()[0] == 2
         conn.close()
 
 
 # ---------------------------------------------------------------------------
-# Tests for _log_sync
+# Tests for sync_log telemetry
 # ---------------------------------------------------------------------------
 
-class TestLogSync:
-    def test_inserts_log_entry(self, db_path):
-        _log_sync(db_path, "test_source", "test_table", 42)
+class TestSyncLog:
+    @patch("src.sync.iter_pages")
+    def test_sync_writes_log_entry(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001"), _make_crime_feature("OFF-002")]]
+        sync_crimes(db_path)
         conn = get_connection(db_path)
-        row = conn.execute("SELECT * FROM sync_log").fetchone()
-        assert row["source"] == "test_source"
-        assert row["table_name"] == "test_table"
-        assert row["records_fetched"] == 42
+        (row,) = conn.execute("SELECT * FROM sync_log").fetchall()
+        assert row["source"] == "peoria_pd_arcgis"
+        assert row["table_name"] == "crimes"
+        assert row["records_fetched"] == 2
+        assert row["table_rows"] == 2
         assert row["status"] == "completed"
+        assert row["completed_at"] is not None
+        assert row["run_id"]
         conn.close()
 
 
@@ -353,48 +887,38 @@ class TestLogSync:
 # ---------------------------------------------------------------------------
 
 class TestRunFullSync:
-    @patch("src.sync.sync_boundaries")
-    @patch("src.sync.sync_shotspotter")
-    @patch("src.sync.sync_calls_for_service")
-    @patch("src.sync.sync_crimes")
-    @patch("src.sync.init_db")
-    def test_calls_all_sync_functions(
-        self, mock_init, mock_crimes, mock_calls, mock_ss, mock_bounds
-    ):
-        mock_crimes.return_value = 100
-        mock_calls.return_value = 50
-        mock_ss.return_value = 10
-        mock_bounds.return_value = 5
+    @staticmethod
+    def _pages_by_layer(url, where="1=1", **query):
+        if url == ENDPOINTS["crimes"]:
+            return iter([[_make_crime_feature("OFF-001"), _make_crime_feature("OFF-002")]])
+        if url == ENDPOINTS["calls_for_service"]:
+            return iter([[_make_call_feature("CFS-001")]])
+        return iter([[_make_shotspotter_feature("SS-001")]])
 
-        result = run_full_sync(db_path="/tmp/test.db")
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_syncs_all_sources(self, mock_pages, mock_fetch, db_path):
+        mock_pages.side_effect = self._pages_by_layer
+        mock_fetch.return_value = [_make_boundary_feature("Beat 1A")]
 
-        mock_init.assert_called_once_with("/tmp/test.db")
-        mock_crimes.assert_called_once_with("/tmp/test.db")
-        mock_calls.assert_called_once_with("/tmp/test.db")
-        mock_ss.assert_called_once_with("/tmp/test.db")
-        mock_bounds.assert_called_once_with("/tmp/test.db")
+        result = run_full_sync(db_path=db_path)
 
         assert result == {
-            "crimes": 100,
-            "calls_for_service": 50,
-            "shotspotter": 10,
-            "boundaries": 5,
+            "crimes": 2,
+            "calls_for_service": 1,
+            "shotspotter": 1,
+            "boundaries": 3,
         }
+        assert mock_pages.call_count == 3
+        assert mock_fetch.call_count == 3
 
-    @patch("src.sync.sync_boundaries")
-    @patch("src.sync.sync_shotspotter")
-    @patch("src.sync.sync_calls_for_service")
-    @patch("src.sync.sync_crimes")
-    @patch("src.sync.init_db")
-    def test_returns_count_dict(
-        self, mock_init, mock_crimes, mock_calls, mock_ss, mock_bounds
-    ):
-        mock_crimes.return_value = 0
-        mock_calls.return_value = 0
-        mock_ss.return_value = 0
-        mock_bounds.return_value = 0
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_returns_count_dict_with_timings(self, mock_pages, mock_fetch, db_path):
+        mock_pages.side_effect = self._pages_by_layer
+        mock_fetch.return_value = []
 
-        result = run_full_sync(db_path="/tmp/test2.db")
+        result = run_full_sync(db_path=db_path)
 
         assert isinstance(result, dict)
         assert set(result.keys()) == {
@@ -403,3 +927,392 @@ class TestRunFullSync:
             "shotspotter",
             "boundaries",
         }
+        assert set(result.timings) == set(result.keys())
+        assert all(t >= 0 for t in result.timings.values())
+
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_reports_peak_memory_per_run(self, mock_pages, mock_fetch, db_path):
+        mock_fetch.return_value = []
+
+        def heavy(url, where="1=1", **query):
+            ballast = bytearray(20 * 2**20)
+            yield from self._pages_by_layer(url, where)
+            del ballast
+
+        mock_pages.side_effect = heavy
+        assert run_full_sync(db_path=db_path).peak_memory_kb >= 0
+        with patch("src.sync.TRACE_MEMORY", True):
+            first = run_full_sync(db_path=db_path).peak_memory_kb
+            mock_pages.side_effect = self._pages_by_layer
+            second = run_full_sync(db_path=db_path).peak_memory_kb
+        assert first > 20 * 1024 > second
+
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_logs_every_source(self, mock_pages, mock_fetch, db_path):
+        mock_pages.side_effect = self._pages_by_layer
+        mock_fetch.return_value = []
+
+        run_full_sync(db_path=db_path)
+
+        conn = get_connection(db_path)
+        rows = conn.execute(
+            "SELECT table_name, status, duration_seconds FROM sync_log"
+        ).fetchall()
+        conn.close()
+        assert {r["table_name"] for r in rows} == {
+            "crimes", "calls_for_service", "shotspotter", "boundaries",
+        }
+        assert all(r["status"] == "completed" for r in rows)
+        assert all(r["duration_seconds"] is not None for r in rows)
+
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_failed_source_does_not_block_others(self, mock_pages, mock_fetch, db_path):
+        def pages(url, where="1=1", **query):
+            if url == ENDPOINTS["calls_for_service"]:
+                raise RuntimeError("upstream 500")
+            return self._pages_by_layer(url, where)
+
+        mock_pages.side_effect = pages
+        mock_fetch.return_value = []
+
+        with pytest.raises(RuntimeError):
+            run_full_sync(db_path=db_path)
+
+        conn = get_connection(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 2
+        status = conn.execute(
+            "SELECT status FROM sync_log WHERE table_name = 'calls_for_service'"
+        ).fetchone()[0]
+        conn.close()
+        assert status == "failed"
+
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_rebuild_readers_keep_old_rows(self, mock_pages, mock_fetch, db_path):
+        mock_pages.side_effect = self._pages_by_layer
+        mock_fetch.return_value = []
+        run_full_sync(db_path=db_path)
+        seen = []
+
+        def pages(url, where="1=1", **query):
+            if url == ENDPOINTS["shotspotter"]:
+                raise RuntimeError("upstream 500")
+            if url == ENDPOINTS["calls_for_service"]:
+                for n in range(3):
+                    yield [_make_call_feature(f"CFS-NEW-{n}")]
+                    reader = get_connection(db_path)
+                    seen.append((
+                        reader.execute("SELECT COUNT(*) FROM calls_for_service").fetchone()[0],
+                        reader.execute("SELECT COUNT(*) FROM calls_for_service_rtree").fetchone()[0],
+                        {r[0] for r in reader.execute(
+                            "SELECT name FROM sqlite_master "
+                            "WHERE type = 'index' AND tbl_name = 'calls_for_service'"
+                        )} >= set(INDEXES["calls_for_service"]),
+                    ))
+                    reader.close()
+                return
+            yield from self._pages_by_layer(url, where)
+
+        mock_pages.side_effect = pages
+        with pytest.raises(RuntimeError):
+            run_full_sync(db_path=db_path, rebuild=True)
+
+        # calls kept its old row, R*Tree and indexes until its own rebuild
+        # committed; the failed shotspotter rebuild left its table as it was
+        assert seen == [(1, 1, True)] * 3
+        conn = get_connection(db_path)
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("crimes", "calls_for_service", "shotspotter")
+        }
+        conn.close()
+        assert counts == {"crimes": 2, "calls_for_service": 3, "shotspotter": 1}
+
+
+# ---------------------------------------------------------------------------
+# Tests for replay_archive
+# ---------------------------------------------------------------------------
+
+class TestReplayArchive:
+    @patch("src.sync.iter_pages")
+    def test_full_sync_prunes_superseded_runs(self, mock_pages, db_path, archive_dir):
+        for offense_id in ("OFF-001", "OFF-002"):
+            mock_pages.return_value = [[_make_crime_feature(offense_id)]]
+            sync_crimes(db_path)
+
+        archive = PageArchive(archive_dir)
+        (run,) = archive.runs("crimes")
+        assert len(list((archive_dir / "objects").rglob("*.json.gz"))) == 1
+        assert archive.get_page(run["pages"][0])[0]["attributes"]["offenseid"] == "OFF-002"
+
+    @patch("src.sync.fetch_all_records")
+    @patch("src.sync.iter_pages")
+    def test_rebuilds_from_archive(self, mock_pages, mock_fetch, db_path, archive_dir):
+        mock_pages.side_effect = TestRunFullSync._pages_by_layer
+        mock_fetch.return_value = [_make_boundary_feature("Beat 1A")]
+        synced = run_full_sync(db_path=db_path)
+
+        conn = get_connection(db_path)
+        before = conn.execute("SELECT * FROM crimes ORDER BY offense_id").fetchall()
+        for table in synced:
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+        conn.close()
+        mock_pages.reset_mock()
+        mock_fetch.reset_mock()
+
+        result = replay_archive(db_path, archive_dir=archive_dir)
+
+        assert result == synced
+        mock_pages.assert_not_called()
+        mock_fetch.assert_not_called()
+        conn = get_connection(db_path)
+        after = conn.execute("SELECT * FROM crimes ORDER BY offense_id").fetchall()
+        assert [r["row_hash"] for r in after] == [r["row_hash"] for r in before]
+        status = conn.execute(
+            "SELECT DISTINCT source FROM sync_log WHERE id > 4"
+        ).fetchall()
+        assert [r[0] for r in status] == ["archive_replay"]
+        conn.close()
+
+    @patch("src.sync.iter_pages")
+    def test_incremental_runs_are_compacted(self, mock_pages, db_path, archive_dir):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+        with patch("src.sync.ARCHIVE_MAX_INCREMENTAL_RUNS", 2):
+            for n in range(2, 5):
+                mock_pages.return_value = [[_make_crime_feature(f"OFF-00{n}", lat=40 + n)]]
+                sync_crimes(db_path, incremental=True)
+
+        archive = PageArchive(archive_dir)
+        assert [run["where"] for run in archive.runs("crimes")] == ["1=1"]
+        (page,) = archive.replay("crimes")
+        assert [f["attributes"]["offenseid"] for f in page] == [
+            "OFF-001", "OFF-002", "OFF-003", "OFF-004",
+        ]
+
+    @patch("src.sync.iter_pages")
+    def test_applies_incremental_runs(self, mock_pages, db_path, archive_dir):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+        changed = _make_crime_feature("OFF-001")
+        changed["attributes"]["fulladdr"] = "999 ELM ST"
+        mock_pages.return_value = [[changed, _make_crime_feature("OFF-002")]]
+        sync_crimes(db_path, incremental=True)
+
+        result = replay_archive(db_path, tables=["crimes"], archive_dir=archive_dir)
+
+        assert result == {"crimes": 2}
+        conn = get_connection(db_path)
+        row = conn.execute("SELECT address FROM crimes WHERE offense_id = 'OFF-001'").fetchone()
+        assert row["address"] == "999 ELM ST"
+        conn.close()
+
+    def test_leaves_unarchived_tables(self, db_path, archive_dir):
+        conn = get_connection(db_path)
+        conn.execute("INSERT INTO crimes (offense_id) VALUES ('OFF-001')")
+        conn.commit()
+        conn.close()
+
+        assert replay_archive(db_path, archive_dir=archive_dir) == {}
+
+        conn = get_connection(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 1
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Tests for backfill
+# ---------------------------------------------------------------------------
+
+class TestBackfill:
+    def test_monthly_windows(self):
+        windows = backfill_windows("crimes", "2024-11-01", end=datetime(2025, 1, 15))
+
+        assert [key for key, _ in windows] == [
+            "undated", "before-2024-11", "2024-11", "2024-12", "2025-01",
+        ]
+        assert windows[0][1] == "reportdate IS NULL"
+        assert windows[2][1] == (
+            "reportdate >= TIMESTAMP '2024-11-01 00:00:00' AND "
+            "reportdate < TIMESTAMP '2024-12-01 00:00:00'"
+        )
+        assert windows[-1][1] == "reportdate >= TIMESTAMP '2025-01-01 00:00:00'"
+
+    END = datetime(2025, 1, 15)
+
+    @staticmethod
+    def _pages_by_window(url, where="1=1", **query):
+        if where.startswith("reportdate >= TIMESTAMP '2024-11"):
+            return iter([[_make_crime_feature("OFF-NOV")]])
+        if where.startswith("reportdate >= TIMESTAMP '2024-12"):
+            return iter([[_make_crime_feature("OFF-DEC1"), _make_crime_feature("OFF-DEC2")]])
+        return iter([])
+
+    @patch("src.sync.iter_pages")
+    def test_loads_windows_and_checkpoints(self, mock_pages, db_path):
+        mock_pages.side_effect = self._pages_by_window
+        summary = backfill(
+            db_path, tables=["crimes"], start="2024-11-01", workers=2, end=self.END,
+        )
+
+        assert summary["crimes"] == {"completed": 5, "failed": 0, "skipped": 0, "records": 3}
+        conn = get_connection(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 3
+        rows = conn.execute(
+            "SELECT window_key, status, records FROM backfill_windows ORDER BY window_key"
+        ).fetchall()
+        assert {r["window_key"]: r["records"] for r in rows}["2024-12"] == 2
+        assert {r["status"] for r in rows} == {"completed"}
+        conn.close()
+
+    @patch("src.sync.iter_pages")
+    def test_resumes_and_retries_failed_windows(self, mock_pages, db_path):
+        def flaky(url, where="1=1", **query):
+            if where.startswith("reportdate >= TIMESTAMP '2024-12"):
+                raise RuntimeError("upstream 500")
+            return self._pages_by_window(url, where)
+
+        mock_pages.side_effect = flaky
+        first = backfill(db_path, tables=["crimes"], start="2024-11-01", end=self.END)
+        mock_pages.side_effect = self._pages_by_window
+        mock_pages.reset_mock()
+        second = backfill(db_path, tables=["crimes"], start="2024-11-01", end=self.END)
+
+        assert first["crimes"]["failed"] == 1
+        assert second["crimes"] == {"completed": 1, "failed": 0, "skipped": 4, "records": 2}
+        assert mock_pages.call_count == 1
+        conn = get_connection(db_path)
+        row = conn.execute(
+            "SELECT status, attempts, error FROM backfill_windows WHERE window_key = '2024-12'"
+        ).fetchone()
+        assert (row["status"], row["attempts"], row["error"]) == ("completed", 2, None)
+        assert conn.execute("SELECT COUNT(*) FROM crimes").fetchone()[0] == 3
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Tests for progress reporting and the command line
+# ---------------------------------------------------------------------------
+
+class TestStatusAndCli:
+    @patch("src.sync.iter_pages")
+    def test_progress_recorded(self, mock_pages, db_path):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+        sync_crimes(db_path)
+
+        status = sync_status(db_path)
+        assert status["lock"] is None
+        (row,) = status["progress"]
+        assert (row["table_name"], row["status"], row["records_fetched"]) == ("crimes", "completed", 1)
+        assert row["finished_at"] is not None
+
+    def test_status_ignores_dead_lock_holder(self, db_path):
+        with advisory_lock(db_path, SYNC_LOCK) as owner:
+            assert sync_status(db_path)["lock"]["owner"] == owner
+        conn = get_connection(db_path)
+        conn.execute(
+            "INSERT INTO locks VALUES (?, ?, datetime('now'), datetime('now'))",
+            (SYNC_LOCK, f"{socket.gethostname()}:999999999:1"),
+        )
+        conn.commit()
+        conn.close()
+        assert sync_status(db_path)["lock"] is None
+
+    @patch("src.sync.iter_pages")
+    def test_source_command(self, mock_pages, db_path, capsys):
+        mock_pages.return_value = [[_make_crime_feature("OFF-001")]]
+
+        assert main(["--db", str(db_path), "source", "crimes", "--incremental"]) == 0
+        assert capsys.readouterr().out.strip() == "1"
+
+    @patch("src.sync.iter_pages")
+    def test_page_telemetry(self, mock_pages, db_path):
+        pages = [
+            FeaturePage([_make_crime_feature("OFF-001"), _make_crime_feature("OFF-002")],
+                        latency=0.2, nbytes=900, decode_seconds=0.01),
+            FeaturePage([_make_crime_feature("OFF-003")],
+                        latency=0.4, nbytes=500, decode_seconds=0.02),
+        ]
+        mock_pages.return_value = pages
+        sync_crimes(db_path, batch_size=1)
+        mock_pages.return_value = pages
+        sync_crimes(db_path)
+
+        conn = get_connection(db_path)
+        stats = conn.execute(
+            "SELECT * FROM sync_page_stats ORDER BY id"
+        ).fetchall()
+        assert [(r["page_no"], r["rows"], r["rows_written"], r["rows_ignored"])
+                for r in stats] == [(1, 2, 2, 0), (2, 1, 1, 0), (1, 2, 0, 2), (2, 1, 0, 1)]
+        assert stats[0]["response_bytes"] == 900
+        log = conn.execute(
+            "SELECT * FROM sync_log WHERE run_id = ?", (stats[0]["run_id"],)
+        ).fetchone()
+        assert log["pages"] == 2
+        assert log["response_bytes"] == 1400
+        assert (log["p50_page_seconds"], log["p95_page_seconds"]) == (0.2, 0.4)
+        assert log["decode_seconds"] == 0.03
+        assert log["records_fetched"] == 3
+        assert log["table_rows"] == 3
+        conn.close()
+
+    def test_percentile(self):
+        assert _percentile([], 50) is None
+        assert _percentile([3, 1, 2, 4], 50) == 2
+        assert _percentile([3, 1, 2, 4], 95) == 4
+
+    def test_locked_exits_2(self, db_path):
+        from src.database import advisory_lock
+
+        with advisory_lock(db_path, "sync"):
+            assert main(["--db", str(db_path), "reconcile"]) == 2
+
+
+# ---------------------------------------------------------------------------
+# End-to-end tests against the local ArcGIS stand-in
+# ---------------------------------------------------------------------------
+
+class TestAgainstStub:
+    SIZES = {"crimes": 2500, "calls_for_service": 1200, "shotspotter": 30}
+
+    @pytest.fixture
+    def stub(self, layer_info):
+        layer_info.side_effect = fetch_layer_info  # the real metadata request
+        with ArcGISStub(self.SIZES, error_rate=0.05, max_record_count=1000) as server:
+            with patch.dict(ENDPOINTS, server.endpoints):
+                yield server
+
+    def test_full_sync(self, stub, db_path):
+        result = run_full_sync(db_path=db_path, workers=2)
+
+        assert result == {**self.SIZES, "boundaries": 35}
+        conn = get_connection(db_path)
+        row = conn.execute(
+            "SELECT report_date, latitude FROM crimes WHERE offense_id = 'OFF-0000001'"
+        ).fetchone()
+        assert row["report_date"].startswith("2019-01-01")
+        assert row["latitude"] == round(row["latitude"], 6)
+        conn.close()
+
+    def test_incremental_resync_changes_nothing(self, stub, db_path):
+        run_full_sync(db_path=db_path)
+        requests_before = stub.stats["requests"]
+
+        assert sync_crimes(db_path, incremental=True) == 2500
+        assert stub.stats["requests"] > requests_before
+        assert reconcile_deletions(db_path) == {
+            "crimes": 0, "calls_for_service": 0, "shotspotter": 0,
+        }
+
+    def test_backfill(self, stub, db_path):
+        summary = backfill(db_path, tables=["crimes"], start="2019-01-01", months=12)
+
+        assert summary["crimes"]["records"] == 2500
+        assert summary["crimes"]["failed"] == 0
+        resumed = backfill(db_path, tables=["crimes"], start="2019-01-01", months=12)
+        assert resumed["crimes"]["completed"] == 0
+        assert resumed["crimes"]["skipped"] == summary["crimes"]["completed"]